@@ -0,0 +1,246 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.12 - Admission Control for LLM Work
+#
+# Every chat turn and generation ends in calls to one shared Groq account,
+# and nothing used to stop a single user from sending many at once. Two
+# layers now sit in front of the LLM:
+#
+#   1. Rate limits (RateLimiter). /api/chat, /api/chat/stream and
+#      /api/generate each take a token from the user's bucket and from a
+#      global bucket. An empty bucket means 429 with Retry-After, before any
+#      work is done.
+#   2. A concurrency gate (FairGate). Every LLM call holds one of
+#      LLM_MAX_CONCURRENCY slots, and one user never holds more than
+#      LLM_USER_MAX_CONCURRENCY. Waiting calls are served round-robin
+#      across users, so one user's burst cannot starve the others. Once
+#      LLM_QUEUE_MAX calls are waiting, new chat requests get 429 at once
+#      instead of piling up. Generation jobs and background summaries
+#      always wait, since they are already queued work.
+#
+# Limits are per process. Set ADMISSION_ENABLED=0 to turn both layers off.
+# --------------------------------------------------------------------------
+
+import asyncio
+import contextvars
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+import metrics
+
+# --- Admission Configuration ---
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+CHAT_RATE_PER_MINUTE = float(os.getenv("CHAT_RATE_PER_MINUTE", "30"))
+CHAT_BURST = int(os.getenv("CHAT_BURST", "10"))
+GENERATE_RATE_PER_MINUTE = float(os.getenv("GENERATE_RATE_PER_MINUTE", "6"))
+GENERATE_BURST = int(os.getenv("GENERATE_BURST", "3"))
+GLOBAL_CHAT_RATE_PER_MINUTE = float(os.getenv("GLOBAL_CHAT_RATE_PER_MINUTE", "1200"))
+GLOBAL_GENERATE_RATE_PER_MINUTE = float(os.getenv("GLOBAL_GENERATE_RATE_PER_MINUTE", "300"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_USER_MAX_CONCURRENCY = int(os.getenv("LLM_USER_MAX_CONCURRENCY", "4"))
+LLM_QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", "200"))
+
+# Users whose buckets are remembered; the least recently seen are forgotten (i.e. refilled).
+MAX_TRACKED_USERS = 100_000
+
+# Who the LLM calls of the current task are made for. Set by the job worker
+# for a generation; calls made with no user set share the "background" key,
+# which is only held to the overall limit.
+BACKGROUND = "background"
+current_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("admission_user", default=None)
+
+
+class Rejected(Exception):
+    """Raised when a request is turned away. `retry_after` is in whole seconds."""
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _seconds(value: float) -> int:
+    return max(1, math.ceil(value))
+
+
+# --- Rate Limits ---
+
+class TokenBucket:
+    """Holds up to `burst` tokens and gains `rate` tokens per second."""
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: Optional[float] = None) -> float:
+        """Takes a token and returns 0, or returns how many seconds until one is available."""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def give_back(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class RateLimiter:
+    """A token bucket per user plus one shared by everybody. A rate of 0 means no limit."""
+    def __init__(self, kind: str, per_minute: float, burst: int, global_per_minute: float):
+        self.kind = kind
+        self.per_minute = per_minute
+        self.burst = burst
+        self.global_bucket = TokenBucket(global_per_minute / 60, max(burst, int(global_per_minute // 60) or 1)) \
+            if global_per_minute > 0 else None
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _bucket(self, user: str) -> TokenBucket:
+        bucket = self._buckets.get(user)
+        if bucket is None:
+            bucket = self._buckets[user] = TokenBucket(self.per_minute / 60, self.burst)
+            while len(self._buckets) > MAX_TRACKED_USERS:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(user)
+        return bucket
+
+    def check(self, user: str):
+        """Takes one request's worth from the user's and the global budget, or raises Rejected."""
+        if not ADMISSION_ENABLED:
+            return
+        bucket = self._bucket(user) if self.per_minute > 0 else None
+        if bucket is not None:
+            wait = bucket.take()
+            if wait:
+                raise Rejected("user_rate", _seconds(wait))
+        if self.global_bucket is not None:
+            wait = self.global_bucket.take()
+            if wait:
+                if bucket is not None:
+                    bucket.give_back() # The user's request was not the problem
+                raise Rejected("global_rate", _seconds(wait))
+
+    def stats(self) -> dict:
+        return {"tracked_users": len(self._buckets)}
+
+
+# --- Concurrency Gate ---
+
+class FairGate:
+    """
+    Limits concurrent LLM calls, overall and per user. Waiters are granted
+    slots round-robin by user; a user at their own limit is skipped.
+    """
+    def __init__(self, capacity: int = LLM_MAX_CONCURRENCY, per_user: int = LLM_USER_MAX_CONCURRENCY,
+                 max_waiting: int = LLM_QUEUE_MAX):
+        self.capacity = capacity
+        self.per_user = per_user
+        self.max_waiting = max_waiting
+        self.active = 0
+        self._active_by_user: Dict[str, int] = {}
+        self._waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.waiting = 0
+        self.granted = 0
+        self.rejected = 0
+        self._hold_seconds = 1.0 # Moving average of how long a slot is held, for Retry-After
+
+    def _grant(self, user: str):
+        self.active += 1
+        self._active_by_user[user] = self._active_by_user.get(user, 0) + 1
+        self.granted += 1
+
+    def _under_user_limit(self, user: str) -> bool:
+        return user == BACKGROUND or self._active_by_user.get(user, 0) < self.per_user
+
+    def _dispatch(self):
+        while self.active < self.capacity and self._waiting:
+            for user, queue in self._waiting.items():
+                if self._under_user_limit(user):
+                    break
+            else:
+                return # Everyone waiting is at their own limit
+            future = queue.popleft()
+            self.waiting -= 1
+            if queue:
+                self._waiting.move_to_end(user) # Next time, the other users go first
+            else:
+                del self._waiting[user]
+            self._grant(user)
+            future.set_result(None)
+
+    def retry_after(self) -> int:
+        return _seconds(self._hold_seconds * (self.waiting + 1) / self.capacity)
+
+    def check_queue(self):
+        """Raises Rejected if LLM_QUEUE_MAX calls are already waiting (used before admitting a request)."""
+        if ADMISSION_ENABLED and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise Rejected("queue_full", self.retry_after())
+
+    async def acquire(self, user: str):
+        """Waits for a slot."""
+        if not self._waiting and self.active < self.capacity and self._under_user_limit(user):
+            self._grant(user)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user, deque()).append(future)
+        self.waiting += 1
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(user) # Granted just as we were cancelled
+            else:
+                queue = self._waiting.get(user)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    self.waiting -= 1
+                    if not queue:
+                        del self._waiting[user]
+            raise
+
+    def release(self, user: str, held_seconds: Optional[float] = None):
+        self.active -= 1
+        remaining = self._active_by_user.get(user, 1) - 1
+        if remaining:
+            self._active_by_user[user] = remaining
+        else:
+            self._active_by_user.pop(user, None)
+        if held_seconds is not None:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, agent: str, user: Optional[str] = None):
+        """Holds one slot for the duration of the `async with` block. `user` defaults to current_user."""
+        if not ADMISSION_ENABLED:
+            yield
+            return
+        user = user or current_user.get() or BACKGROUND
+        start = time.perf_counter()
+        await self.acquire(user)
+        granted = time.perf_counter()
+        metrics.LLM_QUEUE_SECONDS.observe(granted - start, agent=agent)
+        try:
+            yield
+        finally:
+            self.release(user, time.perf_counter() - granted)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active, "waiting": self.waiting, "waiting_users": len(self._waiting),
+            "granted": self.granted, "rejected": self.rejected,
+        }
+
+
+# --- Global Limiters ---
+chat_limiter = RateLimiter("chat", CHAT_RATE_PER_MINUTE, CHAT_BURST, GLOBAL_CHAT_RATE_PER_MINUTE)
+generate_limiter = RateLimiter("generate", GENERATE_RATE_PER_MINUTE, GENERATE_BURST, GLOBAL_GENERATE_RATE_PER_MINUTE)
+llm_gate = FairGate()
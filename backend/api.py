@@ -6,40 +6,60 @@
 # when creating the response model.
 # --------------------------------------------------------------------------
 
-import smtplib
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import List
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
-from fastapi.concurrency import run_in_threadpool # For running sync LangChain
-import io
-import zipfile
+import asyncio
+import contextlib
 import json
 import re # Import re for safe filenames
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from beanie import PydanticObjectId
+from pymongo.errors import DuplicateKeyError
 
 # Import our new async database and models
 import models
+import admission
+import artifacts
 import auth
+import chat_context
+import chat_store
 import database
+import export
+import jobs
+import mailer
+import metrics
+import progress
+import resilience
+import stage_cache
 
 # Import the core LangChain logic from main.py
-from main import evocore_orchestrator, llm
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+import main
 
 app = FastAPI(
     title="AutoGenesis API",
     description="The backend server, now powered by FastAPI, MongoDB, and Beanie.",
-    version="3.2.1" # Version bump for project ID fix
+    version="3.3.0" # Version bump for async generation jobs
 )
 
-# --- App Startup Event ---
+# Runs /api/generate jobs on a bounded pool of background workers.
+job_manager = jobs.JobManager()
+
+# --- App Startup / Shutdown Events ---
 @app.on_event("startup")
 async def on_startup():
     await database.init_db()
+    await job_manager.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await job_manager.stop()
+    await mailer.mailer.stop()
+    await chat_context.chat_contexts.wait_idle()
+    await chat_store.chat_store.stop()
+    auth.password_hasher.shutdown()
 
 # --- Middleware (No Changes) ---
 app.add_middleware(
@@ -48,11 +68,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed"], # Lets the browser read the pagination cursor, ETags and replays
 )
+# Added last so it is outermost: request latency includes every other middleware.
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+# Component stats exported on /metrics next to the request and agent metrics.
+metrics.registry.register_stats("generation_queue", lambda: {"depth": job_manager.queue.qsize()})
+metrics.registry.register_stats("password_hasher", auth.password_hasher.stats)
+metrics.registry.register_stats("mailer", mailer.mailer.stats)
+metrics.registry.register_stats("auth_token_cache", auth.token_cache.stats)
+metrics.registry.register_stats("auth_user_cache", auth.user_cache.stats)
+metrics.registry.register_stats("stage_cache", stage_cache.cache.stats)
+metrics.registry.register_stats("chat_context", chat_context.chat_contexts.stats)
+metrics.registry.register_stats("chat_store", chat_store.chat_store.stats)
+metrics.registry.register_stats("progress", progress.hub.stats)
+metrics.registry.register_stats("llm_gate", admission.llm_gate.stats)
+metrics.registry.register_stats("chat_limiter", admission.chat_limiter.stats)
+metrics.registry.register_stats("generate_limiter", admission.generate_limiter.stats)
+metrics.registry.register_stats("agent_calls", resilience.caller.stats)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint. Protected by METRICS_TOKEN when that is set."""
+    if metrics.METRICS_TOKEN and authorization != f"Bearer {metrics.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # --- AUTHENTICATION ENDPOINTS (Async / Beanie) ---
 
+PASSWORD_HASHER_BUSY_DETAIL = "Too many sign-ins at once. Please try again in a moment."
+
 @app.post("/api/signup", response_model=models.UserDisplay)
 async def signup(user: models.UserCreate):
     db_user = await auth.get_user(user.email)
@@ -68,14 +115,19 @@ async def signup(user: models.UserCreate):
         )
     except Exception as e:
         print(f"!!! SEVERE ERROR during signup for {user.email}: {e}")
-        if isinstance(e, smtplib.SMTPAuthenticationError):
-             raise HTTPException(status_code=500, detail="Could not send verification email. Please check server email credentials.")
-        else:
-            raise HTTPException(status_code=500, detail=f"Could not create user: {e}")
+        if isinstance(e, DuplicateKeyError):
+            # Lost a race with a concurrent signup for the same email (unique index on users.email).
+            raise HTTPException(status_code=400, detail="Email already registered")
+        if isinstance(e, auth.PasswordHasherBusy):
+            raise HTTPException(status_code=503, detail=PASSWORD_HASHER_BUSY_DETAIL, headers={"Retry-After": "1"})
+        raise HTTPException(status_code=500, detail=f"Could not create user: {e}")
 
 @app.post("/api/login", response_model=models.Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = await auth.authenticate_user(email=form_data.username, password=form_data.password)
+    try:
+        user = await auth.authenticate_user(email=form_data.username, password=form_data.password)
+    except auth.PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail=PASSWORD_HASHER_BUSY_DETAIL, headers={"Retry-After": "1"})
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     if not user.is_verified:
@@ -102,6 +154,7 @@ async def verify_otp(request: models.OtpVerify):
     user.otp_secret = None
     user.otp_expires_at = None
     await user.save()
+    auth.invalidate_user(user.email)
 
     access_token = auth.create_access_token(data={"sub": user.email})
     return models.Token(access_token=access_token, token_type="bearer")
@@ -118,45 +171,73 @@ async def resend_otp(request: models.ResendOtpRequest):
     user.otp_secret = new_otp
     user.otp_expires_at = datetime.now(timezone.utc) + timedelta(minutes=auth.OTP_EXPIRE_MINUTES)
     await user.save()
+    auth.invalidate_user(user.email)
     
-    auth.send_verification_email(user.email, new_otp)
+    try:
+        auth.send_verification_email(user.email, new_otp)
+    except mailer.MailQueueFull:
+        raise HTTPException(status_code=503, detail="Too many emails queued. Please try again shortly.", headers={"Retry-After": "5"})
     return {"message": "A new OTP has been sent to your email address."}
 
 @app.get("/api/users/me", response_model=models.UserDisplay)
-async def get_current_user_profile(current_user: models.User = Depends(auth.get_current_user)):
+async def get_current_user_profile(current_user: models.UserSnapshot = Depends(auth.get_current_user)):
     return models.UserDisplay(
         _id=current_user.id, name=current_user.name, email=current_user.email,
         age=current_user.age, profession=current_user.profession,
         is_verified=current_user.is_verified, created_at=current_user.created_at
     )
 
+# --- PAGINATION ---
+# List endpoints use keyset pagination on _id: `?after=<id>&limit=<n>`
+# (`?before=` for the chat history, which pages backwards in time).
+# A full page sets the X-Next-Cursor header to the id to pass as the cursor.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_BULK_EXPORT_IDS = 1000
+
+def _parse_cursor(after: str) -> PydanticObjectId:
+    try:
+        return PydanticObjectId(after)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def _paginate(response: Response, items: list, limit: int) -> list:
+    """Trims a `limit + 1` result to one page and sets X-Next-Cursor if there is more."""
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = str(items[-1].id)
+    return items
+
 # --- CHATBOT ENDPOINTS ---
 
 @app.get("/api/chat/history", response_model=List[models.ChatMessageDisplay])
-async def get_chat_history(current_user: models.User = Depends(auth.get_current_user)):
-    messages = await models.ChatMessage.find(
-        models.ChatMessage.user_id == current_user.id
-    ).sort(+models.ChatMessage.timestamp).to_list()
-    
-    return [
-        models.ChatMessageDisplay(
-            _id=msg.id, sender=msg.sender, text=msg.text, timestamp=msg.timestamp
-        ) 
-        for msg in messages
-    ]
+async def get_chat_history(
+    response: Response,
+    before: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: models.UserSnapshot = Depends(auth.get_current_user)
+):
+    """
+    Returns the user's chat messages, newest first, one page at a time.
+    Pass the X-Next-Cursor header of a response as `before` to get the next, older page.
+    """
+    query = {"user_id": current_user.id}
+    if before is not None:
+        query["_id"] = {"$lt": _parse_cursor(before)}
 
-@app.post("/api/chat", response_model=models.ChatMessageDisplay)
-async def handle_chat(request: models.ChatRequest, current_user: models.User = Depends(auth.get_current_user)):
-    user_message = models.ChatMessage(user_id=current_user.id, sender="user", text=request.question)
-    await user_message.insert()
+    try:
+        # Messages from the last few milliseconds may still be in the write-behind buffer.
+        await chat_store.chat_store.flush()
+    except Exception as e:
+        print(f"!!! [ChatStore] Serving chat history without the buffered messages: {e}")
 
-    history_docs = await models.ChatMessage.find(
-        models.ChatMessage.user_id == current_user.id
-    ).sort(-models.ChatMessage.timestamp).limit(10).to_list()
-    
-    chat_history_str = "\n".join([f"{msg.sender}: {msg.text}" for msg in reversed(history_docs)])
+    messages = await models.ChatMessage.find(query).sort(
+        -models.ChatMessage.id
+    ).limit(limit + 1).project(models.ChatMessageDisplay).to_list()
+    return _paginate(response, messages, limit)
 
-    prompt_template = """You are 'Genesis', your go-to startup advisor AI. I provide sharp, concise, and actionable advice to help entrepreneurs and founders navigate the complexities of building and growing a successful startup.
+CHAT_PROMPT_TEMPLATE = """You are 'Genesis', your go-to startup advisor AI. I provide sharp, concise, and actionable advice to help entrepreneurs and founders navigate the complexities of building and growing a successful startup.
 
         When a user shares their startup idea or asks a question, provide:
         1. **Immediate, specific advice** - Don't just ask questions, provide concrete recommendations
@@ -177,81 +258,315 @@ async def handle_chat(request: models.ChatRequest, current_user: models.User = D
         User's Question: {question}
 
         Your Response:"""
-    prompt = PromptTemplate.from_template(prompt_template)
-    chain = prompt | llm | StrOutputParser()
-    
-    ai_response_text = await run_in_threadpool(
-        chain.invoke, 
-        {"chat_history_str": chat_history_str, "question": request.question}
+
+def _too_many_requests(kind: str, rejected: admission.Rejected) -> HTTPException:
+    metrics.ADMISSION_REJECTIONS.inc(kind=kind, reason=rejected.reason)
+    detail = "You are sending requests too quickly." if rejected.reason == "user_rate" \
+        else "Genesis is very busy right now."
+    return HTTPException(
+        status_code=429, detail=f"{detail} Please try again in a moment.",
+        headers={"Retry-After": str(rejected.retry_after)}
+    )
+
+def _admit_chat(current_user: models.UserSnapshot):
+    """Rate-limits a chat turn and refuses it if too many LLM calls are already waiting (429)."""
+    try:
+        admission.chat_limiter.check(str(current_user.id))
+        admission.llm_gate.check_queue()
+    except admission.Rejected as e:
+        raise _too_many_requests("chat", e)
+
+async def _start_chat_turn(current_user: models.UserSnapshot, question: str) -> Tuple[dict, models.ChatMessage]:
+    """
+    Saves the user's message and builds the chain inputs from the user's chat context
+    (a rolling summary plus the latest messages, see chat_context.py).
+    """
+    chat_history_str = await chat_context.chat_contexts.history_for_prompt(current_user.id)
+
+    # Saved by the write-behind buffer (chat_store.py); the request does not wait for MongoDB.
+    user_message = await chat_store.chat_store.add(
+        models.ChatMessage(user_id=current_user.id, sender="user", text=question)
     )
+    return {"chat_history_str": chat_history_str, "question": question}, user_message
+
+def _chat_chain():
+    # Imported here so workers serving only auth/project traffic never load LangChain.
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    prompt = PromptTemplate.from_template(CHAT_PROMPT_TEMPLATE)
+    return prompt | main.get_llm() | StrOutputParser()
 
-    ai_message = models.ChatMessage(user_id=current_user.id, sender="ai", text=ai_response_text)
-    await ai_message.insert()
+@app.post("/api/chat", response_model=models.ChatMessageDisplay)
+async def handle_chat(request: models.ChatRequest, current_user: models.UserSnapshot = Depends(auth.get_current_user)):
+    _admit_chat(current_user)
+    chain_inputs, user_message = await _start_chat_turn(current_user, request.question)
+    chain = _chat_chain()
+    
+    async with admission.llm_gate.slot("chat", user=str(current_user.id)):
+        ai_response_text = await chain.ainvoke(chain_inputs, config=metrics.llm_config("chat"))
+
+    ai_message = await chat_store.chat_store.add(
+        models.ChatMessage(user_id=current_user.id, sender="ai", text=ai_response_text)
+    )
+    chat_context.chat_contexts.record_turn_later(current_user.id, [user_message, ai_message])
 
     return models.ChatMessageDisplay(
         _id=ai_message.id, sender=ai_message.sender, 
         text=ai_message.text, timestamp=ai_message.timestamp
     )
 
+def _sse(data: dict, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Formats one Server-Sent Event."""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    prefix += f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/api/chat/stream")
+async def handle_chat_stream(request: models.ChatRequest, current_user: models.UserSnapshot = Depends(auth.get_current_user)):
+    """
+    (NEW) Streams the Genesis reply token by token as Server-Sent Events.
+    Each token is sent as `data: {"token": "..."}`. When the reply is complete
+    the AI message is saved and sent as a final `done` event.
+    """
+    _admit_chat(current_user)
+    chain_inputs, user_message = await _start_chat_turn(current_user, request.question)
+    chain = _chat_chain()
+
+    async def event_stream():
+        parts = []
+        try:
+            async with admission.llm_gate.slot("chat", user=str(current_user.id)):
+                async for token in chain.astream(chain_inputs, config=metrics.llm_config("chat")):
+                    if token:
+                        parts.append(token)
+                        yield _sse({"token": token})
+        except Exception as e:
+            print(f"An error occurred while streaming the chat reply: {e}")
+            yield _sse({"detail": "Sorry, something went wrong while generating the reply."}, event="error")
+            return
+
+        ai_message = await chat_store.chat_store.add(
+            models.ChatMessage(user_id=current_user.id, sender="ai", text="".join(parts))
+        )
+        chat_context.chat_contexts.record_turn_later(current_user.id, [user_message, ai_message])
+
+        display = models.ChatMessageDisplay(
+            _id=ai_message.id, sender=ai_message.sender,
+            text=ai_message.text, timestamp=ai_message.timestamp
+        )
+        yield _sse(display.model_dump(mode="json", by_alias=True), event="done")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
 # --- GENERATOR & PROJECT ENDPOINTS ---
 
-@app.post("/api/generate", response_model=models.ProjectDisplay)
-async def generate_mvp(request: models.IdeaRequest, current_user: models.User = Depends(auth.get_current_user)):
+def _job_display(job: models.GenerationJob) -> models.JobDisplay:
+    return models.JobDisplay(
+        _id=job.id, idea=job.idea, mode=job.mode, status=job.status, project_id=job.project_id,
+        error=job.error, cached_stages=job.cached_stages, timings=job.timings, created_at=job.created_at,
+        started_at=job.started_at, finished_at=job.finished_at
+    )
+
+def _admit_generation(current_user: models.UserSnapshot):
+    try:
+        admission.generate_limiter.check(str(current_user.id))
+    except admission.Rejected as e:
+        raise _too_many_requests("generate", e)
+
+def _generation_queue_full() -> HTTPException:
+    """A 429 for a full generation queue, with a Retry-After from the workers' recent throughput."""
+    return _too_many_requests("generate", admission.Rejected("queue_full", job_manager.retry_after()))
+
+async def _replay_submission(job: models.GenerationJob, request: models.IdeaRequest, response: Response,
+                             current_user: models.UserSnapshot) -> models.JobDisplay:
+    """The response to an Idempotency-Key that was already used: its job, requeued if it failed."""
+    if job.idea != request.idea or job.mode != request.mode:
+        raise HTTPException(status_code=422, detail="This Idempotency-Key was already used for a different idea.")
+    response.headers["Idempotent-Replayed"] = "true"
+    if job.status == "failed":
+        _admit_generation(current_user)
+        try:
+            job = await job_manager.resubmit(job)
+        except jobs.QueueFull:
+            raise _generation_queue_full()
+    return _job_display(job)
+
+@app.post("/api/generate", response_model=models.JobDisplay, status_code=status.HTTP_202_ACCEPTED)
+async def generate_mvp(
+    request: models.IdeaRequest, response: Response,
+    current_user: models.UserSnapshot = Depends(auth.get_current_user),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+):
+    """
+    Queues an MVP generation job and returns it immediately.
+    Poll /api/jobs/{job_id} until its status is "completed" or "failed".
+    Set "mode" to "fanout" to design and code each feature concurrently, or to
+    "pipelined" to start the design while the product plan is still being written.
+    With an Idempotency-Key header, submitting the same key again returns the
+    first job (marked Idempotent-Replayed) instead of generating again; if that
+    job failed, it is queued again and resumes from its last completed stage.
+    """
     print(f"User '{current_user.email}' is generating an MVP for idea: '{request.idea}'")
-    
+
+    if idempotency_key:
+        job = await job_manager.find_submission(current_user.id, idempotency_key)
+        if job is not None:
+            return await _replay_submission(job, request, response, current_user)
+
+    _admit_generation(current_user)
     try:
-        output_data: dict = await run_in_threadpool(evocore_orchestrator, request.idea) 
-        
-        new_project = models.Project(
-            owner_id=current_user.id,
-            idea=request.idea,
-            title=output_data.get('product_plan', {}).get('product_name', "New Project"),
-            product_plan=output_data.get('product_plan'),
-            design_plan=output_data.get('design_plan'),
-            generated_code=output_data.get('code')
-        )
-        await new_project.insert()
+        job = await job_manager.submit(current_user.id, request.idea, request.mode, idempotency_key)
+    except jobs.QueueFull:
+        raise _generation_queue_full()
+    except DuplicateKeyError:
+        # The same key was submitted concurrently, and that request won.
+        job = await job_manager.find_submission(current_user.id, idempotency_key)
+        return await _replay_submission(job, request, response, current_user)
 
-        return models.ProjectDisplay(
-            _id=new_project.id, owner_id=new_project.owner_id, idea=new_project.idea,
-            title=new_project.title, created_at=new_project.created_at
-        )
-    except Exception as e:
-        print(f"An error occurred during MVP generation: {e}")
-        raise HTTPException(status_code=500, detail=f"An error occurred during generation: {str(e)}")
+    return _job_display(job)
+
+async def _get_own_job(job_id: str, current_user: models.UserSnapshot) -> models.GenerationJob:
+    try:
+        obj_id = PydanticObjectId(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+
+    job = await models.GenerationJob.get(obj_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You do not have permission to access this job")
+    return job
+
+@app.get("/api/jobs/{job_id}", response_model=models.JobDisplay)
+async def get_job(job_id: str, current_user: models.UserSnapshot = Depends(auth.get_current_user)):
+    return _job_display(await _get_own_job(job_id, current_user))
+
+def _job_outcome_sse(job: models.GenerationJob, seq: int) -> str:
+    """The final event of a job that finished without this process streaming it."""
+    if job.status == "completed":
+        event = {"seq": seq, "type": "job_completed", "project_id": str(job.project_id)}
+    else:
+        event = {"seq": seq, "type": "job_failed", "error": job.error}
+    return _sse(event, event=event["type"], event_id=seq)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(None),
+                            current_user: models.UserSnapshot = Depends(auth.get_current_user)):
+    """
+    Streams a job's progress as Server-Sent Events (see progress.py for the
+    event types): stage starts, each stage's output as soon as it is ready,
+    and the code while it is being written. Ends after `job_completed` or
+    `job_failed`. Events carry ids; reconnect with `Last-Event-ID` to resume.
+    """
+    job = await _get_own_job(job_id, current_user)
+    try:
+        after = max(0, int(last_event_id or 0))
+    except ValueError:
+        after = 0
+
+    async def event_stream():
+        if job.status in ("completed", "failed") and not progress.hub.has_events(job.id):
+            yield _job_outcome_sse(job, after + 1)
+            return
+        last_seq = after
+        while True:
+            events = progress.hub.subscribe(job.id, after=last_seq, idle_timeout=progress.PROGRESS_KEEPALIVE_SECONDS)
+            async with contextlib.aclosing(events):
+                async for event in events:
+                    if event is None:
+                        # Quiet for a while: the job may be running in another process.
+                        current = await models.GenerationJob.get(job.id)
+                        if current is None or current.status in ("completed", "failed"):
+                            yield _job_outcome_sse(current or job, last_seq + 1)
+                            return
+                        yield ": keep-alive\n\n"
+                        continue
+                    last_seq = event["seq"]
+                    if event["type"] in progress.TERMINAL_EVENTS:
+                        current = await models.GenerationJob.get(job.id)
+                        if current is not None and current.status not in ("completed", "failed"):
+                            break # Published by an earlier run; the job has been queued again since
+                    yield _sse(event, event=event["type"], event_id=event["seq"])
+                    if event["type"] in progress.TERMINAL_EVENTS:
+                        return
+
+            # This process has no events of the job's new run yet (it may run elsewhere, or not have started).
+            current = await models.GenerationJob.get(job.id)
+            if current is None or current.status in ("completed", "failed"):
+                yield _job_outcome_sse(current or job, last_seq + 1)
+                return
+            yield ": keep-alive\n\n"
+            await asyncio.sleep(progress.PROGRESS_KEEPALIVE_SECONDS)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
 
 @app.get("/api/projects", response_model=List[models.ProjectDisplay])
-async def get_projects(current_user: models.User = Depends(auth.get_current_user)):
+async def get_projects(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: models.UserSnapshot = Depends(auth.get_current_user)
+):
     """
-    (REWRITTEN) Fetches a list of all projects for the logged-in user.
+    Returns the user's projects, newest first, one page at a time.
+    Only the listed fields are read from MongoDB; the plans and generated
+    code stay in the database until a project is downloaded.
     """
-    projects = await models.Project.find(
-        models.Project.owner_id == current_user.id
-    ).sort(-models.Project.created_at).to_list()
-    
-    # --- THIS IS THE FIX ---
-    # We must construct the object using the ALIAS ('_id')
-    # that Pydantic expects, not the field name ('id').
-    return [
-        models.ProjectDisplay(
-            _id=proj.id, # <-- THE FIX
-            owner_id=proj.owner_id,
-            idea=proj.idea,
-            title=proj.title,
-            created_at=proj.created_at
-        )
-        for proj in projects
-    ]
+    query = {"owner_id": current_user.id}
+    if after is not None:
+        query["_id"] = {"$lt": _parse_cursor(after)}
+
+    projects = await models.Project.find(query).sort(
+        -models.Project.id
+    ).limit(limit + 1).project(models.ProjectDisplay).to_list()
+    return _paginate(response, projects, limit)
 
 # --- PROJECT DOWNLOAD ENDPOINT ---
+@app.post("/api/projects/export")
+async def export_projects(
+    request: models.BulkExportRequest,
+    current_user: models.UserSnapshot = Depends(auth.get_current_user)
+):
+    """
+    Returns several projects as one .zip, with a folder per project.
+    project_ids is a list of ids, or "all". Ids that are not the user's are skipped.
+    The archive is streamed as it is built, so its size is not limited by memory.
+    """
+    query = {"owner_id": current_user.id}
+    if request.project_ids != "all":
+        if not request.project_ids or len(request.project_ids) > MAX_BULK_EXPORT_IDS:
+            raise HTTPException(status_code=400, detail=f"Select between 1 and {MAX_BULK_EXPORT_IDS} projects, or \"all\"")
+        try:
+            query["_id"] = {"$in": [PydanticObjectId(project_id) for project_id in request.project_ids]}
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid project ID format")
+
+    # Checked before streaming starts; after that the status code can no longer change.
+    if not await models.Project.find_one(query).project(models.ProjectDisplay):
+        raise HTTPException(status_code=404, detail="No projects to export")
+
+    return StreamingResponse(
+        export.stream_bulk_archive(query),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="autogenesis_projects.zip"'}
+    )
+
 @app.get("/api/projects/{project_id}/download")
 async def download_project(
     project_id: str, 
-    current_user: models.User = Depends(auth.get_current_user)
+    if_none_match: Optional[str] = Header(None),
+    current_user: models.UserSnapshot = Depends(auth.get_current_user)
 ):
     """
-    (NEW) Fetches a project's data, creates a .zip file in memory,
-    and returns it to the user for download.
+    Returns a project as a .zip file.
+    Each project version is zipped once (see export.py): a matching
+    If-None-Match gets a 304, a cached archive is sent straight from disk,
+    and otherwise the archive is streamed while it is being compressed.
     """
     try:
         obj_id = PydanticObjectId(project_id)
@@ -265,28 +580,25 @@ async def download_project(
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="You do not have permission to access this project")
 
-    zip_io = io.BytesIO()
-    
-    safe_title = re.sub(r'[^a-zA-Z0-9_-]', '_', project.title or "autogenesis_project")
-    filename = f"{safe_title}.zip"
+    # Unmigrated projects come back with their payload, which the archive below reuses.
+    content_sha256, payload = await artifacts.load_content_hash(project.id)
+    etag = export.project_etag(project, content_sha256)
+    # "no-cache" lets browsers keep the archive but revalidate it with If-None-Match.
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if export.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    try:
-        with zipfile.ZipFile(zip_io, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            zipf.writestr('app.py', project.generated_code or "# No code was generated for this project.")
-            zipf.writestr('product_plan.json', json.dumps(project.product_plan, indent=4) or "{}")
-            zipf.writestr('design_plan.json', json.dumps(project.design_plan, indent=4) or "{}")
-            readme_content = f"# {project.title}\n\n**Original Idea:**\n{project.idea}\n\nGenerated by AutoGenesis."
-            zipf.writestr('README.md', readme_content)
-    except Exception as e:
-        print(f"Error creating zip file: {e}")
-        raise HTTPException(status_code=500, detail="Error creating project zip file")
+    safe_title = re.sub(r'[^a-zA-Z0-9_-]', '_', project.title or "autogenesis_project")
+    headers["Content-Disposition"] = f'attachment; filename="{safe_title}.zip"'
 
-    zip_io.seek(0)
-    
-    headers = { 'Content-Disposition': f'attachment; filename="{filename}"' }
+    cached_path = export.cached_archive(etag)
+    if cached_path:
+        return FileResponse(cached_path, media_type="application/zip", headers=headers)
 
+    if payload is None:
+        payload = await artifacts.load_payload(project.id)
     return StreamingResponse(
-        zip_io,
+        export.stream_archive(project, payload, etag),
         media_type="application/zip",
         headers=headers
     )
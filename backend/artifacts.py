@@ -0,0 +1,135 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.6 - Project Artifact Storage
+#
+# A Project used to carry its product plan, design plan and generated code
+# inline, so every read of the projects collection dragged tens of
+# kilobytes per document through Motor and pydantic. The projects
+# collection now holds metadata only, and the large parts live in the
+# project_artifacts collection, each one zlib-compressed JSON.
+#
+# Only the download endpoint and the semantic idea index read artifacts.
+# Projects created before the split keep their parts inline until
+# migrations/split_project_artifacts.py moves them; load_payload() falls
+# back to those inline fields so downloads keep working in the meantime.
+# --------------------------------------------------------------------------
+
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+
+import models
+
+PARTS = ("product_plan", "design_plan", "generated_code")
+COMPRESSION_LEVEL = 6
+
+
+def encode_part(value: Any) -> Optional[bytes]:
+    if value is None:
+        return None
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decode_part(blob: Optional[bytes]) -> Any:
+    if blob is None:
+        return None
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def content_hash(product_plan: Any, design_plan: Any, generated_code: Optional[str]) -> str:
+    """sha256 over a canonical JSON encoding of the three parts. Equal content, equal hash."""
+    material = json.dumps(
+        {"product_plan": product_plan, "design_plan": design_plan, "generated_code": generated_code},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def build_artifact(project_id: PydanticObjectId, owner_id: PydanticObjectId, product_plan: Any,
+                   design_plan: Any, generated_code: Optional[str]) -> models.ProjectArtifact:
+    parts = {"product_plan": product_plan, "design_plan": design_plan, "generated_code": generated_code}
+    return models.ProjectArtifact(
+        project_id=project_id,
+        owner_id=owner_id,
+        raw_size=sum(len(json.dumps(v, separators=(",", ":"))) for v in parts.values() if v is not None),
+        sha256=content_hash(**parts),
+        **{name: encode_part(value) for name, value in parts.items()},
+    )
+
+
+async def save_project(project: models.Project, product_plan: Any, design_plan: Any,
+                       generated_code: Optional[str]) -> models.Project:
+    """
+    Inserts a new Project together with its artifact.
+    The artifact goes in first, so a failure in between leaves an unreachable
+    artifact rather than a listed project with no content.
+    """
+    if project.id is None:
+        project.id = PydanticObjectId()
+    await build_artifact(project.id, project.owner_id, product_plan, design_plan, generated_code).insert()
+    await project.insert()
+    return project
+
+
+async def load_payload(project_id: PydanticObjectId) -> Dict[str, Any]:
+    """
+    Returns {"product_plan", "design_plan", "generated_code", "sha256"} for a project.
+    sha256 is None for projects that still store their parts inline.
+    """
+    artifact = await models.ProjectArtifact.find_one(models.ProjectArtifact.project_id == project_id)
+    if artifact is not None:
+        payload = {name: decode_part(getattr(artifact, name)) for name in PARTS}
+        payload["sha256"] = artifact.sha256
+        return payload
+    return await _load_legacy_payload(project_id)
+
+
+async def _load_legacy_payload(project_id: PydanticObjectId) -> Dict[str, Any]:
+    """load_payload() for a project that still stores its parts inline."""
+    legacy = await models.Project.find_one(
+        models.Project.id == project_id
+    ).project(models.LegacyProjectPayload)
+    payload = {name: getattr(legacy, name, None) for name in PARTS}
+    payload["sha256"] = None
+    return payload
+
+
+async def load_payloads(project_ids: List[PydanticObjectId]) -> Dict[PydanticObjectId, Dict[str, Any]]:
+    """load_payload() for several projects, with one $in query for their artifacts."""
+    payloads = {}
+    async for artifact in models.ProjectArtifact.find({"project_id": {"$in": project_ids}}):
+        payloads[artifact.project_id] = {name: decode_part(getattr(artifact, name)) for name in PARTS}
+        payloads[artifact.project_id]["sha256"] = artifact.sha256
+    for project_id in project_ids:
+        if project_id not in payloads:
+            payloads[project_id] = await load_payload(project_id) # Not migrated yet
+    return payloads
+
+
+async def load_content_hash(project_id: PydanticObjectId) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Returns (content hash, payload) for a project's parts.
+    Migrated projects have the hash stored next to their artifact, so nothing is
+    decompressed and the payload is None. Projects that still store their parts
+    inline have the hash computed from their payload, which is returned too so
+    the caller does not read the document again.
+    """
+    view = await models.ProjectArtifact.find_one(
+        models.ProjectArtifact.project_id == project_id
+    ).project(models.ArtifactHashView)
+    if view is not None:
+        return view.sha256, None
+    payload = await _load_legacy_payload(project_id)
+    return content_hash(payload["product_plan"], payload["design_plan"], payload["generated_code"]), payload
+
+
+async def load_product_plans(project_ids: Iterable[PydanticObjectId]) -> Dict[PydanticObjectId, dict]:
+    """Decompresses only the product plans of the given projects (for the idea index)."""
+    plans = {}
+    async for view in models.ProjectArtifact.find(
+        {"project_id": {"$in": list(project_ids)}, "product_plan": {"$ne": None}}
+    ).project(models.ArtifactProductPlanView):
+        plans[view.project_id] = decode_part(view.product_plan)
+    return plans
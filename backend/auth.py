@@ -10,47 +10,60 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import concurrent.futures
 import random
-import smtplib 
+import threading
+import time
 import os 
 from dotenv import load_dotenv 
 from email.mime.text import MIMEText
 
 # Import our new Beanie models from models.py
-from models import User, UserCreate, TokenData
+from models import User, UserCreate, UserSnapshot, TokenData
 
 # Load .env variables (like EMAIL_SENDER, EMAIL_PASSWORD)
 load_dotenv()
 
-# --- Password Hashing (No Changes) ---
+# Imported after load_dotenv() so the mailer sees SMTP settings from .env.
+import mailer
+
+# --- Password Hashing ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt takes 100-300 ms of CPU per call, so it runs on its own small executor
+# instead of the event loop. "thread" is enough because the bcrypt backend
+# releases the GIL; "process" isolates hashing from the API process entirely.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
 # --- JWT Configuration (No Changes) ---
 SECRET_KEY = "a_very_secret_key_for_autogenesis"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
+# --- Authenticated Request Caches ---
+# Verified tokens and user snapshots are kept per process so a hot client
+# pays neither JWT signature verification nor a MongoDB lookup per request.
+# Entries never outlive the token that produced them. Invalidation is local
+# to this process, so AUTH_USER_CACHE_TTL_SECONDS bounds how long another
+# worker process can serve a stale snapshot.
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_USER_CACHE_TTL_SECONDS = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+
 # --- OTP Configuration (No Changes) ---
 OTP_EXPIRE_MINUTES = 10
 
-# --- Email Sending Function (Preserved) ---
+# --- Email Sending Function ---
 def send_verification_email(email: str, otp: str):
     """
-    Sends a real verification email using Gmail's SMTP server.
+    Queues the verification email on the background mailer and returns immediately.
+    Delivery, retries and SMTP errors are handled (and logged) by mailer.py.
     """
-    sender_email = os.getenv("EMAIL_SENDER")
-    sender_password = os.getenv("EMAIL_PASSWORD")
-
-    print(f"--- DEBUG: Attempting to send email ---")
-    print(f"--- DEBUG: Using sender: {sender_email}")
-    print(f"--- DEBUG: Sending To: {email}")
-
-    if not sender_email or not sender_password:
-        print("!!! ERROR: Email credentials NOT FOUND in .env file or environment.")
-        raise ValueError("Email sender or password not configured.") 
-
     subject = "Your AutoGenesis Verification Code"
     body = f"""
     Hello,
@@ -66,25 +79,11 @@ def send_verification_email(email: str, otp: str):
 
     msg = MIMEText(body)
     msg['Subject'] = subject
-    msg['From'] = sender_email
+    msg['From'] = mailer.sender_address() or "AutoGenesis <no-reply@autogenesis.local>"
     msg['To'] = email
 
-    try:
-        print(f"--- DEBUG: Connecting to smtp.gmail.com:465...")
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            print(f"--- DEBUG: Attempting server.login()...")
-            server.login(sender_email, sender_password)
-            print(f"--- DEBUG: Login successful. Sending message...")
-            server.send_message(msg)
-        print(f"--- SUCCESS: Verification email sent to {email} ---")
-    except smtplib.SMTPAuthenticationError as e:
-        print(f"!!! SMTP AUTH ERROR: Login failed. Double-check EMAIL_SENDER and EMAIL_PASSWORD (App Password).")
-        print(f"!!! Google Error Details: {e}")
-        raise e
-    except Exception as e:
-        print(f"!!! FAILED to send email. Error Type: {type(e).__name__}")
-        print(f"!!! Error Details: {e}")
-        raise e
+    mailer.mailer.send(msg)
+    print(f"--- Verification email to {email} queued for delivery ---")
 
 # --- Helper Functions (No Changes) ---
 
@@ -97,6 +96,96 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is at capacity."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded executor.
+    At most `workers` hashes run at once; up to `max_queue` more may wait.
+    Anything beyond that is rejected with PasswordHasherBusy instead of
+    letting a login burst pile up unbounded work.
+    """
+    def __init__(self, kind: str = PASSWORD_HASH_EXECUTOR, workers: int = PASSWORD_HASH_WORKERS,
+                 max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown PASSWORD_HASH_EXECUTOR '{kind}'. Use 'thread' or 'process'.")
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        # Created lazily so importing auth does not start threads or processes.
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def queue_depth(self) -> int:
+        """Calls submitted but not yet picked up by a worker (the executor runs them FIFO)."""
+        return max(0, self.pending - self.workers)
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth())
+
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_seconds += time.perf_counter() - start
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "in_flight": min(self.pending, self.workers),
+                "queue_depth": self.queue_depth(),
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+            }
+
+
+# Process-wide hasher used by signup and login.
+password_hasher = PasswordHasher()
+
+async def averify_password(plain_password, hashed_password) -> bool:
+    """verify_password, run on the password hashing executor."""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def aget_password_hash(password) -> str:
+    """get_password_hash, run on the password hashing executor."""
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -108,6 +197,52 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+class ExpiringLRU:
+    """A small LRU map whose entries each carry their own expiry (epoch seconds)."""
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# token string -> (email, exp) for tokens whose signature has been verified.
+token_cache = ExpiringLRU()
+# email -> UserSnapshot
+user_cache = ExpiringLRU()
+
+def invalidate_user(email: str):
+    """Drops the cached snapshot for a user. Call after saving changes to their document."""
+    user_cache.pop(email)
+
+
 # --- NEW ASYNC/BEANIE DATABASE FUNCTIONS ---
 
 async def get_user(email: str) -> Optional[User]:
@@ -116,12 +251,16 @@ async def get_user(email: str) -> Optional[User]:
     """
     return await User.find_one(User.email == email)
 
+async def get_user_snapshot(email: str) -> Optional[UserSnapshot]:
+    """Fetches only the fields protected routes need (no password hash or OTP)."""
+    return await User.find_one(User.email == email).project(UserSnapshot)
+
 async def create_user(user: UserCreate) -> User:
     """
     (REPLACED) Creates a new user in MongoDB using Beanie.
     Includes the new fields: name, age, profession.
     """
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await aget_password_hash(user.password)
     otp = generate_otp()
     otp_expires = datetime.now(timezone.utc) + timedelta(minutes=OTP_EXPIRE_MINUTES)
     
@@ -152,31 +291,42 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
     user = await get_user(email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await averify_password(password, user.hashed_password):
         return None
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserSnapshot:
     """
-    (REPLACED) FastAPI dependency to get the current user from a JWT token.
+    FastAPI dependency to get the current user from a JWT token.
+    Verified tokens and user snapshots are served from token_cache and user_cache.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    cached_token = token_cache.get(token)
+    if cached_token is not None:
+        email, expires_at = cached_token
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+            token_data = TokenData(email=email)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = await get_user(email=token_data.email)
+        email = token_data.email
+        expires_at = float(payload.get("exp", time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60))
+        token_cache.set(token, (email, expires_at), expires_at)
+
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = await get_user_snapshot(email)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(email, user, min(time.time() + AUTH_USER_CACHE_TTL_SECONDS, expires_at))
     return user
 
 
@@ -0,0 +1,80 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Async Agent Pipeline
+#
+# Runs N generations at once against the offline fake LLM with a fixed
+# latency per call, first the old way (the sync orchestrator on the
+# Starlette/AnyIO threadpool, capped at 40 threads) and then with the
+# native async orchestrator. With 3 LLM calls per generation, the ideal wall time is
+# 3 x latency no matter how many generations run concurrently.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_async_pipeline.py --generations 400 --latency-ms 500
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["STAGE_CACHE_ENABLED"] = "0"
+os.environ["SEMANTIC_CACHE_ENABLED"] = "0"
+
+from anyio import to_thread
+
+import main
+from fake_llm import FakeChatModel
+
+
+async def run_threadpool(ideas):
+    return await asyncio.gather(*[
+        to_thread.run_sync(main.evocore_orchestrator, idea) for idea in ideas
+    ])
+
+
+async def run_async(ideas):
+    return await asyncio.gather(*[main.aevocore_orchestrator(idea) for idea in ideas])
+
+
+def timed(runner, ideas) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(runner(ideas))
+    return time.perf_counter() - start
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the async agent pipeline.")
+    parser.add_argument("--generations", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    main.set_llm(FakeChatModel(latency=args.latency_ms / 1000))
+    ideas = [f"benchmark idea number {n}" for n in range(args.generations)]
+
+    results = {
+        "generations": args.generations,
+        "llm_latency_ms": args.latency_ms,
+        "ideal_seconds": round(3 * args.latency_ms / 1000, 2),
+    }
+    for name, runner in (("threadpool", run_threadpool), ("async", run_async)):
+        seconds = timed(runner, ideas)
+        results[name] = {
+            "wall_seconds": round(seconds, 2),
+            "generations_per_second": round(args.generations / seconds, 1),
+        }
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,149 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Chat Prompt Size
+#
+# Replays a synthetic conversation of --turns turns for one user and
+# measures the chat prompt sent to the LLM on every turn, two ways:
+#
+#   last 10 messages - the old context: the user's last 10 messages
+#                      (re-read from MongoDB each turn) pasted verbatim
+#   rolling context  - chat_context.py: a summary plus a short window,
+#                      kept in memory between turns
+#
+# Tokens are estimated as characters / 4. Summaries are worst case: every
+# fold returns a summary of the full CHAT_SUMMARY_MAX_CHARS, and the tokens
+# spent producing them are reported and counted in the total. Runs against
+# an in-memory mongomock_motor database (pip install -r requirements-bench.txt).
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_chat_context.py --turns 200
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGO_CONNECTION_STRING", "mongodb://localhost:27017")
+
+from beanie import PydanticObjectId, init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+import api
+import chat_context
+import database
+import models
+
+TOPICS = [
+    "pricing", "hiring a first engineer", "finding early customers", "fundraising", "churn",
+    "choosing a tech stack", "marketing on a small budget", "competition", "legal setup", "onboarding",
+]
+FILLER = (
+    "Focus on the narrowest group of customers who feel the problem most, talk to them every week, "
+    "and only build what they are already trying to solve with spreadsheets or manual work. "
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def question(rng: random.Random, turn: int) -> str:
+    topic = rng.choice(TOPICS)
+    return f"Turn {turn}: for my tiffin delivery startup in Patiala, what should I do about {topic}? " \
+        + "We have 40 paying customers and two delivery riders. " * rng.randint(0, 4)
+
+
+def reply(rng: random.Random) -> str:
+    # Genesis answers in 3 to 10 sentences, so 400 to 1400 characters.
+    length = rng.randint(400, 1400)
+    return (FILLER * (length // len(FILLER) + 1))[:length]
+
+
+def summary(stats: list):
+    lengths = sorted(stats)
+    return {
+        "mean": round(statistics.mean(lengths)),
+        "p50": lengths[len(lengths) // 2],
+        "max": lengths[-1],
+        "last": stats[-1],
+    }
+
+
+async def run(args) -> dict:
+    await init_beanie(database=AsyncMongoMockClient()[args.database], document_models=database.DOCUMENT_MODELS)
+    store = chat_context.ChatContextStore()
+    summarizer_tokens = []
+
+    async def worst_case_summarize(previous: str, messages):
+        lines = "\n".join(f"{m.sender}: {chat_context._clip(m.text)}" for m in messages)
+        text = chat_context.SUMMARY_PROMPT_TEMPLATE.format(summary=previous, messages=lines, max_words=0)
+        summarizer_tokens.append(estimate_tokens(text) + chat_context.CHAT_SUMMARY_MAX_CHARS // 4)
+        return "s" * chat_context.CHAT_SUMMARY_MAX_CHARS
+
+    chat_context.summarize = worst_case_summarize
+
+    rng = random.Random(args.seed)
+    user_id = PydanticObjectId()
+    history = [] # What the old context read back from MongoDB
+    old_tokens, new_tokens = [], []
+    for turn in range(args.turns):
+        text = question(rng, turn)
+
+        chat_history_str = await store.history_for_prompt(user_id)
+        new_tokens.append(estimate_tokens(api.CHAT_PROMPT_TEMPLATE.format(chat_history_str=chat_history_str, question=text)))
+
+        user_message = models.ChatMessage(user_id=user_id, sender="user", text=text)
+        await user_message.insert()
+        history.append(user_message)
+        last_10 = "\n".join(f"{m.sender}: {m.text}" for m in history[-10:])
+        old_tokens.append(estimate_tokens(api.CHAT_PROMPT_TEMPLATE.format(chat_history_str=last_10, question=text)))
+
+        ai_message = models.ChatMessage(user_id=user_id, sender="ai", text=reply(rng))
+        await ai_message.insert()
+        history.append(ai_message)
+        await store.record_turn(user_id, [user_message, ai_message])
+        await store.wait_idle()
+
+    context = await models.ChatContext.find_one(models.ChatContext.user_id == user_id)
+    return {
+        "config": {
+            "turns": args.turns, "window_messages": chat_context.CHAT_WINDOW_MESSAGES,
+            "summary_every": chat_context.CHAT_SUMMARY_EVERY, "summary_max_chars": chat_context.CHAT_SUMMARY_MAX_CHARS,
+        },
+        "last_10_messages": {
+            "prompt_tokens": summary(old_tokens),
+            "total_tokens": sum(old_tokens),
+            "history_reads": args.turns,
+        },
+        "rolling_context": {
+            "prompt_tokens": summary(new_tokens),
+            "summarizer_calls": len(summarizer_tokens),
+            "summarizer_tokens": sum(summarizer_tokens),
+            "total_tokens": sum(new_tokens) + sum(summarizer_tokens),
+            "history_reads": store.stats()["misses"],
+            "summarized_messages": context.summarized_messages,
+        },
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark chat prompt size over a long conversation.")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database", default="autogenesis_bench")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main_cli()
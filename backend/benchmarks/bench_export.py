@@ -0,0 +1,148 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Project Zip Export
+#
+# Compares three ways of answering GET /api/projects/{id}/download for a
+# project with --code-kb of generated code:
+#
+#   in-memory     - the old handler: zip everything into a BytesIO per request
+#   streamed miss - export.stream_archive on a cold cache (also fills it)
+#   cached hit    - reading the archive back from EXPORT_CACHE_DIR
+#
+# Reports wall time, process CPU time, and the time until the first chunk
+# would reach the client. With --bulk-projects N it also streams N such
+# projects through one bulk archive (POST /api/projects/export) and reports
+# the peak Python memory. Only the zip central directory (one small record
+# per file) grows with N.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_export.py --code-kb 512 --runs 20
+#   python benchmarks/bench_export.py --code-kb 512 --bulk-projects 200
+# --------------------------------------------------------------------------
+
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export
+
+
+def make_project(code_kb: int):
+    project = SimpleNamespace(
+        title="Benchmark Project",
+        idea="A marketplace for local services",
+        created_at=datetime(2026, 1, 1, 12, 0, 0),
+    )
+    payload = {
+        "product_plan": {"product_name": "Benchmark", "core_features": [f"Feature {i} " + "x" * 200 for i in range(20)]},
+        "design_plan": {"screens": [{"name": f"Screen {i}", "layout": "y" * 300} for i in range(20)]},
+        "generated_code": "".join(f"st.write('line {i}')\n" for i in range(code_kb * 1024 // 20)),
+    }
+    return project, payload
+
+
+def in_memory(project, payload):
+    """The download handler before archives were streamed and cached."""
+    zip_io = io.BytesIO()
+    with zipfile.ZipFile(zip_io, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr("app.py", payload["generated_code"])
+        zipf.writestr("product_plan.json", json.dumps(payload["product_plan"], indent=4))
+        zipf.writestr("design_plan.json", json.dumps(payload["design_plan"], indent=4))
+        zipf.writestr("README.md", f"# {project.title}\n\n**Original Idea:**\n{project.idea}\n\nGenerated by AutoGenesis.")
+    zip_io.seek(0)
+    yield zip_io.getvalue()
+
+
+def cached_hit(path):
+    with open(path, "rb") as f:
+        while chunk := f.read(export.CHUNK_SIZE):
+            yield chunk
+
+
+def measure(label, make_chunks, before=None, runs=10) -> dict:
+    walls, cpus, firsts = [], [], []
+    size = 0
+    for _ in range(runs):
+        if before:
+            before()
+        wall, cpu = time.perf_counter(), time.process_time()
+        first, size = None, 0
+        for chunk in make_chunks():
+            if first is None:
+                first = time.perf_counter() - wall
+            size += len(chunk)
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+        firsts.append(first)
+    return {
+        "mode": label,
+        "bytes": size,
+        "wall_ms": round(statistics.median(walls) * 1000, 2),
+        "cpu_ms": round(statistics.median(cpus) * 1000, 2),
+        "first_chunk_ms": round(statistics.median(firsts) * 1000, 2),
+    }
+
+
+def measure_bulk(project, payload, count: int) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    archive, size = export.BulkArchive(), 0
+    for n in range(count):
+        project.id = f"{n:024x}" # One folder per project, as with real ids
+        size += len(archive.add_project(project, payload))
+    size += len(archive.close())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"projects": count, "bytes": size, "wall_ms": round(elapsed * 1000, 1), "peak_mb": round(peak / 2**20, 2)}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark project zip downloads.")
+    parser.add_argument("--code-kb", type=int, default=512, help="Size of the project's generated code")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--bulk-projects", type=int, default=0, help="Also stream this many projects as one archive")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    project, payload = make_project(args.code_kb)
+    export.EXPORT_CACHE_DIR = tempfile.mkdtemp(prefix="bench_export_")
+    etag = export.project_etag(project, "benchmark")
+
+    def clear_cache():
+        shutil.rmtree(export.EXPORT_CACHE_DIR, ignore_errors=True)
+
+    try:
+        results = {
+            "config": {"code_kb": args.code_kb, "runs": args.runs},
+            "runs": [
+                measure("in-memory", lambda: in_memory(project, payload), runs=args.runs),
+                measure("streamed miss", lambda: export.stream_archive(project, payload, etag),
+                        before=clear_cache, runs=args.runs),
+                measure("cached hit", lambda: cached_hit(export.cached_archive(etag)), runs=args.runs),
+            ],
+        }
+    finally:
+        clear_cache()
+    if args.bulk_projects:
+        results["bulk"] = [measure_bulk(project, payload, n) for n in sorted({1, args.bulk_projects})]
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main_cli()
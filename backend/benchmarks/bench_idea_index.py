@@ -0,0 +1,100 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Semantic Idea Index
+#
+# Measures how long it takes to embed and index N synthetic ideas, then
+# the latency of nearest-idea lookups against the full index.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_idea_index.py --ideas 100000 --queries 1000
+# --------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from idea_index import HashingEmbedder, IdeaIndex
+
+BUSINESSES = [
+    "drugstore", "pharmacy delivery service", "gym", "yoga studio", "bakery", "coffee shop",
+    "tutoring marketplace", "pet grooming salon", "laundry pickup service", "coworking space",
+    "food truck", "bike rental", "meal prep service", "language learning app", "habit tracker",
+    "pomodoro timer", "study planner", "expense tracker", "recipe sharing site", "car wash",
+]
+QUALIFIERS = [
+    "", "cheap", "premium", "24/7", "eco-friendly", "AI-powered", "subscription based",
+    "student focused", "family run", "on-demand",
+]
+CITIES = [
+    "rajpura", "chandigarh", "patiala", "ludhiana", "mohali", "delhi", "mumbai", "pune",
+    "bangalore", "jaipur", "amritsar", "noida", "gurgaon", "hyderabad", "kolkata",
+]
+
+
+def synthetic_idea(rng: random.Random, n: int) -> str:
+    qualifier = rng.choice(QUALIFIERS)
+    business = rng.choice(BUSINESSES)
+    city = rng.choice(CITIES)
+    # A running number keeps every idea distinct, like real-world free text.
+    return f"a {qualifier} {business} in {city} number {n}".replace("  ", " ")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic idea index.")
+    parser.add_argument("--ideas", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--dim", type=int, default=None, help="Embedding size (defaults to IDEA_INDEX_DIM)")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    embedder = HashingEmbedder(args.dim) if args.dim else HashingEmbedder()
+    index = IdeaIndex(embedder)
+
+    ideas = [synthetic_idea(rng, n) for n in range(args.ideas)]
+
+    start = time.perf_counter()
+    for offset in range(0, len(ideas), 1000):
+        chunk = ideas[offset:offset + 1000]
+        index.add_many((str(offset + i), idea, None) for i, idea in enumerate(chunk))
+    build_seconds = time.perf_counter() - start
+
+    queries = [synthetic_idea(rng, args.ideas + n) for n in range(args.queries)]
+    latencies_ms = []
+    for query in queries:
+        t0 = time.perf_counter()
+        index.search(query, k=1)
+        latencies_ms.append((time.perf_counter() - t0) * 1000)
+
+    results = {
+        "ideas": len(index),
+        "dim": embedder.dim,
+        "matrix_mb": round(len(index) * embedder.dim * 4 / 1_000_000, 1),
+        "build_seconds": round(build_seconds, 2),
+        "ideas_per_second": round(len(index) / build_seconds),
+        "lookup_ms": {
+            "mean": round(statistics.mean(latencies_ms), 3),
+            "p50": round(percentile(latencies_ms, 50), 3),
+            "p95": round(percentile(latencies_ms, 95), 3),
+            "p99": round(percentile(latencies_ms, 99), 3),
+        },
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Login Burst vs Event Loop
+#
+# Drives the FastAPI app in-process while a burst of clients hammers
+# /api/login and others keep calling GET /api/users/me (a cheap endpoint
+# that only decodes the JWT). It runs twice: once with bcrypt on the event
+# loop (the old behaviour) and once on the password hashing executor.
+# Reports login throughput and the /api/users/me latency percentiles.
+# /api/users/me calls follow a fixed schedule and latency is measured from
+# the scheduled send time, so time spent waiting on a blocked loop counts.
+#
+# User lookups are served from memory so the numbers only reflect hashing
+# and the event loop, not MongoDB.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_login.py --seconds 10 --login-clients 16 --other-clients 8
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGO_CONNECTION_STRING", "mongodb://localhost:27017")
+
+import httpx
+from beanie import PydanticObjectId
+
+import api
+import auth
+import models
+
+EMAIL = "bench@autogenesis.dev"
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+OTHER_INTERVAL_SECONDS = 0.02
+
+
+async def run_burst(seconds: float, login_clients: int, other_clients: int) -> dict:
+    transport = httpx.ASGITransport(app=api.app)
+    token = auth.create_access_token(data={"sub": EMAIL})
+    logins = []
+    rejected = []
+    other_latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login_loop():
+            while time.perf_counter() < deadline:
+                r = await client.post("/api/login", data={"username": EMAIL, "password": PASSWORD})
+                (logins if r.status_code == 200 else rejected).append(r.status_code)
+
+        async def other_loop():
+            headers = {"Authorization": f"Bearer {token}"}
+            scheduled = time.perf_counter()
+            while scheduled < deadline:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                r = await client.get("/api/users/me", headers=headers)
+                r.raise_for_status()
+                other_latencies.append((time.perf_counter() - scheduled) * 1000)
+                scheduled += OTHER_INTERVAL_SECONDS
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[login_loop() for _ in range(login_clients)],
+            *[other_loop() for _ in range(other_clients)],
+        )
+        elapsed = time.perf_counter() - start
+
+    return {
+        "logins": len(logins),
+        "logins_rejected": len(rejected),
+        "logins_per_second": round(len(logins) / elapsed, 1),
+        "other_requests": len(other_latencies),
+        "other_p50_ms": round(statistics.median(other_latencies), 1) if other_latencies else 0.0,
+        "other_p99_ms": round(percentile(other_latencies, 99), 1),
+        "other_max_ms": round(max(other_latencies, default=0.0), 1),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark /api/login under load.")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--login-clients", type=int, default=16)
+    parser.add_argument("--other-clients", type=int, default=8)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    # Stands in for the User document, which Beanie only allows after init_beanie().
+    user = SimpleNamespace(
+        id=PydanticObjectId(), name="Bench", email=EMAIL, age=None, profession=None,
+        hashed_password=auth.get_password_hash(PASSWORD), is_verified=True, created_at=datetime.now(),
+    )
+
+    snapshot = models.UserSnapshot.model_validate({**vars(user), "_id": user.id})
+
+    async def get_user(email: str):
+        return user if email == EMAIL else None
+
+    async def get_user_snapshot(email: str):
+        return snapshot if email == EMAIL else None
+
+    async def verify_inline(plain_password, hashed_password):
+        return auth.verify_password(plain_password, hashed_password)
+
+    auth.get_user = get_user
+    auth.get_user_snapshot = get_user_snapshot
+    executor_verify = auth.averify_password
+
+    results = {"config": vars(args).copy()}
+    results["config"].pop("json_path")
+    for label, verify in (("event_loop", verify_inline), ("executor", executor_verify)):
+        auth.averify_password = verify
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[label] = asyncio.run(run_burst(args.seconds, args.login_clients, args.other_clients))
+    results["executor"]["hasher"] = auth.password_hasher.stats()
+    auth.password_hasher.shutdown()
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,108 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Pipelined Product -> Design
+#
+# Runs the same ideas through the orchestrator in "monolithic" mode (each
+# stage waits for the previous one) and in "pipelined" mode (the product
+# plan is streamed and design starts once its feature list is complete),
+# against the offline fake LLM. Streamed replies spread --latency-ms over
+# their chunks, like a real model producing tokens.
+#
+# Reports the end-to-end time per generation in both modes and checks that
+# both produce exactly the same product plan, design plan and code. Stage
+# and semantic caches are off so every stage really calls the model.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_pipelining.py --generations 50 --latency-ms 500
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["STAGE_CACHE_ENABLED"] = "0"
+os.environ["SEMANTIC_CACHE_ENABLED"] = "0"
+
+import main
+from fake_llm import FakeChatModel
+
+IDEAS = [
+    "a tiffin delivery service in Patiala", "a marketplace for used engineering textbooks",
+    "a booking app for badminton courts", "a stock tracker for a small pharmacy", "a bakery pre-order app",
+]
+
+
+async def timed_generation(idea: str, mode: str):
+    start = time.perf_counter()
+    result = await main.aevocore_orchestrator(idea, mode)
+    return time.perf_counter() - start, result
+
+
+async def run_mode(ideas, mode: str, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(idea):
+        async with semaphore:
+            return await timed_generation(idea, mode)
+
+    return await asyncio.gather(*[one(idea) for idea in ideas])
+
+
+def summary(seconds) -> dict:
+    ordered = sorted(seconds)
+    return {
+        "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the pipelined orchestrator against the sequential one.")
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    main.set_llm(FakeChatModel(latency=args.latency_ms / 1000))
+    ideas = [f"{IDEAS[n % len(IDEAS)]}, variant {n}" for n in range(args.generations)]
+
+    runs = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for mode in ("monolithic", "pipelined"):
+            runs[mode] = asyncio.run(run_mode(ideas, mode, args.concurrency))
+
+    fields = ("product_plan", "design_plan", "code")
+    mismatches = [
+        idea for idea, (_, sequential), (_, pipelined) in zip(ideas, runs["monolithic"], runs["pipelined"])
+        if any(sequential[field] != pipelined[field] for field in fields)
+    ]
+    results = {
+        "config": {"generations": args.generations, "latency_ms": args.latency_ms, "concurrency": args.concurrency},
+        "monolithic": summary([seconds for seconds, _ in runs["monolithic"]]),
+        "pipelined": summary([seconds for seconds, _ in runs["pipelined"]]),
+        "identical_outputs": not mismatches,
+        "mismatched_ideas": mismatches[:5],
+    }
+    results["mean_saving_pct"] = round(
+        (1 - results["pipelined"]["mean_ms"] / results["monolithic"]["mean_ms"]) * 100, 1
+    )
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,161 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Project Listing
+#
+# Fills one user's projects collection with N projects whose plans and
+# generated code are stored inline (the layout before project artifacts),
+# measures the listing queries, runs the artifact split migration, and
+# measures them again:
+#
+#   full documents - Project.find(owner).to_list(), what any unprojected
+#                    read of the collection pays per document
+#   first page     - the paginated, projected GET /api/projects query
+#
+# Reports wall time, peak Python memory (tracemalloc) and the average BSON
+# size of a projects document. Runs against --mongo-uri if given,
+# otherwise against an in-memory mongomock_motor database (pip install -r
+# requirements-bench.txt). mongomock has no real indexes and filters every query
+# in Python, so latencies are only meaningful against MongoDB.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_project_list.py --projects 10000
+#   python benchmarks/bench_project_list.py --mongo-uri mongodb://localhost:27017 --all-pages
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"))
+os.environ.setdefault("MONGO_CONNECTION_STRING", "mongodb://localhost:27017")
+
+import bson
+from beanie import PydanticObjectId, init_beanie
+
+import database
+import models
+from split_project_artifacts import migrate
+
+PAGE_SIZE = 50
+
+
+def make_inline_project(owner_id: PydanticObjectId, n: int, code_kb: int) -> dict:
+    """A projects document in the layout used before the artifact split."""
+    return {
+        "owner_id": owner_id,
+        "idea": f"Benchmark idea number {n}: a marketplace for local services",
+        "title": f"Project {n}",
+        "created_at": datetime.now(),
+        "product_plan": {
+            "product_name": f"Project {n}",
+            "core_features": [f"Feature {i} " + "x" * 200 for i in range(5)],
+        },
+        "design_plan": {"screens": [{"name": f"Screen {i}", "layout": "y" * 300} for i in range(5)]},
+        "generated_code": "import streamlit as st\n" + f"st.write('hello {n}')\n" * (code_kb * 1024 // 20),
+    }
+
+
+async def measure(label: str, coro_factory) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = await coro_factory()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"query": label, "rows": rows, "ms": round(elapsed * 1000, 1), "peak_mb": round(peak / 2**20, 2)}
+
+
+async def measure_layout(owner_id: PydanticObjectId, all_pages: bool) -> dict:
+    async def full_documents():
+        return len(await models.Project.find(models.Project.owner_id == owner_id).to_list())
+
+    async def page(after=None):
+        query = {"owner_id": owner_id}
+        if after is not None:
+            query["_id"] = {"$lt": after}
+        return await models.Project.find(query).sort(
+            -models.Project.id
+        ).limit(PAGE_SIZE + 1).project(models.ProjectDisplay).to_list()
+
+    async def first_page():
+        return len((await page())[:PAGE_SIZE])
+
+    async def every_page():
+        total, after = 0, None
+        while True:
+            items = await page(after)
+            total += len(items[:PAGE_SIZE])
+            if len(items) <= PAGE_SIZE:
+                return total
+            after = items[PAGE_SIZE - 1].id
+
+    sample = await models.Project.get_motor_collection().find({"owner_id": owner_id}).to_list(100)
+    runs = [
+        await measure("full documents", full_documents),
+        await measure("first page, projected", first_page),
+    ]
+    if all_pages:
+        runs.append(await measure("all pages, projected", every_page))
+    return {
+        "avg_project_bson_bytes": round(sum(len(bson.encode(doc)) for doc in sample) / max(1, len(sample))),
+        "runs": runs,
+    }
+
+
+async def run(args) -> dict:
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        db = AsyncIOMotorClient(args.mongo_uri)[args.database]
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        db = AsyncMongoMockClient()[args.database]
+    await init_beanie(database=db, document_models=database.DOCUMENT_MODELS)
+
+    owner_id = PydanticObjectId()
+    projects = models.Project.get_motor_collection()
+    for start in range(0, args.projects, 1000):
+        await projects.insert_many([
+            make_inline_project(owner_id, n, args.code_kb)
+            for n in range(start, min(start + 1000, args.projects))
+        ])
+
+    results = {
+        "config": {"projects": args.projects, "code_kb": args.code_kb, "page_size": PAGE_SIZE,
+                   "backend": "mongodb" if args.mongo_uri else "mongomock"},
+        "inline_layout": await measure_layout(owner_id, args.all_pages),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        await migrate(batch_size=500)
+    results["split_layout"] = await measure_layout(owner_id, args.all_pages)
+
+    await projects.delete_many({"owner_id": owner_id})
+    await models.ProjectArtifact.get_motor_collection().delete_many({"owner_id": owner_id})
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark GET /api/projects before and after the artifact split.")
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--code-kb", type=int, default=8, help="Size of each project's generated code")
+    parser.add_argument("--mongo-uri", help="Benchmark a real MongoDB instead of mongomock")
+    parser.add_argument("--database", default="autogenesis_bench")
+    parser.add_argument("--all-pages", action="store_true", help="Also walk every page with the cursor")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main_cli()
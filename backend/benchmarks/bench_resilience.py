@@ -0,0 +1,145 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: Retries, Timeouts and Hedging
+#
+# Runs the same ideas through the orchestrator against a fake LLM that
+# drops --failure-rate of its calls and answers --slow-rate of them only
+# after --slow-ms, in three setups:
+#
+#   bare      no timeouts, no retries, no hedging, one run per generation
+#   retries   jittered retries, attempt timeouts, and a second run of a
+#             failed generation that resumes from its checkpoints
+#   hedged    retries plus a hedged request after the agent's p95 latency
+#
+# Reports the share of generations that succeeded, their p50/p95/p99 time,
+# and how many LLM requests were sent per generation. Each setup first runs
+# a few generations against a reliable model, so the hedge delay has the
+# latencies it needs. Stage and semantic caches and admission control are
+# off so every stage really calls the model.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_resilience.py --generations 200 --failure-rate 0.05 --slow-rate 0.05
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["STAGE_CACHE_ENABLED"] = "0"
+os.environ["SEMANTIC_CACHE_ENABLED"] = "0"
+os.environ["ADMISSION_ENABLED"] = "0"
+
+import main
+import resilience
+from fake_llm import FakeChatModel
+
+IDEAS = [
+    "a tiffin delivery service in Patiala", "a marketplace for used engineering textbooks",
+    "a booking app for badminton courts", "a stock tracker for a small pharmacy", "a bakery pre-order app",
+]
+
+SETUPS = {
+    "bare": {"max_retries": 0, "hedge": False, "runs": 1, "timeouts": False},
+    "retries": {"max_retries": 3, "hedge": False, "runs": 2, "timeouts": True},
+    "hedged": {"max_retries": 3, "hedge": True, "runs": 2, "timeouts": True},
+}
+
+
+async def generate(idea: str, runs: int):
+    """One generation, run again from its checkpoints (like the job worker does) if it fails."""
+    checkpoints = resilience.Checkpoints()
+    start = time.perf_counter()
+    for run in range(1, runs + 1):
+        try:
+            await main.aevocore_orchestrator(idea, "monolithic", checkpoints=checkpoints)
+            return time.perf_counter() - start, True
+        except Exception as e:
+            if run == runs or not resilience.is_transient(e):
+                return time.perf_counter() - start, False
+
+
+async def run_setup(ideas, setup: dict, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(idea):
+        async with semaphore:
+            return await generate(idea, setup["runs"])
+
+    return await asyncio.gather(*[one(idea) for idea in ideas])
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary(results, caller: resilience.AgentCaller, warmup_stats: dict) -> dict:
+    ordered = sorted(seconds for seconds, ok in results if ok) or [0.0]
+    stats = {key: value - warmup_stats[key] for key, value in caller.stats().items()}
+    requests = stats["calls"] + stats["retries"] + stats["hedged"]
+    return {
+        "success_pct": round(100 * sum(ok for _, ok in results) / len(results), 1),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+        "llm_requests_per_generation": round(requests / len(results), 2),
+        "retries": stats["retries"],
+        "hedged": stats["hedged"],
+        "hedges_won": stats["hedges_won"],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark agent-call retries and hedging against a flaky fake LLM.")
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of LLM calls that are slow")
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Share of LLM calls that fail")
+    parser.add_argument("--attempt-timeout-ms", type=float, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    # Scale the timeouts and backoff down to the fake model's latency.
+    resilience.LLM_ATTEMPT_TIMEOUTS = {}
+    resilience.LLM_RETRY_BASE_SECONDS = args.latency_ms / 1000
+    resilience.LLM_HEDGE_MIN_SECONDS = 0
+    ideas = [f"{IDEAS[n % len(IDEAS)]}, variant {n}" for n in range(args.generations)]
+
+    results = {
+        "config": {
+            "generations": args.generations, "latency_ms": args.latency_ms, "slow_rate": args.slow_rate,
+            "slow_ms": args.slow_ms, "failure_rate": args.failure_rate,
+            "attempt_timeout_ms": args.attempt_timeout_ms, "concurrency": args.concurrency,
+        },
+    }
+    warmup_ideas = [f"{IDEAS[n % len(IDEAS)]}, warm-up {n}" for n in range(resilience.HEDGE_MIN_SAMPLES)]
+    for name, setup in SETUPS.items():
+        resilience.LLM_ATTEMPT_TIMEOUT_SECONDS = args.attempt_timeout_ms / 1000 if setup["timeouts"] else 3600
+        resilience.caller = resilience.AgentCaller(max_retries=setup["max_retries"], hedge=setup["hedge"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.set_llm(FakeChatModel(latency=args.latency_ms / 1000))
+            asyncio.run(run_setup(warmup_ideas, setup, args.concurrency))
+            warmup_stats = resilience.caller.stats()
+            main.set_llm(FakeChatModel(
+                latency=args.latency_ms / 1000, slow_rate=args.slow_rate, slow_latency=args.slow_ms / 1000,
+                failure_rate=args.failure_rate, seed=args.seed,
+            ))
+            runs = asyncio.run(run_setup(ideas, setup, args.concurrency))
+        results[name] = summary(runs, resilience.caller, warmup_stats)
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main_cli()
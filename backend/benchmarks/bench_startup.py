@@ -0,0 +1,100 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: API Cold Start
+#
+# Imports `api` (what `uvicorn api:app` does first) in fresh interpreters
+# under `python -X importtime`, and reports the median cumulative import
+# time plus the slowest modules it imports directly. Pass --max-ms to fail with exit
+# code 1 when the median exceeds a budget, so cold-start regressions can be
+# caught between commits.
+#
+# Usage (from the backend/ directory):
+#   python benchmarks/bench_startup.py --runs 5 --max-ms 1000
+# --------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_PREFIXES = ("langchain", "langchain_core", "langchain_groq", "langchain_google_genai", "groq")
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_once(module: str) -> dict:
+    """Imports `module` in a fresh interpreter and parses the -X importtime report."""
+    env = dict(os.environ)
+    # database.py refuses to import without a connection string; no connection is made.
+    env.setdefault("MONGO_CONNECTION_STRING", "mongodb://localhost:27017")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    modules = {}
+    pending_children = []
+    direct_imports = []
+    for line in completed.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        modules[name] = int(cumulative_us)
+        # importtime prints children before their parent, indented one level deeper.
+        depth = (len(indent) - 1) // 2
+        if depth == 1:
+            pending_children.append((name, int(cumulative_us)))
+        elif depth == 0:
+            if name == module:
+                direct_imports = pending_children
+            pending_children = []
+
+    return {
+        "total_ms": modules.get(module, 0) / 1000,
+        "direct_imports": direct_imports,
+        "heavy_modules": sorted(name for name in modules if name.split(".")[0] in HEAVY_PREFIXES),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold-start import time of the API.")
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to list")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    args = parser.parse_args()
+
+    runs = [import_once(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(run["total_ms"] for run in runs)
+    last = runs[-1]
+    slowest = sorted(last["direct_imports"], key=lambda item: -item[1])[:args.top]
+
+    results = {
+        "module": args.module,
+        "runs": args.runs,
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(min(run["total_ms"] for run in runs), 1),
+        "max_ms": round(max(run["total_ms"] for run in runs), 1),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        "llm_modules_loaded": len(last["heavy_modules"]),
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"!!! Cold start regression: median {median_ms:.1f} ms exceeds the {args.max_ms:.1f} ms budget.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Benchmark: End-to-End API Load Test
+#
+# Boots api:app in-process (startup and shutdown included) against an
+# in-memory mongomock_motor database and the offline fake LLM, then lets
+# --users virtual users loose on it at once. Each user signs up, verifies
+# the OTP from its email (caught by an in-process mail transport) and logs
+# in, then runs --iterations actions picked at random by --mix weight:
+#
+#   chat        POST /api/chat
+#   stream      POST /api/chat/stream (read to the end)
+#   history     GET /api/chat/history
+#   generate    POST /api/generate, then GET /api/jobs/{job_id} until done
+#   list        GET /api/projects
+#   download    GET /api/projects/{project_id}/download (generates first
+#               if the user has no project yet)
+#
+# Reports throughput and p50/p95/p99 latency per endpoint (by route
+# template), plus the end-to-end time of generation jobs. Pass --json to
+# save the results and --baseline with an earlier results file to print
+# the p95 change per endpoint, e.g. between two commits.
+#
+# Virtual users act much faster than people, so admission control
+# (admission.py) is off unless ADMISSION_ENABLED=1 is set explicitly.
+#
+# Usage (from the backend/ directory, needs pip install -r ../requirements-bench.txt):
+#   python benchmarks/loadtest.py --users 50 --iterations 20 --llm-latency-ms 50 --json loadtest.json
+#   python benchmarks/loadtest.py --users 50 --iterations 20 --baseline loadtest.json
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGO_CONNECTION_STRING", "mongodb://localhost:27017")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["MAIL_TRANSPORT"] = "loadtest"
+os.environ.setdefault("ADMISSION_ENABLED", "0")
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+import api
+import database
+import export
+import mailer
+import main
+from fake_llm import FakeChatModel
+
+DEFAULT_MIX = "chat=30,stream=10,history=10,generate=10,list=25,download=15"
+PASSWORD = "load test password"
+IDEAS = [
+    "a tiffin delivery service", "a marketplace for used textbooks", "a booking app for badminton courts",
+    "a pharmacy stock tracker", "a tutor finder for school students", "a gym membership manager",
+    "a bakery pre-order app", "a carpool planner for offices", "a plant care reminder", "a local events board",
+]
+QUESTIONS = [
+    "How should I price my first plan?", "Who are my first ten customers?", "What should the MVP leave out?",
+    "How do I find a technical co-founder?", "Which metric should I watch weekly?",
+]
+_OTP_RE = re.compile(r"\b(\d{6})\b")
+
+
+# --- Mail Capture ---
+
+class InboxTransport:
+    """Keeps the OTP of every verification email so virtual users can read their inbox."""
+    otps: Dict[str, str] = {}
+    arrived: Dict[str, asyncio.Event] = {}
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    connections_opened = 0
+
+    def send_batch(self, messages) -> list:
+        for message in messages:
+            match = _OTP_RE.search(str(message.get_payload()))
+            if match:
+                self.otps[message["To"]] = match.group(1)
+                # Delivery runs on the mailer's thread, the waiting user on the event loop.
+                self.loop.call_soon_threadsafe(self.inbox(message["To"]).set)
+        return [None] * len(messages)
+
+    @classmethod
+    def inbox(cls, email: str) -> asyncio.Event:
+        return cls.arrived.setdefault(email, asyncio.Event())
+
+    def close(self):
+        pass
+
+
+mailer.register_transport("loadtest", InboxTransport)
+
+
+# --- Measurements ---
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "per_second": round((len(latencies) + errors) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies, default=0.0), 1),
+    }
+
+
+class Recorder:
+    """Latencies (ms) of successful requests and error counts, per endpoint."""
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        await response.aread() # Streamed responses count until their last byte
+        elapsed = (time.perf_counter() - start) * 1000
+        self.statuses[endpoint][response.status_code] += 1
+        if response.status_code < 400:
+            self.latencies[endpoint].append(elapsed)
+        else:
+            self.errors[endpoint] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = sorted(set(self.latencies) | set(self.errors))
+        return {
+            endpoint: {
+                **summarize(self.latencies[endpoint], self.errors[endpoint], elapsed),
+                "statuses": {str(code): n for code, n in sorted(self.statuses[endpoint].items())},
+            }
+            for endpoint in endpoints
+        }
+
+
+# --- Virtual Users ---
+
+class VirtualUser:
+    def __init__(self, number: int, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, args):
+        self.number = number
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.args = args
+        self.email = f"load{number}@autogenesis.dev"
+        self.headers: Dict[str, str] = {}
+        self.project_ids: List[str] = []
+        self.job_seconds: List[float] = []
+        self.failed_jobs = 0
+
+    async def call(self, endpoint: str, url: Optional[str] = None, **kwargs) -> httpx.Response:
+        method, path = endpoint.split(" ", 1)
+        return await self.recorder.request(self.client, endpoint, method, url or path, headers=self.headers, **kwargs)
+
+    async def sign_up(self):
+        r = await self.call("POST /api/signup", json={"name": f"Load {self.number}", "email": self.email, "password": PASSWORD})
+        r.raise_for_status()
+        await asyncio.wait_for(InboxTransport.inbox(self.email).wait(), timeout=30)
+        r = await self.call("POST /api/verify-otp", json={"email": self.email, "otp": InboxTransport.otps[self.email]})
+        r.raise_for_status()
+        r = await self.call("POST /api/login", data={"username": self.email, "password": PASSWORD})
+        r.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    async def chat(self):
+        await self.call("POST /api/chat", json={"question": self.rng.choice(QUESTIONS)})
+
+    async def stream(self):
+        await self.call("POST /api/chat/stream", json={"question": self.rng.choice(QUESTIONS)})
+
+    async def history(self):
+        await self.call("GET /api/chat/history")
+
+    async def generate(self):
+        # A fresh idea per call, so the stage and semantic caches do not answer it.
+        idea = f"{self.rng.choice(IDEAS)} for user {self.number}, variant {self.rng.randrange(10**6)}"
+        start = time.perf_counter()
+        r = await self.call("POST /api/generate", json={"idea": idea, "mode": self.args.mode})
+        if r.status_code >= 400:
+            return
+        job_id = r.json()["_id"]
+        while True:
+            await asyncio.sleep(self.args.poll_ms / 1000)
+            r = await self.call("GET /api/jobs/{job_id}", f"/api/jobs/{job_id}")
+            if r.status_code >= 400:
+                self.failed_jobs += 1
+                return
+            job = r.json()
+            if job["status"] == "completed":
+                self.job_seconds.append(time.perf_counter() - start)
+                self.project_ids.append(job["project_id"])
+                return
+            if job["status"] == "failed":
+                self.failed_jobs += 1
+                return
+
+    async def list(self):
+        r = await self.call("GET /api/projects")
+        if r.status_code < 400:
+            self.project_ids = [project["_id"] for project in r.json()] or self.project_ids
+
+    async def download(self):
+        if not self.project_ids:
+            await self.generate()
+        if self.project_ids:
+            project_id = self.rng.choice(self.project_ids)
+            await self.call("GET /api/projects/{project_id}/download", f"/api/projects/{project_id}/download")
+
+    async def run(self, mix: Dict[str, int]):
+        await self.sign_up()
+        actions, weights = list(mix), list(mix.values())
+        for _ in range(self.args.iterations):
+            await getattr(self, self.rng.choices(actions, weights)[0])()
+
+
+# --- Runner ---
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if not hasattr(VirtualUser, name) or name in ("call", "run", "sign_up"):
+            raise SystemExit(f"Unknown action '{name}' in --mix")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, timeout=10).stdout.strip()
+    except Exception:
+        return None
+
+
+async def init_in_memory_db(init_db=database.init_db):
+    """
+    init_db() on a mongomock_motor client. mongomock drops partialFilterExpression
+    from the indexes Beanie creates (it keeps it in create_index()), so partial
+    unique indexes are created again, or keyless generation jobs would clash.
+    """
+    await init_db(AsyncMongoMockClient())
+    for model in database.DOCUMENT_MODELS:
+        for index in getattr(model.Settings, "indexes", []):
+            options = dict(getattr(index, "document", {}))
+            if "partialFilterExpression" not in options:
+                continue
+            keys = list(options.pop("key").items())
+            collection = model.get_motor_collection()
+            await collection.drop_index(options["name"])
+            await collection.create_index(keys, **options)
+
+
+async def run(args) -> dict:
+    main.set_llm(FakeChatModel(latency=args.llm_latency_ms / 1000))
+    database.init_db = init_in_memory_db
+    export.EXPORT_CACHE_DIR = tempfile.mkdtemp(prefix="loadtest_export_")
+    InboxTransport.loop = asyncio.get_running_loop()
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+
+    await api.on_startup()
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            users = [VirtualUser(n, client, recorder, random.Random(args.seed + n), args) for n in range(args.users)]
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(*[user.run(mix) for user in users], return_exceptions=True)
+            elapsed = time.perf_counter() - start
+    finally:
+        await api.on_shutdown()
+        shutil.rmtree(export.EXPORT_CACHE_DIR, ignore_errors=True)
+
+    crashed = [repr(outcome) for outcome in outcomes if isinstance(outcome, BaseException)]
+    job_seconds = [s * 1000 for user in users for s in user.job_seconds]
+    endpoints = recorder.report(elapsed)
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("json_path", "baseline")},
+        "wall_seconds": round(elapsed, 2),
+        "requests": total,
+        "requests_per_second": round(total / elapsed, 1),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "users_crashed": len(crashed),
+        "crashes": crashed[:5],
+        "endpoints": endpoints,
+        "generation_jobs": {
+            **summarize(job_seconds, sum(user.failed_jobs for user in users), elapsed),
+            "note": "end to end: POST /api/generate until the job polls as completed",
+        },
+    }
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """p95 latency and throughput of every endpoint against an earlier run."""
+    changes = {}
+    for endpoint, now in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before:
+            continue
+        change = {"p95_ms": [before["p95_ms"], now["p95_ms"]], "per_second": [before["per_second"], now["per_second"]]}
+        if before["p95_ms"]:
+            change["p95_change_pct"] = round((now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100, 1)
+        changes[endpoint] = change
+    return {"baseline_commit": baseline.get("commit"), "endpoints": changes}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load test the API in-process with an in-memory database and fake LLM.")
+    parser.add_argument("--users", type=int, default=50, help="Virtual users running at the same time")
+    parser.add_argument("--iterations", type=int, default=20, help="Actions per user after signing up")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Action weights, e.g. chat=30,generate=10")
+    parser.add_argument("--mode", default="monolithic", help="Generation mode sent to /api/generate")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="Fake LLM delay per call")
+    parser.add_argument("--poll-ms", type=float, default=100, help="Job status polling interval")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Earlier results file to compare p95 latency against")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["comparison"] = compare(results, json.load(f))
+
+    print(json.dumps(results, indent=4))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main_cli()
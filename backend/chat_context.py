@@ -0,0 +1,280 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.8 - Incremental Chat Context
+#
+# Every chat turn used to read the user's last 10 messages back from
+# MongoDB and paste them all into the prompt. Now each user has one
+# ChatContext document:
+#
+#   - `window` keeps the latest messages verbatim (at least
+#     CHAT_WINDOW_MESSAGES of them).
+#   - Once CHAT_SUMMARY_EVERY more have piled up on top of that, the
+#     oldest CHAT_SUMMARY_EVERY are folded into `summary` by one LLM call,
+#     in the background, after the reply has been sent.
+#
+# The context is cached per process, so a turn reads nothing back from the
+# database and writes only the two new messages (one $push, made after the
+# reply has been sent, see record_turn_later). The prompt is
+# bounded by the summary plus at most CHAT_WINDOW_MESSAGES +
+# CHAT_SUMMARY_EVERY clipped messages, however long the conversation gets.
+#
+# Several API processes may serve the same user. Every write bumps
+# `version`; a process whose write does not land on the version it expected
+# drops its cached copy and reloads the document on the next turn.
+# --------------------------------------------------------------------------
+
+import asyncio
+import os
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+import admission
+import chat_store
+import main
+import metrics
+import models
+
+# --- Chat Context Configuration ---
+CHAT_WINDOW_MESSAGES = int(os.getenv("CHAT_WINDOW_MESSAGES", "2"))
+CHAT_SUMMARY_EVERY = int(os.getenv("CHAT_SUMMARY_EVERY", "8"))
+CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "1200"))
+CHAT_CONTEXT_MESSAGE_CHARS = int(os.getenv("CHAT_CONTEXT_MESSAGE_CHARS", "600"))
+CHAT_CONTEXT_CACHE_SIZE = int(os.getenv("CHAT_CONTEXT_CACHE_SIZE", "10000"))
+
+# Messages shown verbatim in a prompt, at most.
+PROMPT_WINDOW = CHAT_WINDOW_MESSAGES + CHAT_SUMMARY_EVERY
+# Messages kept in a stored window, at most. Only reached if summarizing keeps
+# failing; the oldest messages are then dropped rather than growing the document.
+MAX_STORED_WINDOW = CHAT_WINDOW_MESSAGES + 4 * CHAT_SUMMARY_EVERY
+
+SUMMARY_PROMPT_TEMPLATE = """You keep a running summary of a conversation between a founder ('user') and 'Genesis', a startup advisor AI ('ai').
+
+        Current Summary:
+        {summary}
+
+        New Messages:
+        {messages}
+
+        Rewrite the summary so it also covers the new messages. Keep the founder's idea, constraints,
+        decisions, advice already given and open questions. Leave out greetings and filler.
+        Use at most {max_words} words.
+
+        Updated Summary:"""
+
+
+def _clip(text: str) -> str:
+    if len(text) <= CHAT_CONTEXT_MESSAGE_CHARS:
+        return text
+    return text[:CHAT_CONTEXT_MESSAGE_CHARS] + " [...]"
+
+
+def format_history(context: models.ChatContext) -> str:
+    """The `chat_history_str` of the chat prompt: the summary, then the recent messages."""
+    lines = []
+    if context.summary:
+        lines.append(f"summary of the {context.summarized_messages} earlier messages: {context.summary}")
+    lines.extend(f"{message.sender}: {_clip(message.text)}" for message in context.window[-PROMPT_WINDOW:])
+    return "\n".join(lines)
+
+
+async def summarize(summary: str, messages: List[models.ContextMessage]) -> str:
+    """Returns `summary` updated to also cover `messages` (one LLM call)."""
+    # Imported here so workers that never chat never load LangChain.
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    chain = PromptTemplate.from_template(SUMMARY_PROMPT_TEMPLATE) | main.get_llm() | StrOutputParser()
+    async with admission.llm_gate.slot("chat_summary"):
+        text = await chain.ainvoke({
+            "summary": summary or "(nothing yet)",
+            "messages": "\n".join(f"{message.sender}: {_clip(message.text)}" for message in messages),
+            "max_words": CHAT_SUMMARY_MAX_CHARS // 6,
+        }, config=metrics.llm_config("chat_summary"))
+    return text.strip()[:CHAT_SUMMARY_MAX_CHARS]
+
+
+def _entries(messages: List[models.ChatMessage]) -> List[models.ContextMessage]:
+    return [models.ContextMessage(id=m.id, sender=m.sender, text=m.text) for m in messages]
+
+
+class ChatContextStore:
+    """
+    Per-process cache of ChatContext documents, plus the background folds
+    that summarize them. Turns of one user are serialized by a per-user lock.
+    """
+    def __init__(self, max_entries: int = CHAT_CONTEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._contexts: "OrderedDict[PydanticObjectId, models.ChatContext]" = OrderedDict()
+        self._locks: "weakref.WeakValueDictionary[PydanticObjectId, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._folds: Dict[PydanticObjectId, asyncio.Task] = {}
+        self._writes: Dict[PydanticObjectId, asyncio.Task] = {} # Latest record_turn_later() per user
+        self.hits = 0
+        self.misses = 0
+        self.seeded = 0
+        self.stale = 0
+        self.folds = 0
+        self.fold_failures = 0
+
+    def _lock(self, user_id: PydanticObjectId) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+        return lock
+
+    def _remember(self, context: models.ChatContext):
+        self._contexts[context.user_id] = context
+        self._contexts.move_to_end(context.user_id)
+        while len(self._contexts) > self.max_entries:
+            self._contexts.popitem(last=False)
+
+    async def _load(self, user_id: PydanticObjectId) -> models.ChatContext:
+        context = self._contexts.get(user_id)
+        if context is not None:
+            self._contexts.move_to_end(user_id)
+            self.hits += 1
+            return context
+        self.misses += 1
+        context = await models.ChatContext.find_one(models.ChatContext.user_id == user_id)
+        if context is None:
+            context = await self._seed(user_id)
+        self._remember(context)
+        return context
+
+    async def _seed(self, user_id: PydanticObjectId) -> models.ChatContext:
+        """
+        Creates the context of a user who has none yet from their latest messages
+        (as many as a prompt shows; the next fold summarizes the oldest of them).
+        """
+        await chat_store.chat_store.flush() # The seed must see buffered messages too
+        recent = await models.ChatMessage.find(
+            models.ChatMessage.user_id == user_id
+        ).sort(-models.ChatMessage.id).limit(PROMPT_WINDOW).to_list()
+        context = models.ChatContext(user_id=user_id, window=_entries(list(reversed(recent))))
+        try:
+            await context.insert()
+            self.seeded += 1
+        except DuplicateKeyError:
+            # Another process seeded it first.
+            context = await models.ChatContext.find_one(models.ChatContext.user_id == user_id)
+        return context
+
+    async def _apply(self, user_id: PydanticObjectId, query: dict, update: dict) -> Optional[int]:
+        """Runs one atomic update and returns the document's new version (None if nothing matched)."""
+        update.setdefault("$inc", {})["version"] = 1
+        update.setdefault("$set", {})["updated_at"] = datetime.now()
+        result = await models.ChatContext.get_motor_collection().find_one_and_update(
+            {"user_id": user_id, **query}, update,
+            projection={"version": 1}, return_document=ReturnDocument.AFTER,
+        )
+        return None if result is None else result["version"]
+
+    async def history_for_prompt(self, user_id: PydanticObjectId) -> str:
+        """The conversation so far, ready for the chat prompt. Call before saving the new question."""
+        pending = self._writes.get(user_id)
+        if pending is not None:
+            await asyncio.wait([pending]) # The previous turn must be in the window first
+        async with self._lock(user_id):
+            return format_history(await self._load(user_id))
+
+    async def record_turn(self, user_id: PydanticObjectId, messages: List[models.ChatMessage]):
+        """Appends a turn's saved messages, and starts a fold once enough have piled up."""
+        entries = _entries(messages)
+        async with self._lock(user_id):
+            context = await self._load(user_id)
+            version = await self._apply(user_id, {}, {
+                "$push": {"window": {"$each": [e.model_dump() for e in entries], "$slice": -MAX_STORED_WINDOW}},
+            })
+            if version != context.version + 1:
+                # Another process wrote to this context too; reload it on the next turn.
+                self.stale += 1
+                self._contexts.pop(user_id, None)
+                return
+            context.window = (context.window + entries)[-MAX_STORED_WINDOW:]
+            context.version = version
+            if len(context.window) >= PROMPT_WINDOW and user_id not in self._folds:
+                self._folds[user_id] = asyncio.create_task(self._fold(user_id))
+
+    def record_turn_later(self, user_id: PydanticObjectId, messages: List[models.ChatMessage]):
+        """
+        record_turn() in the background, so the chat response does not wait on it.
+        Turns of one user are still recorded in order, and the user's next
+        history_for_prompt() waits for them.
+        """
+        previous = self._writes.get(user_id)
+
+        async def record():
+            if previous is not None:
+                await asyncio.wait([previous])
+            try:
+                await self.record_turn(user_id, messages)
+            except Exception as e:
+                print(f"!!! [ChatContext] Could not record a turn of user {user_id}: {e}")
+                self._contexts.pop(user_id, None) # Reloaded from MongoDB on the next turn
+            finally:
+                if self._writes.get(user_id) is task:
+                    del self._writes[user_id]
+
+        task = asyncio.create_task(record())
+        self._writes[user_id] = task
+
+    async def _fold(self, user_id: PydanticObjectId):
+        """Summarizes the oldest CHAT_SUMMARY_EVERY messages of the window into the summary."""
+        admission.current_user.set(str(user_id)) # This task's LLM call counts against the user's limit
+        try:
+            async with self._lock(user_id):
+                context = await self._load(user_id)
+                if len(context.window) < PROMPT_WINDOW:
+                    return
+                folded = context.window[:CHAT_SUMMARY_EVERY]
+                summary, summary_version = context.summary, context.summary_version
+
+            # The LLM call runs outside the lock, so new turns are not held up by it.
+            new_summary = await summarize(summary, folded)
+
+            async with self._lock(user_id):
+                version = await self._apply(user_id, {"summary_version": summary_version}, {
+                    "$set": {"summary": new_summary},
+                    "$pull": {"window": {"id": {"$in": [m.id for m in folded]}}},
+                    "$inc": {"summary_version": 1, "summarized_messages": len(folded)},
+                })
+                if version is None:
+                    return # Another process folded these messages first
+                self.folds += 1
+                context = self._contexts.get(user_id)
+                if context is None or version != context.version + 1:
+                    self._contexts.pop(user_id, None)
+                    return
+                folded_ids = {m.id for m in folded}
+                context.window = [m for m in context.window if m.id not in folded_ids]
+                context.summary = new_summary
+                context.summary_version += 1
+                context.summarized_messages += len(folded)
+                context.version = version
+        except Exception as e:
+            self.fold_failures += 1
+            print(f"!!! [ChatContext] Could not summarize the conversation of user {user_id}: {e}")
+        finally:
+            self._folds.pop(user_id, None)
+
+    async def wait_idle(self):
+        """Waits for the pending turns and running folds to finish (at shutdown, and in benchmarks)."""
+        while self._writes or self._folds:
+            await asyncio.wait([*self._writes.values(), *self._folds.values()])
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._contexts), "hits": self.hits, "misses": self.misses,
+            "seeded": self.seeded, "stale": self.stale, "folds": self.folds,
+            "fold_failures": self.fold_failures, "folds_running": len(self._folds),
+            "turns_pending": len(self._writes),
+        }
+
+
+# --- Global Chat Context Store ---
+chat_contexts = ChatContextStore()
@@ -0,0 +1,150 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.9 - Write-Behind Chat Persistence
+#
+# A chat turn used to wait on two ChatMessage inserts, one before and one
+# after the LLM call. Messages now get their _id in the process (ObjectIds
+# are generated client-side anyway) and go into an in-memory buffer. A
+# background flusher writes the buffer with insert_many every
+# CHAT_FLUSH_INTERVAL_MS, or as soon as CHAT_FLUSH_BATCH messages are
+# waiting. Chat requests no longer wait on MongoDB at all.
+#
+# Durability:
+#   - A failed flush keeps its messages and is retried. Retrying is safe
+#     because the ids are fixed, so messages that did land are skipped as
+#     duplicates.
+#   - GET /api/chat/history flushes first, so a user always sees their
+#     own messages.
+#   - stop() (on API shutdown) flushes whatever is left.
+#   - Once CHAT_BUFFER_MAX messages are waiting, new messages wait
+#     for a flush instead of growing the buffer.
+#
+# A hard crash loses at most the messages of the last flush interval.
+# --------------------------------------------------------------------------
+
+import asyncio
+import os
+from typing import List, Optional
+
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+
+import models
+
+# --- Chat Persistence Configuration ---
+CHAT_FLUSH_INTERVAL_MS = int(os.getenv("CHAT_FLUSH_INTERVAL_MS", "100"))
+CHAT_FLUSH_BATCH = int(os.getenv("CHAT_FLUSH_BATCH", "200"))
+CHAT_BUFFER_MAX = int(os.getenv("CHAT_BUFFER_MAX", "5000"))
+
+# Wait before retrying after a failed flush (doubles up to the maximum).
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 10.0
+
+
+class ChatStore:
+    """Buffers ChatMessages and bulk-inserts them from a background task."""
+    def __init__(self, interval_ms: int = CHAT_FLUSH_INTERVAL_MS, batch_size: int = CHAT_FLUSH_BATCH,
+                 max_buffer: int = CHAT_BUFFER_MAX):
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self._pending: List[models.ChatMessage] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.buffered = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.largest_batch = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._flusher())
+
+    async def add(self, message: models.ChatMessage) -> models.ChatMessage:
+        """
+        Assigns the message its _id and buffers it. Returns right away unless
+        the buffer is full, in which case it first waits for a flush.
+        """
+        self._ensure_started()
+        if len(self._pending) >= self.max_buffer:
+            await self.flush() # If MongoDB is down this raises, and the message is not taken
+        if message.id is None:
+            message.id = PydanticObjectId()
+        self._pending.append(message)
+        self.buffered += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return message
+
+    async def flush(self):
+        """Writes every buffered message. Raises (keeping them buffered) if MongoDB fails."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                try:
+                    await models.ChatMessage.insert_many(batch, ordered=False)
+                except BulkWriteError as e:
+                    # Duplicate ids are messages an earlier, failed-looking flush did write.
+                    if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                        self.failures += 1
+                        raise
+                except Exception:
+                    self.failures += 1
+                    raise
+                # Only now are they removed, so a failure above leaves them for the retry.
+                del self._pending[:len(batch)]
+                self.written += len(batch)
+                self.flushes += 1
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+    async def _flusher(self):
+        delay = RETRY_BASE_SECONDS
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                delay = RETRY_BASE_SECONDS
+            except Exception as e:
+                print(f"!!! [ChatStore] Could not save {len(self._pending)} chat message(s), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_SECONDS)
+
+    async def stop(self, attempts: int = 3):
+        """Stops the flusher and writes what is still buffered."""
+        if not self._task:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        for attempt in range(attempts):
+            try:
+                await self.flush()
+                break
+            except Exception as e:
+                print(f"!!! [ChatStore] Final flush failed (attempt {attempt + 1}/{attempts}): {e}")
+                await asyncio.sleep(RETRY_BASE_SECONDS)
+        if self._pending:
+            print(f"!!! [ChatStore] Stopped with {len(self._pending)} chat message(s) unsaved.")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending), "buffered": self.buffered, "written": self.written,
+            "flushes": self.flushes, "failures": self.failures, "largest_batch": self.largest_batch,
+        }
+
+
+# --- Global Chat Store ---
+chat_store = ChatStore()
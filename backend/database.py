@@ -42,10 +42,16 @@
 # This file connects to MongoDB Atlas using Beanie.
 # --------------------------------------------------------------------------
 
+import asyncio
 import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime
 from beanie import init_beanie
+from bson import ObjectId
+from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 from pydantic import BaseModel
 
 # We must import all the models we want Beanie to discover.
@@ -53,26 +59,37 @@ from pydantic import BaseModel
 import models
 
 # Load the connection string from the .env file
+load_dotenv()
 MONGO_CONNECTION_STRING = os.getenv("MONGO_CONNECTION_STRING")
 
 if not MONGO_CONNECTION_STRING:
     raise ValueError("MONGO_CONNECTION_STRING is not set in the .env file")
 
+# Run explain() on the hot queries at startup and refuse to start on a COLLSCAN.
+VERIFY_QUERY_PLANS = os.getenv("VERIFY_QUERY_PLANS", "1") == "1"
+
 # Define all the Document models Beanie needs to initialize
 DOCUMENT_MODELS: List[Type[BaseModel]] = [
     models.User,
     models.Project,
-    models.ChatMessage
+    models.ProjectArtifact,
+    models.ChatMessage,
+    models.ChatContext,
+    models.GenerationJob,
+    models.GenerationRun
 ]
 
-async def init_db():
+async def init_db(client: Optional[AsyncIOMotorClient] = None):
     """
     Initializes the database connection and Beanie.
+    `client` replaces the MongoDB Atlas client, e.g. with an in-memory
+    mongomock_motor client in benchmarks.
     """
     print("Connecting to MongoDB Atlas...")
     try:
         # Create the MongoDB client
-        client = AsyncIOMotorClient(MONGO_CONNECTION_STRING)
+        if client is None:
+            client = AsyncIOMotorClient(MONGO_CONNECTION_STRING)
         
         # Get the database (you can name this whatever you want)
         db = client.autogenesis_db
@@ -84,4 +101,130 @@ async def init_db():
     except Exception as e:
         print(f"!!! FAILED to connect to MongoDB Atlas: {e}")
         print("!!! Please check your MONGO_CONNECTION_STRING in the .env file and ensure your IP is whitelisted in Atlas.")
-        raise
\ No newline at end of file
+        raise
+
+    # init_beanie has already created any missing indexes declared on the models.
+    if VERIFY_QUERY_PLANS:
+        await verify_query_plans()
+
+
+# --- Query Plan Verification ---
+# Every query the API runs per request must be served by an index declared
+# in models.py. These are those queries, with placeholder values.
+
+@dataclass
+class HotQuery:
+    name: str
+    model: Type[BaseModel]
+    filter: Dict[str, Any]
+    sort: List[Tuple[str, int]]
+
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("users by email", models.User, {"email": "probe@example.com"}, []),
+    HotQuery("projects by owner, newest first", models.Project,
+             {"owner_id": ObjectId(), "_id": {"$lt": ObjectId()}}, [("_id", -1)]),
+    HotQuery("chat history, newest first", models.ChatMessage,
+             {"user_id": ObjectId(), "_id": {"$lt": ObjectId()}}, [("_id", -1)]),
+    HotQuery("chat context seed, newest first", models.ChatMessage,
+             {"user_id": ObjectId()}, [("_id", -1)]),
+    HotQuery("chat context by user", models.ChatContext, {"user_id": ObjectId()}, []),
+    HotQuery("queued generation jobs", models.GenerationJob,
+             {"status": "queued"}, [("created_at", 1)]),
+    HotQuery("generation jobs with an expired lease", models.GenerationJob,
+             {"status": "running", "lease_until": {"$lt": datetime.now()}}, []),
+    HotQuery("generation job by idempotency key", models.GenerationJob,
+             {"owner_id": ObjectId(), "idempotency_key": "probe"}, []),
+    HotQuery("generation run by job", models.GenerationRun, {"job_id": ObjectId()}, []),
+]
+
+
+class QueryPlanError(RuntimeError):
+    """Raised when a hot query would scan a whole collection."""
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collects every `stage` name in an explain() plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages += _plan_stages(value)
+    return stages
+
+
+def _covering_index(query: HotQuery, indexes: Dict[str, dict]) -> Optional[str]:
+    """
+    Fallback for backends without explain() (e.g. mongomock): finds an index whose
+    leading keys are the equality (or $in) filter fields followed by the sort
+    fields, and which also contains every range-filtered field.
+    """
+    equality = {
+        field for field, value in query.filter.items()
+        if not isinstance(value, dict) or set(value) == {"$in"}
+    }
+    ranges = set(query.filter) - equality
+    wanted = len(equality) + len(query.sort)
+    for name, info in indexes.items():
+        keys = [(field, int(direction)) for field, direction in info["key"]]
+        if len(keys) < wanted:
+            continue
+        if {field for field, _ in keys[:len(equality)]} != equality:
+            continue
+        if not ranges <= {field for field, _ in keys}:
+            continue
+        sort_keys = keys[len(equality):wanted]
+        same = sort_keys == query.sort
+        reversed_ = sort_keys == [(field, -direction) for field, direction in query.sort]
+        if same or reversed_:
+            return name
+    return None
+
+
+async def explain_query(query: HotQuery) -> str:
+    """Returns how the server plans to run a hot query, e.g. 'IXSCAN' or 'COLLSCAN'."""
+    collection = query.model.get_motor_collection()
+    cursor = collection.find(query.filter)
+    if query.sort:
+        cursor = cursor.sort(query.sort)
+    if hasattr(cursor, "explain"):
+        explanation = await cursor.explain()
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        return "COLLSCAN" if "COLLSCAN" in stages else " > ".join(reversed(stages)) or "UNKNOWN"
+
+    index = _covering_index(query, await collection.index_information())
+    return f"IXSCAN {index} (no explain(), by index keys)" if index else "COLLSCAN (no covering index)"
+
+
+async def verify_query_plans():
+    """Explains every hot query and raises QueryPlanError if any of them is a collection scan."""
+    scans = []
+    for query in HOT_QUERIES:
+        plan = await explain_query(query)
+        print(f"--- [Query Plans] {query.name}: {plan}")
+        if plan.startswith("COLLSCAN"):
+            scans.append(query.name)
+    if scans:
+        raise QueryPlanError(
+            f"These queries would scan a whole collection: {', '.join(scans)}. "
+            "Check the indexes declared in models.py."
+        )
+    print(f"✅ [Query Plans] All {len(HOT_QUERIES)} hot queries use an index.")
+
+
+if __name__ == "__main__":
+    # python database.py --check-indexes
+    # Creates the declared indexes (via init_beanie) and verifies the hot query plans.
+    if "--check-indexes" not in sys.argv[1:]:
+        print("Usage: python database.py --check-indexes")
+        sys.exit(2)
+    VERIFY_QUERY_PLANS = True
+    try:
+        asyncio.run(init_db())
+    except QueryPlanError as e:
+        print(f"!!! {e}")
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,254 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.7 - Project Zip Export
+#
+# GET /api/projects/{id}/download used to build the whole zip in memory on
+# every request, recompressing identical content each time. Now each
+# project version is zipped once:
+#
+#   - The version is identified by an ETag derived from the artifact's
+#     content hash plus the project metadata that goes into the README,
+#     so a matching If-None-Match is answered with 304 before anything is
+#     decompressed.
+#   - On a cache miss the archive is streamed to the client chunk by chunk
+#     as it is compressed, and written to EXPORT_CACHE_DIR at the same time.
+#   - Later downloads of the same version are served straight from that
+#     file without any compression work.
+#
+# Archives are deterministic (fixed entry order and timestamps), so the
+# same content always produces the same bytes.
+#
+# POST /api/projects/export bundles many projects into one archive with a
+# folder per project. It is streamed batch by batch and never cached.
+# --------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+import artifacts
+import models
+
+# --- Export Configuration ---
+# Empty EXPORT_CACHE_DIR disables the disk cache; every download is then streamed.
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "autogenesis_export_cache"))
+EXPORT_CACHE_MAX_MB = int(os.getenv("EXPORT_CACHE_MAX_MB", "512"))
+# Projects fetched and compressed per step of a bulk export.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "20"))
+
+# Bump when the archive layout changes, so cached archives and client ETags are invalidated.
+EXPORT_FORMAT_VERSION = 1
+CHUNK_SIZE = 64 * 1024
+
+_evict_lock = threading.Lock()
+
+
+def project_etag(project: models.Project, content_sha256: str) -> str:
+    """Strong ETag for one version of a project's export."""
+    material = json.dumps(
+        [EXPORT_FORMAT_VERSION, content_sha256, project.title, project.idea, project.created_at.isoformat()],
+        separators=(",", ":"),
+    )
+    return '"' + hashlib.sha256(material.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Implements the If-None-Match comparison (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def archive_entries(project: models.Project, payload: dict) -> List[Tuple[str, bytes]]:
+    """The files in a project's zip, in order."""
+    readme_content = f"# {project.title}\n\n**Original Idea:**\n{project.idea}\n\nGenerated by AutoGenesis."
+    return [
+        ("app.py", (payload["generated_code"] or "# No code was generated for this project.").encode("utf-8")),
+        ("product_plan.json", (json.dumps(payload["product_plan"], indent=4) or "{}").encode("utf-8")),
+        ("design_plan.json", (json.dumps(payload["design_plan"], indent=4) or "{}").encode("utf-8")),
+        ("README.md", readme_content.encode("utf-8")),
+    ]
+
+
+# --- Disk Cache ---
+
+def cached_archive(etag: str) -> Optional[str]:
+    """Returns the path of the cached archive for an ETag, if there is one."""
+    if not EXPORT_CACHE_DIR:
+        return None
+    path = os.path.join(EXPORT_CACHE_DIR, f"{etag.strip(chr(34))}.zip")
+    if not os.path.exists(path):
+        return None
+    try:
+        os.utime(path) # Marks it as recently used for eviction
+    except OSError:
+        pass
+    return path
+
+
+def _evict():
+    """Deletes the least recently used archives once the cache exceeds EXPORT_CACHE_MAX_MB."""
+    with _evict_lock:
+        try:
+            entries = [
+                os.path.join(EXPORT_CACHE_DIR, name)
+                for name in os.listdir(EXPORT_CACHE_DIR) if name.endswith(".zip")
+            ]
+            files = sorted(((os.stat(path), path) for path in entries), key=lambda item: item[0].st_mtime)
+        except OSError:
+            return
+        total = sum(stat.st_size for stat, _ in files)
+        limit = EXPORT_CACHE_MAX_MB * 1024 * 1024
+        for stat, path in files:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= stat.st_size
+            except OSError:
+                pass
+
+
+# --- Streaming Zip Writer ---
+
+class _ChunkSink:
+    """
+    A write-only, unseekable file object for zipfile.
+    zipfile falls back to data descriptors for unseekable output, so the
+    archive can be sent while it is being written.
+    """
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks = []
+            yield data
+
+
+def _zip_date_time(created: datetime) -> Tuple[int, ...]:
+    return (max(created.year, 1980), created.month, created.day, created.hour, created.minute, created.second)
+
+
+def _write_entries(zf: zipfile.ZipFile, sink: _ChunkSink, entries: List[Tuple[str, bytes]],
+                   date_time: Tuple[int, ...], prefix: str = "") -> Iterator[bytes]:
+    """Compresses entries into zf, yielding output as it leaves the compressor."""
+    for name, data in entries:
+        info = zipfile.ZipInfo(prefix + name, date_time=date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        with zf.open(info, "w") as entry:
+            for start in range(0, len(data), CHUNK_SIZE):
+                entry.write(data[start:start + CHUNK_SIZE])
+                yield from sink.drain()
+        yield from sink.drain()
+
+
+def _zip_chunks(project: models.Project, entries: List[Tuple[str, bytes]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        yield from _write_entries(zf, sink, entries, _zip_date_time(project.created_at))
+    yield from sink.drain()
+
+
+def stream_archive(project: models.Project, payload: dict, etag: str) -> Iterator[bytes]:
+    """
+    Yields the zip as it is compressed. A blocking generator: Starlette runs it
+    on the threadpool. The bytes are also written to the disk cache, and the file
+    only becomes visible once the archive is complete.
+    """
+    entries = archive_entries(project, payload)
+    if not EXPORT_CACHE_DIR:
+        yield from _zip_chunks(project, entries)
+        return
+
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    final_path = os.path.join(EXPORT_CACHE_DIR, f"{etag.strip(chr(34))}.zip")
+    tmp_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    completed = False
+    try:
+        with open(tmp_path, "wb") as cache_file:
+            for chunk in _zip_chunks(project, entries):
+                cache_file.write(chunk)
+                yield chunk
+        os.replace(tmp_path, final_path)
+        completed = True
+    finally:
+        # A client that disconnects mid-download leaves no partial archive behind.
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _evict()
+
+
+# --- Bulk Export ---
+
+def folder_name(project: models.ProjectDisplay) -> str:
+    """The folder a project gets inside a bulk archive. The id keeps equal titles apart."""
+    safe_title = re.sub(r'[^a-zA-Z0-9_-]', '_', project.title or "autogenesis_project")
+    return f"{safe_title}_{project.id}/"
+
+
+class BulkArchive:
+    """
+    One zip spanning many projects, filled one project at a time.
+    Only the project being added is ever held in memory; everything
+    compressed before it has already been handed back to be sent.
+    """
+    def __init__(self):
+        self._sink = _ChunkSink()
+        self._zf = zipfile.ZipFile(self._sink, "w", zipfile.ZIP_DEFLATED, compresslevel=6)
+
+    def add_project(self, project: models.ProjectDisplay, payload: dict) -> bytes:
+        return b"".join(_write_entries(
+            self._zf, self._sink, archive_entries(project, payload),
+            _zip_date_time(project.created_at), folder_name(project),
+        ))
+
+    def close(self) -> bytes:
+        """Writes the central directory and returns the last bytes of the archive."""
+        self._zf.close()
+        return b"".join(self._sink.drain())
+
+
+async def stream_bulk_archive(query: dict) -> AsyncIterator[bytes]:
+    """
+    Streams every project matching `query` (newest first) as one zip, with one
+    folder per project. Projects are read EXPORT_BATCH_SIZE at a time, with one
+    $in query per batch for their artifacts, so memory stays the same whatever
+    the number of projects. Compression runs on the threadpool.
+    """
+    archive = BulkArchive()
+    after = None
+    while True:
+        page_query = query if after is None else {"$and": [query, {"_id": {"$lt": after}}]}
+        batch = await models.Project.find(page_query).sort(
+            -models.Project.id
+        ).limit(EXPORT_BATCH_SIZE).project(models.ProjectDisplay).to_list()
+        if not batch:
+            break
+        payloads = await artifacts.load_payloads([project.id for project in batch])
+        for project in batch:
+            yield await run_in_threadpool(archive.add_project, project, payloads.pop(project.id))
+        if len(batch) < EXPORT_BATCH_SIZE:
+            break
+        after = batch[-1].id
+    yield await run_in_threadpool(archive.close)
@@ -0,0 +1,252 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.4b - Deterministic Offline Chat Model
+#
+# FakeChatModel stands in for Groq/Gemini when LLM_PROVIDER=fake. It
+# returns canned ProductPlan / UIDesignPlan objects and Streamlit code
+# after a configurable delay, so the API and the orchestrator can be
+# load-tested without a network and without spending tokens. It can also
+# fail or stall a share of its calls, to exercise resilience.py.
+# --------------------------------------------------------------------------
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import PrivateAttr
+
+_IDEA_RE = re.compile(r'Startup Idea: "(.*?)"', re.DOTALL)
+_FEATURES_RE = re.compile(r"MVP Features:\s*(\[.*?\])", re.DOTALL)
+_FEATURE_RE = re.compile(r"Feature:\s*\n\s*(.+)")
+_FUNCTION_RE = re.compile(r"`def (\w+)\(\):`")
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+
+def _prompt_text(value: Any) -> str:
+    if hasattr(value, "to_string"):
+        return value.to_string()
+    if isinstance(value, list):
+        return "\n".join(str(getattr(m, "content", m)) for m in value)
+    return str(value)
+
+def _count_tokens(text: str) -> int:
+    # Roughly one token per four characters, like most BPE vocabularies.
+    return max(1, len(text) // 4)
+
+
+class FakeLLMUnavailable(ConnectionError):
+    """The failure injected by FakeChatModel.failure_rate, like a dropped provider connection."""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model that never leaves the process.
+    Replies are derived only from the prompt, so the same prompt always
+    gets the same answer. `latency` seconds are spent before each reply
+    (spread across the chunks when streaming).
+    A `slow_rate` share of calls take `slow_latency` instead, and a
+    `failure_rate` share raise FakeLLMUnavailable (streams fail halfway).
+    Which calls are picked depends only on `seed` and the order of the calls.
+    """
+    latency: float = 0.0
+    model_name: str = "fake-autogenesis"
+    temperature: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    failure_rate: float = 0.0
+    seed: int = 0
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any):
+        super().model_post_init(__context)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-autogenesis"
+
+    # --- Canned Content ---
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
+
+    def _product_plan(self, prompt: str) -> dict:
+        match = _IDEA_RE.search(prompt)
+        idea = match.group(1).strip() if match else prompt.strip()[:80]
+        words = [w.capitalize() for w in _WORD_RE.findall(idea)][:2] or ["Genesis"]
+        return {
+            "product_name": "".join(words) + "ly",
+            "tagline": f"The simplest way to get {idea} done.",
+            "target_audience": f"People looking for {idea}.",
+            "mvp_features": [
+                f"Browse and search {words[0].lower()} listings",
+                "Place and track orders",
+                "Manage a personal profile",
+            ],
+        }
+
+    def _features_in(self, prompt: str) -> List[str]:
+        match = _FEATURES_RE.search(prompt)
+        if match:
+            try:
+                return list(json.loads(match.group(1)))
+            except ValueError:
+                pass
+        match = _FEATURE_RE.search(prompt)
+        return [match.group(1).strip()] if match else ["Main feature"]
+
+    def _feature_design(self, feature: str) -> dict:
+        return {"feature": feature, "components": ["st.text_input", "st.button", "st.dataframe"]}
+
+    def _structured(self, schema: Any, prompt: str) -> dict:
+        if isinstance(schema, dict):
+            # A JSON schema: fields come back in the order of its properties.
+            data = self._structured_by_name(schema.get("title", ""), prompt)
+            return {key: data[key] for key in schema.get("properties", data) if key in data}
+        return self._structured_by_name(getattr(schema, "__name__", ""), prompt)
+
+    def _structured_by_name(self, name: str, prompt: str) -> dict:
+        if name == "ProductPlan":
+            return self._product_plan(prompt)
+        if name == "UIDesignPlan":
+            features = self._features_in(prompt)
+            return {
+                "app_layout": "sidebar" if len(features) > 3 else "top-down",
+                "feature_designs": [self._feature_design(f) for f in features],
+            }
+        if name == "FeatureDesign":
+            return self._feature_design(self._features_in(prompt)[0])
+        raise ValueError(f"FakeChatModel has no canned output for {name!r}")
+
+    def _reply(self, prompt: str) -> str:
+        function = _FUNCTION_RE.search(prompt)
+        if function:
+            key = self._digest(prompt)
+            return (
+                "import streamlit as st\n"
+                "import pandas as pd\n\n"
+                f"def {function.group(1)}():\n"
+                f"    st.subheader('Feature {key}')\n"
+                f"    if st.button('Run', key='{key}_run'):\n"
+                f"        st.dataframe(pd.DataFrame([{{'id': '{key}'}}]))\n"
+            )
+        if "Streamlit app" in prompt or "Streamlit application" in prompt:
+            return (
+                "```python\n"
+                "import streamlit as st\n"
+                "import pandas as pd\n\n"
+                "if 'items' not in st.session_state:\n"
+                "    st.session_state.items = []\n\n"
+                f"st.title('Generated App {self._digest(prompt)}')\n"
+                "st.dataframe(pd.DataFrame(st.session_state.items))\n"
+                "```"
+            )
+        return (
+            "Start by talking to ten potential customers this week and write down the exact words "
+            "they use to describe the problem. Then build the smallest version that solves it, "
+            f"charge for it from day one, and measure retention weekly. (ref {self._digest(prompt)})"
+        )
+
+    def _message(self, messages: List[BaseMessage], structured_schema: Any = None) -> AIMessage:
+        prompt = _prompt_text(messages)
+        if structured_schema is not None:
+            content = json.dumps(self._structured(structured_schema, prompt))
+        else:
+            content = self._reply(prompt)
+        prompt_tokens, completion_tokens = _count_tokens(prompt), _count_tokens(content)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    @staticmethod
+    def _chunks(content: str) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", content) or [content]
+
+    def _draw(self) -> Tuple[float, bool]:
+        """The delay of the next call, and whether it fails."""
+        slow = self.slow_rate > 0 and self._rng.random() < self.slow_rate
+        failed = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        return (self.slow_latency if slow else self.latency), failed
+
+    @staticmethod
+    def _fail():
+        raise FakeLLMUnavailable("The fake LLM dropped the connection (injected failure).")
+
+    # --- BaseChatModel Interface ---
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        delay, failed = self._draw()
+        time.sleep(delay)
+        if failed:
+            self._fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, kwargs.get("structured_schema")))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        delay, failed = self._draw()
+        await asyncio.sleep(delay)
+        if failed:
+            self._fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, kwargs.get("structured_schema")))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        message = self._message(messages, kwargs.get("structured_schema"))
+        chunks = self._chunks(message.content)
+        delay, failed = self._draw()
+        for n, text in enumerate(chunks):
+            if failed and n == len(chunks) // 2:
+                self._fail()
+            time.sleep(delay / len(chunks))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        # Like the real providers, report token usage on a final empty chunk.
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._message(messages, kwargs.get("structured_schema"))
+        chunks = self._chunks(message.content)
+        delay, failed = self._draw()
+        for n, text in enumerate(chunks):
+            if failed and n == len(chunks) // 2:
+                self._fail()
+            await asyncio.sleep(delay / len(chunks))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata))
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        """
+        Returns a runnable that produces a canned instance of `schema`.
+        The canned object comes back as JSON from an ordinary model call, so
+        callbacks (and the metrics built on them) see structured calls too.
+        A JSON schema dict gives plain dicts and, like the real providers,
+        streams them as growing partial dicts.
+        """
+        if isinstance(schema, dict):
+            return self.bind(structured_schema=schema) | JsonOutputParser()
+
+        def parse(message: AIMessage):
+            return schema(**json.loads(message.content))
+
+        return self.bind(structured_schema=schema) | RunnableLambda(parse)
@@ -0,0 +1,171 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.3 - Semantic Idea Index
+#
+# The stage cache only helps when an idea is repeated exactly. This index
+# finds past ideas that are worded differently but mean the same thing,
+# so the orchestrator can reuse their product plan instead of calling the
+# Product Agent again.
+#
+# Embeddings are computed locally with a signed hashing vectorizer (no
+# model download, no network) and kept in one preallocated NumPy matrix.
+# A lookup is a single matrix-vector product over all stored ideas.
+# --------------------------------------------------------------------------
+
+import math
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# --- Index Configuration ---
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+IDEA_INDEX_DIM = int(os.getenv("IDEA_INDEX_DIM", "512"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and app application for in of on or platform the to that this with which "
+    "my our your i we want need build create make".split()
+)
+
+
+class HashingEmbedder:
+    """
+    Turns text into a fixed-size, L2-normalized float32 vector.
+    Features are word unigrams, word bigrams and character trigrams, each
+    hashed into one of `dim` buckets with a hash-derived sign.
+    """
+    def __init__(self, dim: int = IDEA_INDEX_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = [w for w in _TOKEN_RE.findall(text.casefold()) if w not in _STOPWORDS]
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"#{w}#"
+            features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        counts = {}
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            bucket = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            counts[bucket] = counts.get(bucket, 0.0) + sign
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for bucket, value in counts.items():
+            # Sublinear term frequency keeps repeated words from dominating.
+            vector[bucket] = math.copysign(1.0 + math.log(abs(value)), value) if value else 0.0
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+@dataclass
+class IdeaMatch:
+    """The closest stored idea for a query."""
+    key: str
+    idea: str
+    score: float
+    payload: Any
+
+
+class IdeaIndex:
+    """
+    Append-only cosine-similarity index over idea embeddings.
+    Rows are stored in a matrix that doubles in size when full, so adding
+    one idea is amortized O(dim) and never rebuilds the index.
+    """
+    def __init__(self, embedder: Optional[HashingEmbedder] = None, capacity: int = 1024):
+        self.embedder = embedder or HashingEmbedder()
+        self._matrix = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        self._keys: List[str] = []
+        self._ideas: List[str] = []
+        self._payloads: List[Any] = []
+        self._known = set()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._known
+
+    def _grow(self, needed: int):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        grown[:self._count] = self._matrix[:self._count]
+        self._matrix = grown
+
+    def add(self, key: str, idea: str, payload: Any = None) -> bool:
+        """Adds one idea. Returns False if the key is already indexed."""
+        return self.add_many([(key, idea, payload)]) == 1
+
+    def add_many(self, items: Iterable[Tuple[str, str, Any]]) -> int:
+        """Adds a batch of (key, idea, payload) tuples. Returns how many were new."""
+        rows = []
+        for key, idea, payload in items:
+            rows.append((str(key), idea, payload, self.embedder.embed(idea)))
+
+        added = 0
+        with self._lock:
+            fresh = [row for row in rows if row[0] not in self._known]
+            self._grow(self._count + len(fresh))
+            for key, idea, payload, vector in fresh:
+                if key in self._known:
+                    continue
+                self._matrix[self._count] = vector
+                self._keys.append(key)
+                self._ideas.append(idea)
+                self._payloads.append(payload)
+                self._known.add(key)
+                self._count += 1
+                added += 1
+        return added
+
+    def search(self, idea: str, k: int = 1) -> List[IdeaMatch]:
+        """Returns up to k stored ideas, most similar first."""
+        query = self.embedder.embed(idea)
+        with self._lock:
+            count = self._count
+            matrix = self._matrix
+        if count == 0:
+            return []
+
+        scores = matrix[:count] @ query
+        k = min(k, count)
+        if k == 1:
+            top = [int(np.argmax(scores))]
+        else:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = sorted(top, key=lambda i: -scores[i])
+        return [
+            IdeaMatch(key=self._keys[i], idea=self._ideas[i],
+                      score=float(scores[i]), payload=self._payloads[i])
+            for i in top
+        ]
+
+    def nearest(self, idea: str, threshold: float = SEMANTIC_CACHE_THRESHOLD) -> Optional[IdeaMatch]:
+        """Returns the closest stored idea if its similarity reaches the threshold."""
+        matches = self.search(idea, k=1)
+        if matches and matches[0].score >= threshold:
+            return matches[0]
+        return None
+
+
+# Process-wide index, filled from the projects collection at startup.
+index = IdeaIndex()
@@ -0,0 +1,443 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.1 - Asynchronous Generation Jobs
+#
+# /api/generate no longer keeps the HTTP request open while the agents run.
+# It records a GenerationJob, pushes the job id onto a queue and returns
+# right away. A bounded pool of worker tasks pulls ids off the queue, runs
+# the orchestrator and saves the resulting Project.
+#
+# Each stage's output is saved on the job's GenerationRun document as soon
+# as the stage completes (RunCheckpoints). A job that is run again, after
+# a transient failure, a restart of the process or a client retrying with
+# the same Idempotency-Key, resumes from the last completed stage instead
+# of paying for every LLM stage again.
+#
+# Several worker processes may share the jobs collection. A worker claims a
+# job by atomically switching it from "queued" to "running", together with
+# a lease it renews every GENERATION_LEASE_SECONDS / 3 while the job runs.
+# Only running jobs whose lease has expired (their worker died) are queued
+# again, so no job is run by two workers at once.
+# --------------------------------------------------------------------------
+
+import asyncio
+import math
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from pymongo import ReturnDocument
+
+import admission
+import artifacts
+import idea_index
+import metrics
+import models
+import progress
+import resilience
+from main import aevocore_orchestrator
+
+# --- Worker Pool Configuration ---
+# Workers are asyncio tasks waiting on LLM I/O, so a single process can run many.
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "32"))
+GENERATION_QUEUE_SIZE = int(os.getenv("GENERATION_QUEUE_SIZE", "100"))
+# Runs of one job, at most. A run after a transient failure resumes from the stages that completed.
+GENERATION_ATTEMPTS = int(os.getenv("GENERATION_ATTEMPTS", "2"))
+# A running job whose worker has not renewed its lease for this long is queued again.
+GENERATION_LEASE_SECONDS = float(os.getenv("GENERATION_LEASE_SECONDS", "120"))
+IDEA_INDEX_REFRESH_SECONDS = int(os.getenv("IDEA_INDEX_REFRESH_SECONDS", "60"))
+IDEA_INDEX_BATCH_SIZE = 1000
+
+# Recorded on the jobs this process claims.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+# --- Semantic Idea Index Loading ---
+
+async def load_idea_index(since: Optional[datetime] = None) -> int:
+    """
+    Adds projects to the semantic idea index, in batches.
+    With `since`, only projects created after that (UTC) time are read.
+    Embedding runs on the threadpool so a large warm-up does not block the event loop.
+    """
+    query = {}
+    if since is not None:
+        query["_id"] = {"$gte": ObjectId.from_datetime(since)}
+
+    added = 0
+    batch = []
+    async for entry in models.Project.find(query).project(models.ProjectIdeaView):
+        if str(entry.id) in idea_index.index:
+            continue
+        batch.append(entry)
+        if len(batch) >= IDEA_INDEX_BATCH_SIZE:
+            added += await _index_projects(batch)
+            batch = []
+    if batch:
+        added += await _index_projects(batch)
+    return added
+
+
+async def _index_projects(entries: List[models.ProjectIdeaView]) -> int:
+    # Projects from before the artifact split still carry their product plan inline.
+    plans = await artifacts.load_product_plans(
+        [entry.id for entry in entries if entry.product_plan is None]
+    )
+    items = [
+        (str(entry.id), entry.idea, entry.product_plan or plans.get(entry.id))
+        for entry in entries
+    ]
+    items = [item for item in items if item[2]]
+    return await run_in_threadpool(idea_index.index.add_many, items)
+
+
+class QueueFull(Exception):
+    """Raised when a job cannot be accepted because the queue is at capacity."""
+
+
+class RunCheckpoints(resilience.Checkpoints):
+    """Checkpoints kept on the job's GenerationRun document, so they survive the process."""
+    def __init__(self, job: models.GenerationJob, stages: Optional[dict] = None):
+        super().__init__()
+        self.job = job
+        self._stages.update(stages or {})
+
+    @classmethod
+    async def open(cls, job: models.GenerationJob) -> "RunCheckpoints":
+        """The checkpoints of `job`, with the stages an earlier run of it completed."""
+        run = await models.GenerationRun.find_one(models.GenerationRun.job_id == job.id)
+        if run is not None and run.stages:
+            print(f"♻️ [Jobs] Job {job.id} resumes after its completed stages: {', '.join(run.stages)}")
+        return cls(job, run.stages if run else None)
+
+    async def save(self, stage: str, value):
+        await super().save(stage, value)
+        # The run document is created by the first completed stage.
+        now = datetime.now()
+        await models.GenerationRun.get_motor_collection().update_one(
+            {"job_id": self.job.id},
+            {
+                "$set": {f"stages.{stage}": value, "updated_at": now},
+                "$setOnInsert": {"owner_id": self.job.owner_id, "created_at": now},
+            },
+            upsert=True,
+        )
+
+    async def discard(self):
+        """Drops the run once its result is saved as a Project."""
+        await models.GenerationRun.find(models.GenerationRun.job_id == self.job.id).delete()
+
+
+class InMemoryJobQueue:
+    """
+    Local queue backend.
+    Holds job ids in an asyncio.Queue inside this process, so the whole
+    job flow can run offline without an external broker.
+    """
+    def __init__(self, maxsize: int = GENERATION_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+
+    def _get_queue(self) -> asyncio.Queue:
+        # Created lazily so the queue belongs to the running event loop.
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        return self._queue
+
+    def full(self) -> bool:
+        return self._get_queue().full()
+
+    def qsize(self) -> int:
+        return self._get_queue().qsize()
+
+    async def put(self, job_id: PydanticObjectId, wait: bool = False):
+        queue = self._get_queue()
+        if wait:
+            await queue.put(job_id)
+            return
+        try:
+            queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise QueueFull()
+
+    async def get(self) -> PydanticObjectId:
+        return await self._get_queue().get()
+
+    def task_done(self):
+        self._get_queue().task_done()
+
+
+class JobManager:
+    """
+    Runs generation jobs on a fixed number of worker tasks.
+    Job state lives on the GenerationJob document, so queued jobs, and running
+    jobs whose worker stopped renewing their lease, are picked up again.
+    """
+    def __init__(self, queue=None, workers: int = GENERATION_WORKERS):
+        self.queue = queue or InMemoryJobQueue()
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._job_seconds = 60.0 # Moving average of how long a job runs, for Retry-After
+
+    async def start(self):
+        if idea_index.SEMANTIC_CACHE_ENABLED:
+            added = await load_idea_index()
+            print(f"✅ [Jobs] Semantic idea index loaded with {added} idea(s).")
+
+        print(f"▶️ [Jobs] Starting {self.workers} generation workers...")
+        self._tasks = [
+            asyncio.create_task(self._worker(n)) for n in range(self.workers)
+        ]
+        if idea_index.SEMANTIC_CACHE_ENABLED:
+            self._tasks.append(asyncio.create_task(self._refresh_idea_index()))
+
+        # Queued jobs may also sit in another worker's queue; whichever worker claims one first runs it.
+        queued = await models.GenerationJob.find(
+            models.GenerationJob.status == "queued"
+        ).sort(+models.GenerationJob.created_at).to_list()
+        for job in queued:
+            await self.queue.put(job.id, wait=True)
+        requeued = await self._requeue_expired()
+        if queued or requeued:
+            print(f"✅ [Jobs] Queued {len(queued)} waiting and {requeued} abandoned job(s).")
+        self._tasks.append(asyncio.create_task(self._watch_leases()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, owner_id: PydanticObjectId, idea: str, mode: str = "monolithic",
+                     idempotency_key: Optional[str] = None) -> models.GenerationJob:
+        """
+        Records a new job and queues it. Raises QueueFull if the queue is at capacity,
+        and DuplicateKeyError if the user already submitted a job with `idempotency_key`.
+        """
+        if self.queue.full():
+            raise QueueFull()
+
+        job = models.GenerationJob(owner_id=owner_id, idea=idea, mode=mode, idempotency_key=idempotency_key)
+        await job.insert()
+
+        try:
+            await self.queue.put(job.id)
+        except QueueFull:
+            job.status = "failed"
+            job.error = "The generation queue is full."
+            job.finished_at = datetime.now()
+            await job.save()
+            raise
+        return job
+
+    def retry_after(self) -> int:
+        """Seconds until a job submitted now would be picked up by a worker, roughly."""
+        return max(1, math.ceil(self._job_seconds * (self.queue.qsize() + 1) / self.workers))
+
+    async def find_submission(self, owner_id: PydanticObjectId, idempotency_key: str) -> Optional[models.GenerationJob]:
+        """The job the user submitted with this Idempotency-Key, if any."""
+        return await models.GenerationJob.find_one(
+            models.GenerationJob.owner_id == owner_id, models.GenerationJob.idempotency_key == idempotency_key
+        )
+
+    async def resubmit(self, job: models.GenerationJob) -> models.GenerationJob:
+        """
+        Queues a failed job again; it resumes from its completed stages.
+        Returns the job as it is now (unchanged if it was not failed, e.g. another request requeued it first).
+        """
+        if self.queue.full():
+            raise QueueFull()
+
+        result = await models.GenerationJob.get_motor_collection().update_one(
+            {"_id": job.id, "status": "failed"},
+            {"$set": {
+                "status": "queued", "error": None, "started_at": None, "finished_at": None,
+                "worker": None, "lease_until": None,
+            }},
+        )
+        job = await models.GenerationJob.get(job.id)
+        if result.modified_count:
+            # Clients following the job's events wait for the new run instead of its old job_failed.
+            progress.hub.reset(job.id)
+            try:
+                await self.queue.put(job.id)
+            except QueueFull:
+                job.status = "failed"
+                job.error = "The generation queue is full."
+                job.finished_at = datetime.now()
+                await job.save()
+                raise
+        return job
+
+    async def _requeue_expired(self) -> int:
+        """Queues the running jobs whose worker has not renewed their lease in time again."""
+        collection = models.GenerationJob.get_motor_collection()
+        expired = await models.GenerationJob.find(
+            {"status": "running", "lease_until": {"$lt": datetime.now()}}
+        ).to_list()
+        requeued = 0
+        for job in expired:
+            # Only if it is still the same expired run (its worker may have renewed it meanwhile).
+            result = await collection.update_one(
+                {"_id": job.id, "status": "running", "worker": job.worker, "lease_until": job.lease_until},
+                {"$set": {"status": "queued", "started_at": None, "worker": None, "lease_until": None}},
+            )
+            if result.modified_count:
+                print(f"⚠️ [Jobs] Job {job.id} was abandoned by worker {job.worker}; queued it again.")
+                progress.hub.reset(job.id)
+                await self.queue.put(job.id, wait=True)
+                requeued += 1
+        return requeued
+
+    async def _watch_leases(self):
+        """Requeues jobs of workers that died while this process keeps running."""
+        while True:
+            await asyncio.sleep(GENERATION_LEASE_SECONDS)
+            try:
+                await self._requeue_expired()
+            except Exception as e:
+                print(f"!!! [Jobs] Could not check the generation job leases: {e}")
+
+    async def _claim(self, job_id: PydanticObjectId) -> Optional[models.GenerationJob]:
+        """Marks a queued job as running on this worker. Returns None if another worker claimed it first."""
+        now = datetime.now()
+        document = await models.GenerationJob.get_motor_collection().find_one_and_update(
+            {"_id": job_id, "status": "queued"},
+            {"$set": {
+                "status": "running", "started_at": now, "worker": WORKER_ID,
+                "lease_until": now + timedelta(seconds=GENERATION_LEASE_SECONDS),
+            }},
+            return_document=ReturnDocument.AFTER,
+        )
+        return None if document is None else models.GenerationJob.model_validate(document)
+
+    async def _renew_lease(self, job_id: PydanticObjectId):
+        """Keeps extending the lease of a job this worker is running."""
+        while True:
+            await asyncio.sleep(GENERATION_LEASE_SECONDS / 3)
+            try:
+                result = await models.GenerationJob.get_motor_collection().update_one(
+                    {"_id": job_id, "worker": WORKER_ID, "status": "running"},
+                    {"$set": {"lease_until": datetime.now() + timedelta(seconds=GENERATION_LEASE_SECONDS)}},
+                )
+                if not result.matched_count:
+                    print(f"!!! [Jobs] Lost the lease on job {job_id}; another worker may run it too.")
+                    return
+            except Exception as e:
+                print(f"!!! [Jobs] Could not renew the lease on job {job_id}: {e}")
+
+    async def _refresh_idea_index(self):
+        """
+        Picks up projects inserted by other worker processes.
+        Projects saved by this process are added to the index as soon as they are inserted.
+        """
+        while True:
+            # Overlap the window so projects inserted around the previous refresh are not missed.
+            since = datetime.now(timezone.utc) - timedelta(seconds=IDEA_INDEX_REFRESH_SECONDS * 2)
+            await asyncio.sleep(IDEA_INDEX_REFRESH_SECONDS)
+            try:
+                await load_idea_index(since=since)
+            except Exception as e:
+                print(f"!!! [Jobs] Could not refresh the semantic idea index: {e}")
+
+    async def _worker(self, number: int):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"!!! [Jobs] Worker {number} failed to process job {job_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _generate(self, job: models.GenerationJob, reporter: progress.JobProgress) -> Tuple[dict, RunCheckpoints]:
+        """
+        Runs the orchestrator, again from its checkpoints if it fails on a transient error.
+        Returns its output and the checkpoints, to be discarded once the Project is saved.
+        """
+        checkpoints = await RunCheckpoints.open(job)
+        attempt = 1
+        while True:
+            try:
+                output_data = await aevocore_orchestrator(job.idea, job.mode, progress=reporter, checkpoints=checkpoints)
+                return output_data, checkpoints
+            except Exception as e:
+                if attempt >= GENERATION_ATTEMPTS or not resilience.is_transient(e):
+                    raise
+                wait = resilience.backoff_seconds(attempt)
+                print(f"⚠️ [Jobs] Job {job.id} failed ({e}); resuming it from its last completed stage in {wait:.1f}s...")
+                metrics.GENERATION_RETRIES.inc(mode=job.mode)
+                reporter.event("job_retrying", attempt=attempt + 1, error=str(e))
+                attempt += 1
+                await asyncio.sleep(wait)
+
+    async def _run(self, job_id: PydanticObjectId):
+        job = await self._claim(job_id)
+        if job is None:
+            return # Finished, or running on another worker
+        lease = asyncio.create_task(self._renew_lease(job.id))
+        progress.hub.reset(job.id) # Drops what an earlier run of the job published in this process
+        reporter = progress.hub.reporter(job.id)
+        reporter.event("job_started", mode=job.mode)
+        # The job's LLM calls share the owner's concurrency limit (admission.py),
+        # and their retries are reported to the job's event stream.
+        admission.current_user.set(str(job.owner_id))
+        resilience.on_retry.set(
+            lambda agent, attempt, error: reporter.event("llm_retry", agent=agent, attempt=attempt, error=str(error))
+        )
+
+        try:
+            output_data, checkpoints = await self._generate(job, reporter)
+
+            product_plan = output_data.get('product_plan')
+            new_project = await artifacts.save_project(
+                models.Project(
+                    owner_id=job.owner_id,
+                    idea=job.idea,
+                    title=(product_plan or {}).get('product_name', "New Project"),
+                ),
+                product_plan=product_plan,
+                design_plan=output_data.get('design_plan'),
+                generated_code=output_data.get('code')
+            )
+            if idea_index.SEMANTIC_CACHE_ENABLED and product_plan:
+                idea_index.index.add(str(new_project.id), new_project.idea, product_plan)
+
+            job.status = "completed"
+            job.project_id = new_project.id
+            job.cached_stages = output_data.get('cached_stages', [])
+            job.timings = output_data.get('timings')
+        except Exception as e:
+            print(f"An error occurred during MVP generation for job {job_id}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            lease.cancel()
+
+        job.finished_at = datetime.now()
+        seconds = (job.finished_at - job.started_at).total_seconds()
+        self._job_seconds = 0.9 * self._job_seconds + 0.1 * seconds
+        metrics.GENERATIONS.inc(mode=job.mode, status=job.status)
+        metrics.GENERATION_SECONDS.observe(seconds, mode=job.mode)
+        result = await models.GenerationJob.get_motor_collection().update_one(
+            {"_id": job.id, "worker": WORKER_ID},
+            {"$set": {
+                "status": job.status, "project_id": job.project_id, "error": job.error,
+                "cached_stages": job.cached_stages, "timings": job.timings,
+                "finished_at": job.finished_at, "lease_until": None,
+            }},
+        )
+        if not result.matched_count:
+            print(f"!!! [Jobs] Job {job_id} was taken over by another worker; dropped this worker's result.")
+            return
+        if job.status == "completed":
+            try:
+                await checkpoints.discard()
+            except Exception as e:
+                print(f"!!! [Jobs] Could not delete the checkpoints of job {job_id}: {e}") # They expire on their own
+            reporter.event("job_completed", project_id=str(job.project_id))
+        else:
+            reporter.event("job_failed", error=job.error)
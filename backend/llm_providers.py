@@ -0,0 +1,75 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.4 - Pluggable LLM Providers
+#
+# Every agent and the Genesis chat talk to one LangChain chat model. This
+# module decides which one, based on LLM_PROVIDER:
+#
+#   groq   - ChatGroq (the default, what production runs on)
+#   gemini - ChatGoogleGenerativeAI (the older Gemini setup)
+#   fake   - fake_llm.FakeChatModel, a deterministic offline stand-in
+#
+# Provider libraries are imported inside the factories, so importing this
+# module stays cheap and only the selected provider is ever loaded.
+# --------------------------------------------------------------------------
+
+import os
+from typing import Any, Callable, Dict, Optional
+
+# --- Provider Configuration ---
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "50"))
+# Retries made by the provider's own client within one request. Agent calls
+# are retried again by resilience.py, so this stays low to keep one failing
+# call from turning into a dozen requests.
+LLM_CLIENT_MAX_RETRIES = int(os.getenv("LLM_CLIENT_MAX_RETRIES", "1"))
+
+
+# --- Provider Registry ---
+
+PROVIDERS: Dict[str, Callable[[], Any]] = {}
+
+def register_provider(name: str, factory: Callable[[], Any]):
+    """Registers a factory that builds the chat model for a provider name."""
+    PROVIDERS[name] = factory
+
+def create_llm(provider: Optional[str] = None):
+    """Builds the chat model for `provider` (defaults to LLM_PROVIDER)."""
+    name = provider or LLM_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}'. Available: {', '.join(sorted(PROVIDERS))}")
+    return PROVIDERS[name]()
+
+def model_name_of(llm: Any) -> Optional[str]:
+    """Returns the model name of a chat model, whichever attribute the provider uses."""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None)
+
+
+def _create_groq():
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        model_name=GROQ_MODEL,
+        temperature=LLM_TEMPERATURE,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        groq_api_key=os.getenv("GROQ_API_KEY")
+    )
+
+def _create_gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        temperature=LLM_TEMPERATURE,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        google_api_key=os.getenv("GOOGLE_API_KEY")
+    )
+
+def _create_fake():
+    from fake_llm import FakeChatModel
+    return FakeChatModel(latency=FAKE_LLM_LATENCY_MS / 1000)
+
+
+register_provider("groq", _create_groq)
+register_provider("gemini", _create_gemini)
+register_provider("fake", _create_fake)
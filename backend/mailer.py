@@ -0,0 +1,383 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.5 - Background Mail Delivery
+#
+# Verification emails used to open a new SMTP_SSL connection, log in and
+# send inside the signup request, blocking the event loop for the whole
+# TLS handshake and SMTP exchange. Now auth.send_verification_email only
+# puts the message on an in-process outbox and returns.
+#
+# A few sender tasks drain the outbox. Each one keeps its own
+# authenticated connection open between messages, sends everything that
+# is waiting as one batch, and retries failed messages with exponential
+# backoff. The blocking smtplib calls run in worker threads.
+#
+# MAIL_TRANSPORT picks where mail goes:
+#
+#   smtp    - SMTP_HOST:SMTP_PORT (Gmail by default, what production uses)
+#   console - print each message to stdout (no network at all)
+#
+# For a local SMTP server that just prints what it receives, run
+#   python mailer.py --debug-server
+# and point the backend at it with SMTP_HOST=localhost SMTP_PORT=1025
+# SMTP_SECURITY=none.
+# --------------------------------------------------------------------------
+
+import asyncio
+import os
+import random
+import smtplib
+import time
+from dataclasses import dataclass
+from email.message import Message
+from typing import Callable, Dict, List, Optional
+
+# --- Mail Configuration ---
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "smtp")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SECURITY = os.getenv("SMTP_SECURITY", "ssl") # ssl | starttls | none
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "20"))
+MAIL_SENDERS = int(os.getenv("MAIL_SENDERS", "2"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "20"))
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", "1000"))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", "5"))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "2"))
+
+
+def sender_address() -> Optional[str]:
+    return os.getenv("EMAIL_SENDER")
+
+
+# --- Transports ---
+# A transport owns one connection and is only used by one sender task at a
+# time. send_batch() blocks, and returns one error (or None) per message.
+
+class SmtpTransport:
+    """A persistent, authenticated SMTP connection that reconnects when dropped."""
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, security: str = SMTP_SECURITY,
+                 timeout: float = SMTP_TIMEOUT_SECONDS):
+        if security not in ("ssl", "starttls", "none"):
+            raise ValueError(f"Unknown SMTP_SECURITY '{security}'. Use 'ssl', 'starttls' or 'none'.")
+        self.host = host
+        self.port = port
+        self.security = security
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._server: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.security == "ssl":
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == "starttls":
+                server.starttls()
+
+        username, password = sender_address(), os.getenv("EMAIL_PASSWORD")
+        try:
+            if self.security != "none" and (not username or not password):
+                raise ValueError("Email sender or password not configured.")
+            if username and password:
+                server.login(username, password)
+        except Exception:
+            server.close()
+            raise
+
+        self.connections_opened += 1
+        print(f"--- [Mailer] Connected to {self.host}:{self.port} ({self.security}).")
+        return server
+
+    def _drop(self):
+        if self._server is not None:
+            try:
+                self._server.close()
+            except Exception:
+                pass
+            self._server = None
+
+    def send_batch(self, messages: List[Message]) -> List[Optional[Exception]]:
+        errors: List[Optional[Exception]] = []
+        for message in messages:
+            error = None
+            # A pooled connection may have been closed by the server while idle,
+            # so a disconnect gets one immediate retry on a fresh connection.
+            for attempt in range(2):
+                try:
+                    if self._server is None:
+                        self._server = self._connect()
+                    self._server.send_message(message)
+                    error = None
+                    break
+                except smtplib.SMTPServerDisconnected as e:
+                    self._drop()
+                    error = e
+                except smtplib.SMTPException as e:
+                    # SMTP replies (a subclass of OSError) leave the connection usable.
+                    error = e
+                    break
+                except OSError as e:
+                    self._drop()
+                    error = e
+                except Exception as e:
+                    error = e
+                    break
+            errors.append(error)
+        return errors
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+        self._drop()
+
+
+class ConsoleTransport:
+    """Prints messages instead of sending them."""
+    connections_opened = 0
+
+    def send_batch(self, messages: List[Message]) -> List[Optional[Exception]]:
+        for message in messages:
+            print(f"--- [Mailer] To: {message['To']} | Subject: {message['Subject']}\n{message.get_payload()}")
+        return [None] * len(messages)
+
+    def close(self):
+        pass
+
+
+TRANSPORTS: Dict[str, Callable[[], object]] = {}
+
+def register_transport(name: str, factory: Callable[[], object]):
+    """Registers a factory that builds one connection for a transport name."""
+    TRANSPORTS[name] = factory
+
+def create_transport(name: Optional[str] = None):
+    name = name or MAIL_TRANSPORT
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown MAIL_TRANSPORT '{name}'. Available: {', '.join(sorted(TRANSPORTS))}")
+    return TRANSPORTS[name]()
+
+
+register_transport("smtp", SmtpTransport)
+register_transport("console", ConsoleTransport)
+
+
+# --- Outbox ---
+
+class MailQueueFull(Exception):
+    """Raised when the outbox cannot take another message."""
+
+
+@dataclass
+class OutgoingMail:
+    message: Message
+    attempts: int = 0
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies (bad credentials, rejected recipients) will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return isinstance(error, ValueError)
+
+
+class Mailer:
+    """
+    Delivers queued messages on `senders` background tasks.
+    The tasks start on the first send(), on whichever event loop is running.
+    """
+    def __init__(self, transport: Optional[str] = None, senders: int = MAIL_SENDERS,
+                 batch_size: int = MAIL_BATCH_SIZE, queue_size: int = MAIL_QUEUE_SIZE,
+                 max_retries: int = MAIL_MAX_RETRIES, retry_base_seconds: float = MAIL_RETRY_BASE_SECONDS):
+        self.transport = transport
+        self.senders = senders
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._transports: List[object] = []
+        self._retry_handles = set()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._transports = [create_transport(self.transport) for _ in range(self.senders)]
+        self._tasks = [
+            loop.create_task(self._sender(transport)) for transport in self._transports
+        ]
+
+    def send(self, message: Message):
+        """
+        Queues a message for delivery and returns immediately.
+        Must be called from the event loop. Raises MailQueueFull if the outbox is full.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(OutgoingMail(message))
+        except asyncio.QueueFull:
+            raise MailQueueFull()
+
+    async def _sender(self, transport):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                errors = await asyncio.to_thread(transport.send_batch, [item.message for item in batch])
+            except Exception as e:
+                errors = [e] * len(batch)
+            self.batches += 1
+
+            for item, error in zip(batch, errors):
+                if error is None:
+                    self.sent += 1
+                else:
+                    self._retry_later(item, error)
+                self._queue.task_done()
+
+    def _retry_later(self, item: OutgoingMail, error: Exception):
+        item.attempts += 1
+        if item.attempts > self.max_retries or is_permanent(error):
+            self.failed += 1
+            print(f"!!! [Mailer] Giving up on email to {item.message['To']} after "
+                  f"{item.attempts} attempt(s): {type(error).__name__}: {error}")
+            return
+
+        delay = self.retry_base_seconds * 2 ** (item.attempts - 1) * random.uniform(0.5, 1.5)
+        self.retries += 1
+        print(f"!!! [Mailer] Email to {item.message['To']} failed ({type(error).__name__}: {error}). "
+              f"Retrying in {delay:.1f}s.")
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            try:
+                self._queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self._retry_later(item, MailQueueFull("The outbox is full."))
+
+        handle = self._loop.call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    async def stop(self, timeout: float = 5.0):
+        """Waits up to `timeout` seconds for queued mail, then closes every connection."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"!!! [Mailer] Stopped with {self._queue.qsize()} email(s) still queued.")
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for transport in self._transports:
+            await asyncio.to_thread(transport.close)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "waiting_retry": len(self._retry_handles),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "connections_opened": sum(getattr(t, "connections_opened", 0) for t in self._transports),
+        }
+
+
+# Process-wide outbox used by auth.send_verification_email.
+mailer = Mailer()
+
+
+# --- Local Debugging Server ---
+
+class DebugSmtpServer(asyncio.Protocol):
+    """
+    A minimal SMTP server that accepts every message and prints it.
+    Enough for smtplib with SMTP_SECURITY=none; no TLS and no AUTH.
+    """
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buffer = b""
+        self.in_data = False
+        self.envelope = []
+        self._reply(220, "autogenesis debug SMTP")
+
+    def _reply(self, code: int, text: str):
+        self.transport.write(f"{code} {text}\r\n".encode())
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        while b"\r\n" in self.buffer:
+            if self.in_data:
+                end = self.buffer.find(b"\r\n.\r\n")
+                if end == -1:
+                    return
+                body, self.buffer = self.buffer[:end], self.buffer[end + 5:]
+                self.in_data = False
+                print(f"--- [Debug SMTP] {time.strftime('%H:%M:%S')} {' '.join(self.envelope)}")
+                print(body.decode("utf-8", "replace").replace("\r\n..", "\r\n."))
+                self.envelope = []
+                self._reply(250, "OK")
+                continue
+            line, self.buffer = self.buffer.split(b"\r\n", 1)
+            self._command(line.decode("utf-8", "replace"))
+
+    def _command(self, line: str):
+        verb = line.split(" ", 1)[0].upper()
+        if verb in ("EHLO", "HELO"):
+            self._reply(250, "localhost")
+        elif verb in ("MAIL", "RCPT"):
+            self.envelope.append(line)
+            self._reply(250, "OK")
+        elif verb == "DATA":
+            self.in_data = True
+            self._reply(354, "End data with <CR><LF>.<CR><LF>")
+        elif verb == "RSET":
+            self.envelope = []
+            self._reply(250, "OK")
+        elif verb == "NOOP":
+            self._reply(250, "OK")
+        elif verb == "QUIT":
+            self._reply(221, "Bye")
+            self.transport.close()
+        else:
+            self._reply(502, "Command not implemented")
+
+
+async def run_debug_server(host: str = "localhost", port: int = 1025):
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(DebugSmtpServer, host, port)
+    print(f"▶️ [Debug SMTP] Listening on {host}:{port}. Press Ctrl+C to stop.")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AutoGenesis mail tools.")
+    parser.add_argument("--debug-server", action="store_true", help="Run a local SMTP server that prints mail")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    if args.debug_server:
+        asyncio.run(run_debug_server(args.host, args.port))
+    else:
+        parser.print_help()
@@ -1,12 +1,13 @@
 import os
+import asyncio
+import copy
 import json
 import re
+import threading
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 
-from langchain_groq import ChatGroq
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from pydantic.v1 import BaseModel, Field
 
 def load_environment():
@@ -15,13 +16,38 @@ def load_environment():
 
 load_environment()
 
-print("▶️ Initializing Large Language Model (Groq)...")
-
-llm = ChatGroq(
-    model_name="llama-3.3-70b-versatile",
-    temperature=0.2,
-    groq_api_key=os.getenv("GROQ_API_KEY")
-)
+# These modules read their settings from the environment on import,
+# so they are imported only once .env has been loaded.
+import idea_index
+import llm_providers
+import metrics
+import resilience
+import stage_cache
+
+# --- Lazy LLM Client ---
+# The client (and the LangChain/provider imports behind it) is built on
+# first use, so API workers and tests that never call an agent skip that
+# startup cost. One client is shared by the whole process.
+# Set LLM_PROVIDER=fake to run fully offline, see llm_providers.py.
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """Returns the process-wide chat model, creating it on first call."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                print(f"▶️ Initializing Large Language Model ({llm_providers.LLM_PROVIDER})...")
+                _llm = llm_providers.create_llm()
+    return _llm
+
+def set_llm(model):
+    """Replaces the process-wide chat model (used by benchmarks and load tests)."""
+    global _llm
+    with _llm_lock:
+        _llm = model
 
 class ProductPlan(BaseModel):
     """A structured product plan for a startup idea."""
@@ -41,59 +67,25 @@ class UIDesignPlan(BaseModel):
     feature_designs: list[FeatureDesign] = Field(description="A list of designs for each feature.")
 
 
-def product_agent(idea: str) -> dict:
-    """
-    Module 1: Product Agent
-    Takes a startup idea and creates a structured product plan.
-    """
-    print("▶️ [Product Agent] Activated. Analyzing idea...")
-    prompt = PromptTemplate(
-        template="""You are a world-class Product Manager. Your task is to analyze the following startup idea and create a concise product plan.
+# --- Agent Prompt Templates ---
+# Kept at module level so the stage cache can key results on the exact template text.
+
+PRODUCT_PROMPT_TEMPLATE = """You are a world-class Product Manager. Your task is to analyze the following startup idea and create a concise product plan.
         The plan must be structured, realistic, and focused on a minimal viable product.
 
         Startup Idea: "{idea}"
-        """,
-        input_variables=["idea"],
-    )
-    structured_llm = llm.with_structured_output(ProductPlan)
-    chain = prompt | structured_llm
-    product_plan_obj = chain.invoke({"idea": idea})
-    print("✅ [Product Agent] Product plan generated.")
-    return product_plan_obj.dict()
+        """
 
-def design_agent(mvp_features: list[str]) -> dict:
-    """
-    Module 2: Design Agent
-    Takes a list of features and suggests a UI layout for a Streamlit app.
-    """
-    print("▶️ [Design Agent] Activated. Designing UI structure...")
-    prompt = PromptTemplate(
-        template="""You are an expert UI/UX Designer specializing in rapid prototyping with Streamlit.
+DESIGN_PROMPT_TEMPLATE = """You are an expert UI/UX Designer specializing in rapid prototyping with Streamlit.
         Based on the following list of features, design a simple UI structure.
 
         MVP Features:
         {mvp_features_str}
 
         Generate a UI design plan based on these features.
-        """,
-        input_variables=["mvp_features_str"],
-    )
-    structured_llm = llm.with_structured_output(UIDesignPlan)
-    chain = prompt | structured_llm
-    design_plan_obj = chain.invoke({"mvp_features_str": json.dumps(mvp_features)})
-    print("✅ [Design Agent] UI design plan generated.")
-    return design_plan_obj.dict()
-
-def engineering_agent(product_plan: dict, design_plan: dict) -> str:
-    """
-    Module 3: Engineering Agent
-    Takes the product and design plans and generates the complete, runnable Streamlit code.
-    """
-    print("▶️ [Engineering Agent] Activated. Writing Streamlit code...")
-    
+        """
 
-    prompt = PromptTemplate.from_template(
-        """You are an expert Senior Python Developer specializing in creating robust, single-file Streamlit applications.
+ENGINEERING_PROMPT_TEMPLATE = """You are an expert Senior Python Developer specializing in creating robust, single-file Streamlit applications.
         Your task is to generate the complete Python code for a Streamlit app based on the provided Product and Design plans.
 
         Product Plan:
@@ -114,23 +106,299 @@ def engineering_agent(product_plan: dict, design_plan: dict) -> str:
         9.  **IMPORTANT STREAMLIT RULE:** If you use `st.form`, you MUST use `st.form_submit_button` to submit the form. Do NOT use `st.button` inside a form.
         10. Re-evaluate each and every word of code before generating the output.
         """
+
+FEATURE_DESIGN_PROMPT_TEMPLATE = """You are an expert UI/UX Designer specializing in rapid prototyping with Streamlit.
+        Design the UI for ONE feature of a Streamlit app. List the specific Streamlit components it needs.
+
+        Feature:
+        {feature}
+        """
+
+FEATURE_CODE_PROMPT_TEMPLATE = """You are an expert Senior Python Developer specializing in Streamlit.
+        Your task is to write the code for ONE feature of a larger, single-file Streamlit application.
+
+        Product Plan:
+        {product_plan_str}
+
+        Feature Design:
+        {feature_design_str}
+
+        **CRITICAL INSTRUCTIONS:**
+        1.  Your output MUST be ONLY raw Python code. Do NOT include explanations or markdown formatting like ```python.
+        2.  Put all imports at the top, then define exactly one function: `def {function_name}():` that renders the whole feature.
+        3.  Do NOT call the function, do NOT call `st.set_page_config` and do NOT add a page title; the surrounding app does that.
+        4.  Use `st.session_state` for all data, and prefix every session_state key with `{key_prefix}` so it cannot clash with other features. Check if a key exists before accessing it.
+        5.  For data handling and display, use the `pandas` library and show tables with `st.dataframe`.
+        6.  The Feature Design may suggest Streamlit components that DO NOT EXIST (e.g., 'st.calendar'). Replace them with valid, working alternatives.
+        7.  Give every widget a unique `key` argument that starts with `{key_prefix}`.
+        8.  **IMPORTANT STREAMLIT RULE:** If you use `st.form`, you MUST use `st.form_submit_button` to submit the form. Do NOT use `st.button` inside a form.
+        """
+
+async def aproduct_agent(idea: str) -> dict:
+    """
+    Module 1: Product Agent
+    Takes a startup idea and creates a structured product plan.
+    """
+    from langchain_core.prompts import PromptTemplate
+
+    print("▶️ [Product Agent] Activated. Analyzing idea...")
+    prompt = PromptTemplate(
+        template=PRODUCT_PROMPT_TEMPLATE,
+        input_variables=["idea"],
+    )
+    structured_llm = get_llm().with_structured_output(ProductPlan)
+    chain = prompt | structured_llm
+    product_plan_obj = await resilience.caller.call(
+        "product", lambda: chain.ainvoke({"idea": idea}, config=metrics.llm_config("product"))
+    )
+    print("✅ [Product Agent] Product plan generated.")
+    return product_plan_obj.dict()
+
+# --- Streamed Product Plan ("pipelined" mode) ---
+# The design stage only needs mvp_features. In pipelined mode the product
+# plan is requested with mvp_features as its first field and streamed, so
+# the design stage can start once that list is closed, while the model is
+# still writing the name, tagline and audience.
+
+def _features_first(schema: dict) -> dict:
+    properties = schema["properties"]
+    return {**schema, "properties": {"mvp_features": properties["mvp_features"], **properties}}
+
+PRODUCT_PLAN_STREAM_SCHEMA = _features_first(ProductPlan.schema())
+
+def closed_feature_list(partial_plan: dict):
+    """The mvp_features of a partial product plan once the model has moved past them, else None."""
+    keys = list(partial_plan)
+    if "mvp_features" not in keys or keys[-1] == "mvp_features":
+        return None
+    features = partial_plan["mvp_features"]
+    return list(features) if isinstance(features, list) else None
+
+async def aproduct_agent_streaming(idea: str, on_features) -> dict:
+    """
+    Module 1, streamed: same prompt and result as aproduct_agent.
+    Calls `on_features(mvp_features)` as soon as the feature list is complete,
+    at the latest when the whole plan is.
+    """
+    from langchain_core.prompts import PromptTemplate
+
+    print("▶️ [Product Agent] Activated. Analyzing idea (streaming)...")
+    prompt = PromptTemplate(
+        template=PRODUCT_PROMPT_TEMPLATE,
+        input_variables=["idea"],
+    )
+    chain = prompt | get_llm().with_structured_output(PRODUCT_PLAN_STREAM_SCHEMA)
+    announced = False
+
+    async def stream_plan():
+        nonlocal announced
+        partial_plan = {}
+        async for partial_plan in chain.astream({"idea": idea}, config=metrics.llm_config("product")):
+            if not announced and isinstance(partial_plan, dict):
+                features = closed_feature_list(partial_plan)
+                if features is not None:
+                    print("▶️ [Product Agent] Feature list complete, handing it to the Design Agent early.")
+                    on_features(features)
+                    announced = True
+        return partial_plan
+
+    # A retry after the features were announced is fine: the orchestrator
+    # redoes the design if the final feature list differs.
+    partial_plan = await resilience.caller.call("product", stream_plan, hedge=False)
+    product_plan = ProductPlan(**(partial_plan or {})).dict()
+    if not announced:
+        on_features(product_plan["mvp_features"])
+    print("✅ [Product Agent] Product plan generated.")
+    return product_plan
+
+async def adesign_agent(mvp_features: list[str]) -> dict:
+    """
+    Module 2: Design Agent
+    Takes a list of features and suggests a UI layout for a Streamlit app.
+    """
+    from langchain_core.prompts import PromptTemplate
+
+    print("▶️ [Design Agent] Activated. Designing UI structure...")
+    prompt = PromptTemplate(
+        template=DESIGN_PROMPT_TEMPLATE,
+        input_variables=["mvp_features_str"],
     )
+    structured_llm = get_llm().with_structured_output(UIDesignPlan)
+    chain = prompt | structured_llm
+    design_plan_obj = await resilience.caller.call("design", lambda: chain.ainvoke(
+        {"mvp_features_str": json.dumps(mvp_features)}, config=metrics.llm_config("design")
+    ))
+    print("✅ [Design Agent] UI design plan generated.")
+    return design_plan_obj.dict()
+
+async def aengineering_agent(product_plan: dict, design_plan: dict, on_token=None) -> str:
+    """
+    Module 3: Engineering Agent
+    Takes the product and design plans and generates the complete, runnable Streamlit code.
+    With `on_token`, the code is streamed and each piece is passed to it as it arrives;
+    if the call is retried, the new attempt streams the code again from the start.
+    """
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    print("▶️ [Engineering Agent] Activated. Writing Streamlit code...")
+    
+
+    prompt = PromptTemplate.from_template(ENGINEERING_PROMPT_TEMPLATE)
     
     output_parser = StrOutputParser()
-    chain = prompt | llm | output_parser
+    chain = prompt | get_llm() | output_parser
     
-    code = chain.invoke({
+    inputs = {
         "product_plan_str": json.dumps(product_plan),
         "design_plan_str": json.dumps(design_plan)
-    })
+    }
+
+    async def write_code() -> str:
+        if on_token is None:
+            return await chain.ainvoke(inputs, config=metrics.llm_config("engineering"))
+        parts = []
+        async for token in chain.astream(inputs, config=metrics.llm_config("engineering")):
+            parts.append(token)
+            on_token(token)
+        return "".join(parts)
+
+    code = await resilience.caller.call("engineering", write_code, hedge=on_token is None)
     
+    print("✅ [Engineering Agent] Streamlit code generated and cleaned.")
+    return strip_code_fences(code)
+
+def strip_code_fences(code: str) -> str:
+    """Removes the markdown fences a model sometimes wraps around code."""
     match = re.search(r"```(python)?(.*)```", code, re.DOTALL)
     if match:
         code = match.group(2).strip()
-    
-    print("✅ [Engineering Agent] Streamlit code generated and cleaned.")
     return code.strip()
 
+# --- Fan-out Agents ---
+# In "fanout" mode every feature is designed and coded by its own, smaller
+# LLM call. The calls run concurrently, and merge_feature_fragments() then
+# assembles one Streamlit file without any further LLM involvement.
+
+def feature_function_name(index: int) -> str:
+    return f"render_feature_{index + 1}"
+
+def feature_layout(mvp_features: list[str]) -> str:
+    """Picks the app layout for fan-out mode: sidebar navigation once there are many features."""
+    return "sidebar" if len(mvp_features) > 3 else "top-down"
+
+async def afeature_design_agent(feature: str) -> dict:
+    """
+    Module 2b: Feature Design Agent
+    Designs the Streamlit components for a single feature.
+    """
+    from langchain_core.prompts import PromptTemplate
+
+    prompt = PromptTemplate(
+        template=FEATURE_DESIGN_PROMPT_TEMPLATE,
+        input_variables=["feature"],
+    )
+    structured_llm = get_llm().with_structured_output(FeatureDesign)
+    chain = prompt | structured_llm
+    feature_design_obj = await resilience.caller.call(
+        "feature_design", lambda: chain.ainvoke({"feature": feature}, config=metrics.llm_config("feature_design"))
+    )
+    feature_design = feature_design_obj.dict()
+    # Keep the original wording so the merged app's navigation matches the product plan.
+    feature_design["feature"] = feature
+    return feature_design
+
+async def afeature_code_agent(product_plan: dict, feature_design: dict, index: int) -> str:
+    """
+    Module 3b: Feature Code Agent
+    Writes one render function for a single feature.
+    """
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    prompt = PromptTemplate.from_template(FEATURE_CODE_PROMPT_TEMPLATE)
+    chain = prompt | get_llm() | StrOutputParser()
+    code = await resilience.caller.call("feature_code", lambda: chain.ainvoke({
+        "product_plan_str": json.dumps(product_plan),
+        "feature_design_str": json.dumps(feature_design),
+        "function_name": feature_function_name(index),
+        "key_prefix": f"f{index + 1}_",
+    }, config=metrics.llm_config("feature_code")))
+    return strip_code_fences(code)
+
+_IMPORT_LINE = re.compile(r"^(import|from)\s+\S+")
+
+def merge_feature_fragments(product_plan: dict, design_plan: dict, fragments: list[str]) -> str:
+    """
+    Module 3c: Merge Step
+    Assembles the per-feature fragments into one Streamlit app.
+    Deterministic: the same fragments always produce the same file.
+    """
+    imports = {"import streamlit as st"}
+    bodies = []
+    for fragment in fragments:
+        body_lines = []
+        for line in fragment.splitlines():
+            if _IMPORT_LINE.match(line):
+                imports.add(line.strip())
+            else:
+                body_lines.append(line)
+        bodies.append("\n".join(body_lines).strip())
+
+    ordered_imports = ["import streamlit as st"] + sorted(imports - {"import streamlit as st"})
+    features = [design["feature"] for design in design_plan["feature_designs"]]
+
+    lines = ordered_imports + [""]
+    lines.append(f"st.set_page_config(page_title={json.dumps(product_plan['product_name'])}, layout=\"wide\")")
+    lines += ["", ""]
+    for body in bodies:
+        lines += [body, "", ""]
+
+    lines.append(f"FEATURES = {json.dumps(features, indent=4)}")
+    lines.append(f"RENDERERS = [{', '.join(feature_function_name(i) for i in range(len(features)))}]")
+    lines += ["", ""]
+    lines.append("def main():")
+    lines.append(f"    st.title({json.dumps(product_plan['product_name'])})")
+    lines.append(f"    st.caption({json.dumps(product_plan['tagline'])})")
+    if design_plan["app_layout"] == "sidebar":
+        lines.append("    choice = st.sidebar.radio(\"Features\", FEATURES)")
+        lines.append("    RENDERERS[FEATURES.index(choice)]()")
+    else:
+        lines.append("    for tab, render in zip(st.tabs(FEATURES), RENDERERS):")
+        lines.append("        with tab:")
+        lines.append("            render()")
+    lines += ["", ""]
+    lines.append("if __name__ == \"__main__\":")
+    lines.append("    main()")
+    return "\n".join(lines) + "\n"
+
+# --- Synchronous API ---
+# The agents are async-first. These wrappers keep the original blocking
+# functions working for scripts and the test block below. They run the
+# coroutines on one persistent background loop, so the LLM client's async
+# connection pool is never shared between short-lived event loops.
+
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+def run_sync(coro):
+    """Runs a coroutine to completion from synchronous code."""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="agents-sync-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
+
+def product_agent(idea: str) -> dict:
+    return run_sync(aproduct_agent(idea))
+
+def design_agent(mvp_features: list[str]) -> dict:
+    return run_sync(adesign_agent(mvp_features))
+
+def engineering_agent(product_plan: dict, design_plan: dict) -> str:
+    return run_sync(aengineering_agent(product_plan, design_plan))
+
 # --- Merger Agent (RESTORED) ---
 def merger_agent(product_plan: dict, design_plan: dict, code: str, idea: str):
     """
@@ -164,34 +432,279 @@ def merger_agent(product_plan: dict, design_plan: dict, code: str, idea: str):
     print(f"✅ [Merger Agent] Project assembled in: {output_dir}")
     return output_dir
 
+# --- Stage Cache Helper ---
+async def run_cached_stage(stage: str, template: str, inputs: dict, compute):
+    """
+    Runs one agent stage through the stage cache.
+    `compute` is a coroutine function called on a cache miss.
+    Returns (result, from_cache).
+    """
+    llm = get_llm()
+    result, hit = await stage_cache.cache.aget_or_compute(
+        stage, template,
+        llm_providers.model_name_of(llm), getattr(llm, "temperature", None),
+        inputs, compute
+    )
+    metrics.STAGE_CACHE.inc(stage=stage, result="hit" if hit else "miss")
+    return result, hit
+
+def find_similar_idea(idea: str):
+    """
+    Looks up a past idea that means the same thing as this one.
+    Returns an idea_index.IdeaMatch, or None if nothing is close enough.
+    """
+    if not idea_index.SEMANTIC_CACHE_ENABLED:
+        return None
+    return idea_index.index.nearest(idea)
+
 # --- Evocore Orchestrator (Modified for API) ---
-def evocore_orchestrator(idea: str) -> dict:
+GENERATION_MODES = ("monolithic", "fanout", "pipelined")
+
+async def _design_stage(mvp_features: list[str], mode: str, cached_stages: list) -> dict:
+    if mode == "monolithic":
+        design_plan, hit = await run_cached_stage(
+            "design", DESIGN_PROMPT_TEMPLATE, {"mvp_features": mvp_features},
+            lambda: adesign_agent(mvp_features)
+        )
+        if hit:
+            cached_stages.append("design")
+        return design_plan
+
+    print(f"▶️ [Design Agent] Fan-out: designing {len(mvp_features)} features concurrently...")
+    results = await asyncio.gather(*[
+        run_cached_stage(
+            "feature_design", FEATURE_DESIGN_PROMPT_TEMPLATE, {"feature": feature},
+            lambda feature=feature: afeature_design_agent(feature)
+        )
+        for feature in mvp_features
+    ])
+    if results and all(hit for _, hit in results):
+        cached_stages.append("design")
+    print("✅ [Design Agent] UI design plan generated.")
+    return {
+        "app_layout": feature_layout(mvp_features),
+        "feature_designs": [feature_design for feature_design, _ in results],
+    }
+
+async def _engineering_stage(product_plan: dict, design_plan: dict, mode: str, cached_stages: list,
+                             on_token=None) -> str:
+    if mode == "monolithic":
+        streamlit_code, hit = await run_cached_stage(
+            "engineering", ENGINEERING_PROMPT_TEMPLATE,
+            {"product_plan": product_plan, "design_plan": design_plan},
+            lambda: aengineering_agent(product_plan, design_plan, on_token)
+        )
+        if hit:
+            cached_stages.append("engineering")
+        return streamlit_code
+
+    feature_designs = design_plan["feature_designs"]
+    print(f"▶️ [Engineering Agent] Fan-out: writing {len(feature_designs)} feature fragments concurrently...")
+    results = await asyncio.gather(*[
+        run_cached_stage(
+            "feature_code", FEATURE_CODE_PROMPT_TEMPLATE,
+            {"product_plan": product_plan, "feature_design": feature_design, "index": index},
+            lambda feature_design=feature_design, index=index: afeature_code_agent(product_plan, feature_design, index)
+        )
+        for index, feature_design in enumerate(feature_designs)
+    ])
+    if results and all(hit for _, hit in results):
+        cached_stages.append("engineering")
+    streamlit_code = merge_feature_fragments(product_plan, design_plan, [fragment for fragment, _ in results])
+    print("✅ [Engineering Agent] Feature fragments merged into one Streamlit app.")
+    return streamlit_code
+
+async def _pipelined_stages(product_stage, features_ready: asyncio.Future, cached_stages: list, timings: dict,
+                            report, on_product):
+    """
+    Runs the product stage and starts the design stage as soon as `features_ready`
+    holds the feature list (or the product stage is done, e.g. on a cache hit).
+    If the finished plan's features differ from the ones design started on,
+    the design is thrown away and redone, so the result is always what the
+    sequential pipeline would have produced.
+    `on_product(product_plan, hit)` is called as soon as the product stage is done.
+    Returns (product_plan, product_hit, design_plan).
+    """
+    stage_start = time.perf_counter()
+    product_task = asyncio.create_task(product_stage)
+    try:
+        await asyncio.wait([product_task, features_ready], return_when=asyncio.FIRST_COMPLETED)
+        if features_ready.done():
+            mvp_features = features_ready.result()
+        else:
+            mvp_features = product_task.result()[0]["mvp_features"] # Raises if the product stage failed
+    except BaseException:
+        product_task.cancel()
+        raise
+
+    design_start = time.perf_counter()
+    report.event("stage_started", stage="design")
+    design_task = asyncio.create_task(_design_stage(mvp_features, "monolithic", cached_stages))
+    try:
+        product_plan, hit = await product_task
+    except BaseException:
+        design_task.cancel()
+        raise
+    timings["product"] = round(time.perf_counter() - stage_start, 3)
+    on_product(product_plan, hit)
+
+    if product_plan["mvp_features"] != mvp_features:
+        print("⚠️ [Design Agent] The final feature list differs from the streamed one; designing again.")
+        design_task.cancel()
+        design_start = time.perf_counter()
+        design_task = asyncio.create_task(_design_stage(product_plan["mvp_features"], "monolithic", cached_stages))
+    design_plan = await design_task
+    timings["design"] = round(time.perf_counter() - design_start, 3)
+    return product_plan, hit, design_plan
+
+class NullProgress:
+    """The progress reporter used when nobody is listening (see progress.JobProgress)."""
+    def event(self, event_type: str, **fields):
+        pass
+
+    def code_token(self, text: str):
+        pass
+
+async def _checkpointed_product(checkpoints, product_stage):
+    """The product stage, unless `checkpoints` already has its result. Returns (product_plan, from_cache)."""
+    product_plan = await checkpoints.load("product")
+    if product_plan is not None:
+        product_stage.close() # Never started
+        return product_plan, True
+    product_plan, hit = await product_stage
+    await checkpoints.save("product", product_plan)
+    return product_plan, hit
+
+async def aevocore_orchestrator(idea: str, mode: str = "monolithic", progress=None, checkpoints=None) -> dict:
     """
     The core orchestrator.
     NOW RETURNS A DICTIONARY of the results for the API to save to MongoDB.
+    `mode` is "monolithic" (one design call, one code call), "fanout"
+    (one design call and one code call per feature, run concurrently, then merged)
+    or "pipelined" (monolithic, but design starts while the product plan is still streaming).
+    Stages whose output came from the stage cache are listed under "cached_stages",
+    and "timings" holds the wall time of each stage in seconds.
+    If the product plan was reused from a similar past idea, "similar_idea" describes it.
+    `progress` receives stage_started / stage_finished events (with the stage's
+    output) and, for the monolithic and pipelined modes, the code as it is written.
+    Each completed stage is saved to `checkpoints` (a resilience.Checkpoints);
+    stages already found there are not run again and count as cached, so a
+    failed generation retried with the same checkpoints resumes where it stopped.
     """
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"Unknown generation mode: {mode}")
+
     print("\n🚀 --- AutoGenesis Initializing --- 🚀")
-    print(f"Received Idea: \"{idea}\"")
+    print(f"Received Idea: \"{idea}\" (mode: {mode})")
     
     start_time = datetime.now()
-    
-    product_plan = product_agent(idea)
-    design_plan = design_agent(product_plan['mvp_features'])
-    streamlit_code = engineering_agent(product_plan, design_plan)
+    cached_stages = []
+    timings = {}
+    similar = None
+    report = progress or NullProgress()
+    checkpoints = checkpoints or resilience.Checkpoints()
+    features_ready = asyncio.get_running_loop().create_future()
+
+    def announce_features(mvp_features: list[str]):
+        if not features_ready.done():
+            features_ready.set_result(mvp_features)
+
+    async def plan_product():
+        nonlocal similar
+        # The similarity search is a large matrix product; keep it off the event loop.
+        similar = await asyncio.to_thread(find_similar_idea, idea)
+        if similar and similar.payload:
+            print(f"♻️ [Product Agent] Reusing the plan of a similar idea: \"{similar.idea}\" (similarity {similar.score:.2f})")
+            metrics.STAGE_CACHE.inc(stage="product", result="similar")
+            return copy.deepcopy(similar.payload)
+        similar = None
+        if mode == "pipelined":
+            return await aproduct_agent_streaming(idea, announce_features)
+        return await aproduct_agent(idea)
+
+    def stage_finished(stage: str, artifact):
+        report.event("stage_finished", stage=stage, cached=stage in cached_stages,
+                     seconds=timings[stage], artifact=artifact)
+
+    def product_finished(product_plan: dict, hit: bool):
+        if hit or similar:
+            cached_stages.insert(0, "product")
+        stage_finished("product", product_plan)
+
+    report.event("stage_started", stage="product")
+    product_stage = _checkpointed_product(
+        checkpoints, run_cached_stage(
+            "product", PRODUCT_PROMPT_TEMPLATE, {"idea": stage_cache.normalize_idea(idea)}, plan_product
+        )
+    )
+    design_plan = await checkpoints.load("design")
+    if mode == "pipelined" and design_plan is None:
+        product_plan, hit, design_plan = await _pipelined_stages(
+            product_stage, features_ready, cached_stages, timings, report, product_finished
+        )
+        await checkpoints.save("design", design_plan)
+    else:
+        stage_start = time.perf_counter()
+        product_plan, hit = await product_stage
+        timings["product"] = round(time.perf_counter() - stage_start, 3)
+        product_finished(product_plan, hit)
+
+        report.event("stage_started", stage="design")
+        stage_start = time.perf_counter()
+        if design_plan is None:
+            design_plan = await _design_stage(product_plan['mvp_features'], mode, cached_stages)
+            await checkpoints.save("design", design_plan)
+        else:
+            cached_stages.append("design")
+        timings["design"] = round(time.perf_counter() - stage_start, 3)
+    stage_finished("design", design_plan)
+
+    report.event("stage_started", stage="engineering")
+    stage_start = time.perf_counter()
+    streamlit_code = await checkpoints.load("engineering")
+    if streamlit_code is None:
+        streamlit_code = await _engineering_stage(
+            product_plan, design_plan, "monolithic" if mode == "pipelined" else mode, cached_stages,
+            on_token=report.code_token if progress else None
+        )
+        await checkpoints.save("engineering", streamlit_code)
+    else:
+        cached_stages.append("engineering")
+    timings["engineering"] = round(time.perf_counter() - stage_start, 3)
+    stage_finished("engineering", streamlit_code)
+
+    for stage in ("product", "design", "engineering"):
+        metrics.STAGE_SECONDS.observe(
+            timings[stage], stage=stage, mode=mode, cached="true" if stage in cached_stages else "false"
+        )
     
     end_time = datetime.now()
     duration = end_time - start_time
+    timings["total"] = round(duration.total_seconds(), 3)
     
     print(f"\n🏁 --- AutoGenesis Task Complete --- 🏁")
     print(f"⏱️ Total time taken: {duration.total_seconds():.2f} seconds.")
+    print(f"⏱️ Stage timings: product {timings['product']:.2f}s, design {timings['design']:.2f}s, engineering {timings['engineering']:.2f}s")
+    if cached_stages:
+        print(f"♻️ Stages served from cache: {', '.join(cached_stages)}")
     
     # Return the data as a dictionary for the API
     return {
         "product_plan": product_plan,
         "design_plan": design_plan,
-        "code": streamlit_code
+        "code": streamlit_code,
+        "mode": mode,
+        "timings": timings,
+        "cached_stages": cached_stages,
+        "similar_idea": {
+            "project_id": similar.key, "idea": similar.idea, "score": similar.score
+        } if similar else None
     }
 
+def evocore_orchestrator(idea: str, mode: str = "monolithic") -> dict:
+    """Synchronous wrapper around aevocore_orchestrator."""
+    return run_sync(aevocore_orchestrator(idea, mode))
+
 # --- Test Block (Modified) ---
 if __name__ == "__main__":
     print("🧪 Running AutoGenesis in direct test mode...")
@@ -0,0 +1,344 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.10 - Metrics
+#
+# Counters and histograms for the generation pipeline and the API,
+# served in the Prometheus text format on GET /metrics.
+#
+#   - Every LLM call is measured by a LangChain callback handler: wall
+#     time, time to first token (streamed calls only), prompt and
+#     completion tokens, retries and errors, labelled by agent.
+#   - The orchestrator records each stage's wall time and stage cache
+#     results; jobs.py records whole generations.
+#   - RequestMetricsMiddleware times every HTTP request per route template.
+#   - Components with a stats() method (password hasher, mailer, caches,
+#     chat store) are read at scrape time.
+#
+# Self-contained on purpose: no prometheus_client dependency, and LangChain
+# is only imported once an agent actually runs.
+# --------------------------------------------------------------------------
+
+import bisect
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# --- Metrics Configuration ---
+# If set, GET /metrics requires "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield from self._samples(key, value)
+
+    def _samples(self, key: Tuple[str, ...], value: Any) -> Iterator[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not yet cumulative) counts, the +Inf bucket last; then sum.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[0]) if state else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimates a quantile by interpolating inside its bucket, like histogram_quantile()."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            counts = list(state[0]) if state else []
+        total = sum(counts)
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1] # Beyond the largest bucket
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def _samples(self, key: Tuple[str, ...], value: Any) -> Iterator[str]:
+        counts, total = value
+        names = self.labelnames + ("le",)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            yield f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+        yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    """All metrics of the process, plus the stats() sources read at scrape time."""
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._stats: List[Tuple[str, Callable[[], dict]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, component: str, stats: Callable[[], dict]):
+        """Exports every numeric value of `stats()` as autogenesis_<component>_<key>."""
+        self._stats.append((component, stats))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for component, stats in self._stats:
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"!!! [Metrics] Could not read the stats of {component}: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    name = _NAME_RE.sub("_", f"autogenesis_{component}_{key}")
+                    lines.append(f"# TYPE {name} untyped")
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# --- Process-wide Registry and Metrics ---
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "autogenesis_http_request_duration_seconds",
+    "Time from receiving an HTTP request to sending the last byte of its response.",
+    ("method", "route", "status"),
+)
+LLM_CALL_SECONDS = registry.histogram(
+    "autogenesis_llm_call_duration_seconds", "Wall time of one LLM call.", ("agent",),
+)
+LLM_TTFT_SECONDS = registry.histogram(
+    "autogenesis_llm_time_to_first_token_seconds", "Time until a streamed LLM call produced its first token.", ("agent",),
+)
+LLM_TOKENS = registry.counter(
+    "autogenesis_llm_tokens_total", "Tokens reported by the LLM provider, by kind (prompt or completion).",
+    ("agent", "kind"),
+)
+LLM_RETRIES = registry.counter(
+    "autogenesis_llm_retries_total", "LLM calls retried after a failure.", ("agent",),
+)
+LLM_HEDGES = registry.counter(
+    "autogenesis_llm_hedges_total", "Hedged LLM calls, by which request answered first (original or hedge).",
+    ("agent", "winner"),
+)
+LLM_ERRORS = registry.counter(
+    "autogenesis_llm_errors_total", "LLM calls that failed.", ("agent",),
+)
+STAGE_SECONDS = registry.histogram(
+    "autogenesis_stage_duration_seconds", "Wall time of one orchestrator stage; cached=\"true\" if it was served from a cache.",
+    ("stage", "mode", "cached"),
+)
+STAGE_CACHE = registry.counter(
+    "autogenesis_stage_cache_total", "Agent stage lookups by result: hit, miss, or similar (semantic reuse).",
+    ("stage", "result"),
+)
+GENERATIONS = registry.counter(
+    "autogenesis_generations_total", "Finished generation jobs by status.", ("mode", "status"),
+)
+GENERATION_RETRIES = registry.counter(
+    "autogenesis_generation_retries_total", "Generation jobs run again from their checkpoints after a transient failure.",
+    ("mode",),
+)
+GENERATION_SECONDS = registry.histogram(
+    "autogenesis_generation_duration_seconds", "Wall time of a whole generation job.", ("mode",),
+)
+ADMISSION_REJECTIONS = registry.counter(
+    "autogenesis_admission_rejections_total",
+    "Requests turned away with 429, by kind (chat or generate) and reason (user_rate, global_rate, queue_full).",
+    ("kind", "reason"),
+)
+LLM_QUEUE_SECONDS = registry.histogram(
+    "autogenesis_llm_queue_wait_seconds", "Time an LLM call waited for a concurrency slot.", ("agent",),
+)
+
+
+# --- LLM Instrumentation ---
+
+_handler = None
+_handler_lock = threading.Lock()
+
+
+def _usage(response: Any) -> Tuple[int, int]:
+    """(prompt, completion) tokens of an LLMResult; 0 when the provider did not report them."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def _create_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMMetricsHandler(BaseCallbackHandler):
+        """Times every LLM run and counts its tokens, labelled by the `agent` run metadata."""
+        run_inline = True # Cheap enough to run on the event loop
+
+        def __init__(self):
+            self._runs: Dict[Any, list] = {} # run_id -> [agent, start, first token seen]
+
+        def _start(self, run_id, metadata):
+            self._runs[run_id] = [(metadata or {}).get("agent", "unknown"), time.perf_counter(), False]
+
+        def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+            self._start(run_id, metadata)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+            self._start(run_id, metadata)
+
+        def on_llm_new_token(self, token, *, run_id, **kwargs):
+            run = self._runs.get(run_id)
+            if run and not run[2]:
+                run[2] = True
+                LLM_TTFT_SECONDS.observe(time.perf_counter() - run[1], agent=run[0])
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            run = self._runs.pop(run_id, None)
+            if not run:
+                return
+            LLM_CALL_SECONDS.observe(time.perf_counter() - run[1], agent=run[0])
+            prompt_tokens, completion_tokens = _usage(response)
+            LLM_TOKENS.inc(prompt_tokens, agent=run[0], kind="prompt")
+            LLM_TOKENS.inc(completion_tokens, agent=run[0], kind="completion")
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            run = self._runs.pop(run_id, None)
+            if run:
+                LLM_ERRORS.inc(agent=run[0])
+
+        def on_retry(self, retry_state, *, run_id, metadata=None, **kwargs):
+            LLM_RETRIES.inc(agent=(metadata or {}).get("agent", "unknown"))
+
+    return LLMMetricsHandler()
+
+
+def llm_config(agent: str) -> dict:
+    """The RunnableConfig that makes a chain's LLM calls show up in the metrics as `agent`."""
+    global _handler
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                _handler = _create_handler()
+    return {"callbacks": [_handler], "metadata": {"agent": agent}}
+
+
+# --- HTTP Instrumentation ---
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware (streamed responses pass straight through) that
+    times each request under its route template, e.g. /api/jobs/{job_id}.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, method=scope["method"], route=route, status=status,
+            )
@@ -0,0 +1,101 @@
+# --------------------------------------------------------------------------
+# AutoGenesis Migration: Split Project Artifacts
+#
+# Moves product_plan, design_plan and generated_code out of existing
+# projects documents into compressed ProjectArtifact documents (see
+# artifacts.py), then removes them from the projects.
+#
+# Safe to re-run and to interrupt: a project is only unset after its
+# artifact exists, and projects that already have an artifact just get
+# their leftover inline fields removed.
+#
+# Usage (from the backend/ directory):
+#   python migrations/split_project_artifacts.py --dry-run
+#   python migrations/split_project_artifacts.py --batch-size 200
+# --------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo.errors import BulkWriteError
+
+import artifacts
+import database
+import models
+
+INLINE_FILTER = {"$or": [{name: {"$exists": True}} for name in artifacts.PARTS]}
+
+
+async def migrate(batch_size: int = 200, dry_run: bool = False) -> dict:
+    """
+    Migrates every project that still has inline parts, batch by batch.
+    Returns counts of migrated projects and artifacts created.
+    """
+    projects = models.Project.get_motor_collection()
+    artifact_collection = models.ProjectArtifact.get_motor_collection()
+    projection = {"owner_id": 1, **{name: 1 for name in artifacts.PARTS}}
+
+    remaining = await projects.count_documents(INLINE_FILTER)
+    print(f"▶️ [Migration] {remaining} project(s) store their plans and code inline.")
+    if dry_run or remaining == 0:
+        return {"pending": remaining, "migrated": 0, "artifacts_created": 0}
+
+    migrated = created = 0
+    last_id = None
+    while True:
+        query = dict(INLINE_FILTER)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = await projects.find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+
+        existing = {
+            doc["project_id"] async for doc in artifact_collection.find(
+                {"project_id": {"$in": [d["_id"] for d in docs]}}, {"project_id": 1}
+            )
+        }
+        new_artifacts = [
+            artifacts.build_artifact(
+                doc["_id"], doc["owner_id"],
+                doc.get("product_plan"), doc.get("design_plan"), doc.get("generated_code"),
+            )
+            for doc in docs if doc["_id"] not in existing
+        ]
+        if new_artifacts:
+            try:
+                await models.ProjectArtifact.insert_many(new_artifacts, ordered=False)
+                created += len(new_artifacts)
+            except BulkWriteError as e:
+                # Another run inserted some of them first (unique project_id); those are fine.
+                created += e.details.get("nInserted", 0)
+                if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+
+        await projects.update_many(
+            {"_id": {"$in": [d["_id"] for d in docs]}},
+            {"$unset": {name: "" for name in artifacts.PARTS}},
+        )
+        migrated += len(docs)
+        print(f"--- [Migration] {migrated}/{remaining} project(s) migrated.")
+
+    print(f"✅ [Migration] Done: {migrated} project(s) migrated, {created} artifact(s) created.")
+    return {"pending": remaining, "migrated": migrated, "artifacts_created": created}
+
+
+async def main(args):
+    database.VERIFY_QUERY_PLANS = False
+    await database.init_db()
+    await migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move project plans and code into project_artifacts.")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the projects to migrate")
+    asyncio.run(main(parser.parse_args()))
@@ -52,9 +52,10 @@
 # It uses beanie.Document (Pydantic v2) and fixes all library conflicts.
 # --------------------------------------------------------------------------
 
-from beanie import Document, PydanticObjectId
+from beanie import Document, Indexed, PydanticObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Literal, Union
 from datetime import datetime
 
 # --- Database Document Models (Used by Beanie) ---
@@ -66,7 +67,7 @@ class User(Document):
     Includes name, age, and profession as requested.
     """
     name: str
-    email: EmailStr
+    email: Indexed(EmailStr, unique=True) # Every login and authenticated request looks users up by email
     age: Optional[int] = None
     profession: Optional[str] = None
     hashed_password: str
@@ -82,17 +83,40 @@ class User(Document):
 class Project(Document):
     """
     The model for storing generated MVP projects.
+    Only metadata lives here; the plans and generated code are stored
+    compressed in a ProjectArtifact (see artifacts.py).
     """
     owner_id: PydanticObjectId # Links to the User's _id
     idea: str
     title: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.now)
-    product_plan: Optional[dict] = None
-    design_plan: Optional[dict] = None
-    generated_code: Optional[str] = None
 
     class Settings:
         name = "projects"
+        indexes = [
+            # GET /api/projects: one owner's projects, newest first, paged by _id
+            IndexModel([("owner_id", ASCENDING), ("_id", DESCENDING)], name="owner_id_desc"),
+        ]
+
+
+class ProjectArtifact(Document):
+    """
+    The plans and generated code of one Project.
+    Each part is zlib-compressed JSON, stored separately so a reader can
+    project just the part it needs (e.g. only product plans for the idea index).
+    """
+    project_id: Indexed(PydanticObjectId, unique=True) # Links to the Project's _id
+    owner_id: PydanticObjectId
+    encoding: str = "zlib+json"
+    product_plan: Optional[bytes] = None
+    design_plan: Optional[bytes] = None
+    generated_code: Optional[bytes] = None
+    raw_size: int = 0 # Uncompressed JSON size of all three parts, in bytes
+    sha256: str # Hash of the uncompressed parts, see artifacts.content_hash
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "project_artifacts"
 
 
 class ChatMessage(Document):
@@ -107,6 +131,90 @@ class ChatMessage(Document):
 
     class Settings:
         name = "chat_messages"
+        indexes = [
+            # Chat history and seeding a new ChatContext (both newest first, by _id)
+            IndexModel([("user_id", ASCENDING), ("_id", DESCENDING)], name="user_id_desc"),
+        ]
+
+
+class ContextMessage(BaseModel):
+    """One chat message as it is kept in a ChatContext window."""
+    id: PydanticObjectId # The ChatMessage's _id
+    sender: str
+    text: str
+
+
+class ChatContext(Document):
+    """
+    The conversation state the chat prompt is built from, one per user.
+    Recent messages are kept verbatim in `window`; older ones are folded
+    into `summary` by chat_context.py.
+    """
+    user_id: Indexed(PydanticObjectId, unique=True) # Links to the User's _id
+    summary: str = ""
+    window: List[ContextMessage] = Field(default_factory=list) # Oldest first
+    summarized_messages: int = 0 # How many messages `summary` covers
+    summary_version: int = 0 # Bumped by every fold, so two folds never apply the same messages
+    version: int = 0 # Bumped by every write, so a process can tell its cached copy is stale
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "chat_contexts"
+
+
+class GenerationJob(Document):
+    """
+    The model for tracking an asynchronous MVP generation.
+    Created by /api/generate and updated by the worker pool in jobs.py.
+    """
+    owner_id: PydanticObjectId # Links to the User's _id
+    idea: str
+    mode: str = "monolithic" # "monolithic", "fanout" or "pipelined", see main.aevocore_orchestrator
+    idempotency_key: Optional[str] = None # The Idempotency-Key header it was submitted with, if any
+    status: str = "queued" # "queued", "running", "completed" or "failed"
+    worker: Optional[str] = None # The worker process running it (jobs.WORKER_ID)
+    lease_until: Optional[datetime] = None # While running: requeued if its worker has not renewed this by then
+    project_id: Optional[PydanticObjectId] = None # Set once the Project is saved
+    error: Optional[str] = None
+    cached_stages: List[str] = Field(default_factory=list) # Stages served from the stage cache
+    timings: Optional[dict] = None # Wall time per stage, in seconds
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "generation_jobs"
+        indexes = [
+            # JobManager.start(): unfinished jobs, oldest first
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+            # JobManager: running jobs whose worker lease has expired
+            IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)], name="status_lease_until"),
+            # /api/generate: a user's earlier submission with the same Idempotency-Key
+            IndexModel(
+                [("owner_id", ASCENDING), ("idempotency_key", ASCENDING)], name="owner_idempotency_key",
+                unique=True, partialFilterExpression={"idempotency_key": {"$type": "string"}},
+            ),
+        ]
+
+
+class GenerationRun(Document):
+    """
+    The outputs of the stages a generation job has completed so far, saved as
+    each one finishes (see jobs.RunCheckpoints), so a job that is run again
+    after a restart or a failure resumes where it stopped. Deleted once the
+    job's Project is saved; runs of jobs that never complete expire after a week.
+    """
+    job_id: Indexed(PydanticObjectId, unique=True) # Links to the GenerationJob's _id
+    owner_id: PydanticObjectId
+    stages: dict = Field(default_factory=dict) # "product", "design", "engineering" -> that stage's output
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "generation_runs"
+        indexes = [
+            IndexModel([("updated_at", ASCENDING)], name="updated_at_ttl", expireAfterSeconds=7 * 24 * 60 * 60),
+        ]
 
 # --- API Data Schemas (Used by FastAPI) ---
 # This replaces the need for a separate 'schemas.py' file.
@@ -129,6 +237,19 @@ class UserDisplay(BaseModel):
     is_verified: bool
     created_at: datetime
 
+class UserSnapshot(BaseModel):
+    """
+    Projection of a User without the password hash or OTP fields.
+    This is what auth.get_current_user caches and hands to protected routes.
+    """
+    id: PydanticObjectId = Field(..., alias="_id")
+    name: str
+    email: EmailStr
+    age: Optional[int] = None
+    profession: Optional[str] = None
+    is_verified: bool = False
+    created_at: datetime
+
 class Token(BaseModel):
     """Schema for returning a JWT token."""
     access_token: str
@@ -161,6 +282,10 @@ class ChatMessageDisplay(BaseModel):
 class IdeaRequest(BaseModel):
     """Schema for the MVP generator request."""
     idea: str
+    # "monolithic": one design call and one code call.
+    # "fanout": one design and one code call per feature, run concurrently, then merged.
+    # "pipelined": like monolithic, but design starts while the product plan is still streaming.
+    mode: Literal["monolithic", "fanout", "pipelined"] = "monolithic"
 
 class ProjectDisplay(BaseModel):
     """Schema for returning project data."""
@@ -168,4 +293,49 @@ class ProjectDisplay(BaseModel):
     owner_id: PydanticObjectId
     idea: str
     title: Optional[str]
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class BulkExportRequest(BaseModel):
+    """Schema for downloading several projects as one zip."""
+    # Ids of the projects to include, or "all" for every project of the user.
+    project_ids: Union[Literal["all"], List[str]]
+
+class ProjectIdeaView(BaseModel):
+    """
+    Projection used to fill the semantic idea index without loading the code.
+    product_plan is only set on projects that predate ProjectArtifact.
+    """
+    id: PydanticObjectId = Field(..., alias="_id")
+    idea: str
+    product_plan: Optional[dict] = None
+
+class LegacyProjectPayload(BaseModel):
+    """The plans and code stored inline on projects created before ProjectArtifact."""
+    id: PydanticObjectId = Field(..., alias="_id")
+    product_plan: Optional[dict] = None
+    design_plan: Optional[dict] = None
+    generated_code: Optional[str] = None
+
+class ArtifactHashView(BaseModel):
+    """Projection of a ProjectArtifact down to its content hash."""
+    project_id: PydanticObjectId
+    sha256: str
+
+class ArtifactProductPlanView(BaseModel):
+    """Projection of a ProjectArtifact down to its compressed product plan."""
+    project_id: PydanticObjectId
+    product_plan: Optional[bytes] = None
+
+class JobDisplay(BaseModel):
+    """Schema for returning the state of a generation job."""
+    id: PydanticObjectId = Field(..., alias="_id")
+    idea: str
+    mode: str = "monolithic"
+    status: str
+    project_id: Optional[PydanticObjectId]
+    error: Optional[str]
+    cached_stages: List[str] = []
+    timings: Optional[dict] = None
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
@@ -0,0 +1,187 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.11 - Generation Progress Events
+#
+# The orchestrator reports its progress as typed events instead of only
+# printing it. The job worker publishes them to a per-job channel and
+# GET /api/jobs/{job_id}/events streams them as Server-Sent Events, so a
+# client can show the product plan long before the code is written.
+#
+# Event types (every event also has `seq`, its position in the job's stream):
+#   job_started     the worker picked the job up
+#   stage_started   {stage}
+#   stage_finished  {stage, cached, seconds, artifact}: the product plan,
+#                   the design plan or the code
+#   code_delta      {text}: code streamed by the engineering agent,
+#                   sent in pieces of about PROGRESS_DELTA_CHARS
+#   llm_retry       {agent, attempt, error}: an agent call is being retried
+#                   (see resilience.py); a retried engineering call streams
+#                   its code_delta events again from the start
+#   job_retrying    {attempt, error}: the generation is run again, from
+#                   its last completed stage
+#   job_completed   {project_id}
+#   job_failed      {error}
+#
+# Channels keep every event, so a client that connects late (or
+# reconnects with Last-Event-ID) first gets what it missed. A finished
+# channel is dropped PROGRESS_RETENTION_SECONDS after its last event.
+# Channels live in the process that runs the job; the endpoint falls back
+# to the job document for jobs run elsewhere.
+#
+# A job that is run again (requeued after a failure, or after its worker
+# died) gets its channel reset: the earlier run's events are dropped and
+# the channel reopens. Sequence numbers keep counting, so subscribers and
+# Last-Event-ID stay valid across runs.
+# --------------------------------------------------------------------------
+
+import asyncio
+import os
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from beanie import PydanticObjectId
+
+# --- Progress Configuration ---
+PROGRESS_DELTA_CHARS = int(os.getenv("PROGRESS_DELTA_CHARS", "256"))
+PROGRESS_RETENTION_SECONDS = float(os.getenv("PROGRESS_RETENTION_SECONDS", "60"))
+# A quiet event stream gets a keep-alive comment (and the job document is checked) this often.
+PROGRESS_KEEPALIVE_SECONDS = float(os.getenv("PROGRESS_KEEPALIVE_SECONDS", "5"))
+
+# Events after which nothing more is published for a job.
+TERMINAL_EVENTS = ("job_completed", "job_failed")
+
+
+class JobChannel:
+    """Every event of one job so far, plus the queues of its live subscribers."""
+    def __init__(self):
+        self.events: List[dict] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.closed = False
+        self.last_seq = 0
+        self.drop_handle: Optional[asyncio.TimerHandle] = None
+
+
+class ProgressHub:
+    """Per-process registry of job channels."""
+    def __init__(self, retention_seconds: float = PROGRESS_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._channels: Dict[PydanticObjectId, JobChannel] = {}
+        self.published = 0
+
+    def _channel(self, job_id: PydanticObjectId) -> JobChannel:
+        channel = self._channels.get(job_id)
+        if channel is None:
+            channel = self._channels[job_id] = JobChannel()
+        return channel
+
+    def publish(self, job_id: PydanticObjectId, event_type: str, **fields):
+        channel = self._channel(job_id)
+        if channel.closed:
+            return
+        channel.last_seq += 1
+        event = {"seq": channel.last_seq, "type": event_type, **fields}
+        channel.events.append(event)
+        self.published += 1
+        for queue in channel.subscribers:
+            queue.put_nowait(event)
+        if event_type in TERMINAL_EVENTS:
+            channel.closed = True
+            channel.drop_handle = asyncio.get_running_loop().call_later(
+                self.retention_seconds, self._drop, job_id, channel
+            )
+
+    def _drop(self, job_id: PydanticObjectId, channel: JobChannel):
+        if self._channels.get(job_id) is channel:
+            del self._channels[job_id]
+
+    def reset(self, job_id: PydanticObjectId):
+        """Starts a new run of the job: drops the events of its earlier run and reopens its channel."""
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return
+        if channel.drop_handle is not None:
+            channel.drop_handle.cancel()
+            channel.drop_handle = None
+        channel.events = []
+        channel.closed = False
+
+    def has_events(self, job_id: PydanticObjectId) -> bool:
+        """Whether this process has published anything for the job (and still keeps it)."""
+        channel = self._channels.get(job_id)
+        return bool(channel and channel.events)
+
+    def reporter(self, job_id: PydanticObjectId) -> "JobProgress":
+        return JobProgress(self, job_id)
+
+    async def subscribe(self, job_id: PydanticObjectId, after: int = 0,
+                        idle_timeout: Optional[float] = None) -> AsyncIterator[Optional[dict]]:
+        """
+        Yields the job's events with a seq above `after`: first the stored ones,
+        then live ones until the job's terminal event. With `idle_timeout`,
+        yields None whenever that many seconds pass without an event, so the
+        caller can send a keep-alive or check the job some other way.
+        """
+        channel = self._channel(job_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        try:
+            backlog = [event for event in channel.events if event["seq"] > after]
+            for event in backlog:
+                yield event
+            if channel.closed:
+                return
+            last_seq = backlog[-1]["seq"] if backlog else after
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=idle_timeout)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event["seq"] <= last_seq:
+                    continue # Already sent from the backlog
+                last_seq = event["seq"]
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+            if not channel.last_seq and not channel.subscribers and self._channels.get(job_id) is channel:
+                # Nothing was ever published here (e.g. the job runs in another process).
+                del self._channels[job_id]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(c.subscribers) for c in self._channels.values()),
+            "published": self.published,
+        }
+
+
+class JobProgress:
+    """
+    What the orchestrator reports to. Code tokens are gathered into
+    code_delta events of about PROGRESS_DELTA_CHARS characters.
+    """
+    def __init__(self, hub: ProgressHub, job_id: PydanticObjectId):
+        self.hub = hub
+        self.job_id = job_id
+        self._code: List[str] = []
+        self._code_chars = 0
+
+    def event(self, event_type: str, **fields):
+        self.flush_code()
+        self.hub.publish(self.job_id, event_type, **fields)
+
+    def code_token(self, text: str):
+        self._code.append(text)
+        self._code_chars += len(text)
+        if self._code_chars >= PROGRESS_DELTA_CHARS:
+            self.flush_code()
+
+    def flush_code(self):
+        if self._code:
+            text = "".join(self._code)
+            self._code, self._code_chars = [], 0
+            self.hub.publish(self.job_id, "code_delta", text=text)
+
+
+# --- Global Progress Hub ---
+hub = ProgressHub()
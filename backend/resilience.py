@@ -0,0 +1,248 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.13 - Resilient Agent Calls
+#
+# An agent's LLM call used to have no timeout and no retry: one slow or
+# failed Groq request stalled or failed the whole generation. Every agent
+# call in main.py now goes through resilience.caller.call(), which adds:
+#
+#   - Timeouts. Each attempt may take LLM_ATTEMPT_TIMEOUT_SECONDS, and all
+#     attempts of one call together (retries and waiting for an admission
+#     slot included) LLM_STAGE_DEADLINE_SECONDS. Both can be set per agent,
+#     e.g. LLM_STAGE_DEADLINES="engineering=600".
+#   - Retries. Transient failures (timeouts, connection errors, 408/429/5xx
+#     responses, malformed structured output) are retried up to
+#     LLM_MAX_RETRIES times, after a "full jitter" exponential backoff.
+#   - Hedging (LLM_HEDGE_ENABLED=1). If an attempt has not answered after
+#     the agent's recent p95 latency, an identical second request is sent
+#     and whichever answers first wins. Streamed calls are never hedged.
+#
+# Stages that did complete are kept in a Checkpoints object (persisted on
+# a GenerationRun document by jobs.RunCheckpoints). The job worker retries
+# a generation that still failed on a transient error, and the orchestrator
+# then skips the stages it already has.
+# --------------------------------------------------------------------------
+
+import asyncio
+import contextvars
+import math
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import admission
+import metrics
+
+# --- Resilience Configuration ---
+def _per_agent(name: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    """Reads e.g. LLM_STAGE_DEADLINES="engineering=600,product=60" over `defaults`."""
+    values = dict(defaults)
+    for part in os.getenv(name, "").split(","):
+        if "=" in part:
+            agent, seconds = part.split("=", 1)
+            values[agent.strip()] = float(seconds)
+    return values
+
+LLM_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "60"))
+LLM_STAGE_DEADLINE_SECONDS = float(os.getenv("LLM_STAGE_DEADLINE_SECONDS", "240"))
+# The engineering agent writes a whole app in one reply, so it gets more time by default.
+LLM_ATTEMPT_TIMEOUTS = _per_agent("LLM_ATTEMPT_TIMEOUTS", {"engineering": 180})
+LLM_STAGE_DEADLINES = _per_agent("LLM_STAGE_DEADLINES", {"engineering": 480})
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "20"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "0") == "1"
+LLM_HEDGE_MIN_SECONDS = float(os.getenv("LLM_HEDGE_MIN_SECONDS", "1"))
+
+# Recent attempt latencies kept per agent, and how many are needed before hedging starts.
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+# Errors worth another attempt, by class name, so no provider SDK has to be imported.
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "DeadlineExceeded",
+    "OutputParserException",
+}
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429}
+
+# Called as on_retry(agent, attempt, error) before each retry; the orchestrator
+# sets it to report retries as progress events.
+on_retry: contextvars.ContextVar[Optional[Callable[[str, int, BaseException], None]]] = \
+    contextvars.ContextVar("resilience_on_retry", default=None)
+
+
+class StageDeadlineExceeded(asyncio.TimeoutError):
+    """Raised when an agent call used up its whole deadline."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether `error` might go away if the same request is sent again."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and (status in TRANSIENT_STATUS_CODES or status >= 500)
+
+
+def backoff_seconds(retry: int) -> float:
+    """Full jitter: a random wait between 0 and base * 2^retry, capped at LLM_RETRY_MAX_SECONDS."""
+    return random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** retry))
+
+
+def _retry_after(error: BaseException) -> float:
+    """The Retry-After of a 429/503 response, if the error carries one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AgentCaller:
+    """Runs agent LLM calls with timeouts, retries and optional hedging."""
+    def __init__(self, max_retries: int = LLM_MAX_RETRIES, hedge: bool = LLM_HEDGE_ENABLED):
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.calls = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedges_won = 0
+        self.deadlines_exceeded = 0
+        self.failures = 0
+
+    def attempt_timeout(self, agent: str) -> float:
+        return LLM_ATTEMPT_TIMEOUTS.get(agent, LLM_ATTEMPT_TIMEOUT_SECONDS)
+
+    def deadline(self, agent: str) -> float:
+        return LLM_STAGE_DEADLINES.get(agent, LLM_STAGE_DEADLINE_SECONDS)
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        """The agent's recent p95 attempt latency, or None until there are enough samples."""
+        latencies = self._latencies.get(agent)
+        if not latencies or len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(latencies)
+        p95 = ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+        return max(LLM_HEDGE_MIN_SECONDS, p95)
+
+    async def _attempt(self, agent: str, run: Callable[[], Awaitable[Any]],
+                       started: Optional[asyncio.Event] = None) -> Any:
+        """One request: waits for an admission slot, then for the model, within the attempt timeout."""
+        async with admission.llm_gate.slot(agent):
+            if started is not None:
+                started.set()
+            start = time.perf_counter()
+            result = await asyncio.wait_for(run(), self.attempt_timeout(agent))
+        latencies = self._latencies.get(agent)
+        if latencies is None:
+            latencies = self._latencies[agent] = deque(maxlen=LATENCY_WINDOW)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    async def _hedged_attempt(self, agent: str, run: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        An attempt that sends a duplicate request if the first has not answered
+        within the hedge delay (counted from when it got its admission slot).
+        """
+        delay = self.hedge_delay(agent)
+        if delay is None:
+            return await self._attempt(agent, run)
+
+        started = asyncio.Event()
+        first = asyncio.create_task(self._attempt(agent, run, started))
+        slot_granted = asyncio.create_task(started.wait())
+        second = None
+        try:
+            await asyncio.wait([first, slot_granted], return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait([first], timeout=delay)
+            if done:
+                return first.result()
+
+            self.hedged += 1
+            second = asyncio.create_task(self._attempt(agent, run))
+            pending, error = {first, second}, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = "hedge" if task is second else "original"
+                        if task is second:
+                            self.hedges_won += 1
+                        metrics.LLM_HEDGES.inc(agent=agent, winner=winner)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in (first, second, slot_granted):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def call(self, agent: str, run: Callable[[], Awaitable[Any]], hedge: bool = True) -> Any:
+        """
+        Returns `await run()`, retried and (unless `hedge` is False) hedged as
+        configured. `run` is called once per request sent, so it must start a
+        new LLM call each time. Raises StageDeadlineExceeded once the agent's
+        deadline has passed, or the last error if it was not transient or
+        the retries ran out.
+        """
+        self.calls += 1
+        deadline = time.monotonic() + self.deadline(agent)
+        retry = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                attempt = self._hedged_attempt(agent, run) if hedge and self.hedge else self._attempt(agent, run)
+                return await asyncio.wait_for(attempt, remaining)
+            except Exception as e:
+                if time.monotonic() >= deadline:
+                    self.deadlines_exceeded += 1
+                    raise StageDeadlineExceeded(
+                        f"The {agent} agent did not answer within {self.deadline(agent):.0f} seconds."
+                    ) from e
+                wait = max(backoff_seconds(retry), _retry_after(e))
+                if retry >= self.max_retries or not is_transient(e) or time.monotonic() + wait >= deadline:
+                    self.failures += 1
+                    raise
+                retry += 1
+                self.retries += 1
+                metrics.LLM_RETRIES.inc(agent=agent)
+                print(f"⚠️ [{agent}] LLM call failed ({type(e).__name__}: {e}); retry {retry} in {wait:.1f}s...")
+                listener = on_retry.get()
+                if listener is not None:
+                    listener(agent, retry, e)
+                await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls, "retries": self.retries, "hedged": self.hedged, "hedges_won": self.hedges_won,
+            "deadlines_exceeded": self.deadlines_exceeded, "failures": self.failures,
+        }
+
+
+# --- Stage Checkpoints ---
+
+class Checkpoints:
+    """
+    The outputs of the stages a generation has completed ("product",
+    "design", "engineering"). The orchestrator saves each stage as it
+    finishes and skips the stages it finds here. This class keeps them in
+    memory; jobs.RunCheckpoints also saves them to MongoDB.
+    """
+    def __init__(self):
+        self._stages: Dict[str, Any] = {}
+
+    async def load(self, stage: str) -> Optional[Any]:
+        return self._stages.get(stage)
+
+    async def save(self, stage: str, value: Any):
+        self._stages[stage] = value
+
+
+# --- Global Agent Caller ---
+caller = AgentCaller()
@@ -0,0 +1,206 @@
+# --------------------------------------------------------------------------
+# AutoGenesis: Phase 6, Step 6.2 - Agent Stage Cache
+#
+# Many users submit near-identical ideas, and retried jobs repeat stages
+# that already succeeded. This cache stores each agent's output under a
+# content hash of (stage name, prompt template, model, temperature, input),
+# so a repeated stage returns in milliseconds without spending any tokens.
+# Only the raw idea is normalized (see normalize_idea); the plans that feed
+# the later stages are hashed exactly, since their wording ends up in the
+# generated code.
+#
+# Tier 1 is an in-memory LRU with a TTL. Tier 2 is an optional directory
+# of JSON files (set STAGE_CACHE_DIR) that survives restarts and is shared
+# by every worker process on the machine.
+# --------------------------------------------------------------------------
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+# --- Cache Configuration ---
+STAGE_CACHE_ENABLED = os.getenv("STAGE_CACHE_ENABLED", "1") == "1"
+STAGE_CACHE_MAX_ENTRIES = int(os.getenv("STAGE_CACHE_MAX_ENTRIES", "512"))
+STAGE_CACHE_TTL_SECONDS = int(os.getenv("STAGE_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+STAGE_CACHE_DIR = os.getenv("STAGE_CACHE_DIR") # Unset = memory only
+
+
+def normalize_idea(idea: str) -> str:
+    """Case-folds an idea and collapses its whitespace, so trivially different submissions share a key."""
+    return " ".join(idea.split()).casefold()
+
+
+def make_key(stage: str, template: str, model_name: Optional[str],
+             temperature: Optional[float], inputs: Any) -> str:
+    """
+    Returns the content hash that identifies one stage invocation.
+    `inputs` is hashed as canonical JSON (sorted keys), without any other normalization.
+    """
+    material = json.dumps(
+        {
+            "stage": stage,
+            "template": template,
+            "model": model_name,
+            "temperature": temperature,
+            "inputs": inputs,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    Two-tier cache for agent stage outputs.
+    Thread-safe, so it can be shared by the event loop and worker threads.
+    """
+    def __init__(self, max_entries: int = STAGE_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = STAGE_CACHE_TTL_SECONDS,
+                 disk_dir: Optional[str] = STAGE_CACHE_DIR,
+                 enabled: bool = STAGE_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    # --- Disk Tier ---
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Tuple[bool, Any, float]:
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return False, None, 0.0
+        if record.get("expires_at", 0) < time.time():
+            return False, None, 0.0
+        return True, record.get("value"), record["expires_at"]
+
+    def _write_disk(self, key: str, stage: str, value: Any, expires_at: float):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stage": stage, "expires_at": expires_at, "value": value}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            print(f"!!! [Stage Cache] Could not write disk entry {key}: {e}")
+
+    # --- Public API ---
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Returns (found, value) for a key, checking memory and then disk."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, copy.deepcopy(value)
+                del self._entries[key]
+
+        if self.disk_dir:
+            found, value, expires_at = self._read_disk(key)
+            if found:
+                with self._lock:
+                    self._store_memory(key, copy.deepcopy(value), expires_at)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def set(self, key: str, value: Any, stage: str = ""):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store_memory(key, copy.deepcopy(value), expires_at)
+        if self.disk_dir:
+            self._write_disk(key, stage, value, expires_at)
+
+    def _store_memory(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, stage: str, template: str, model_name: Optional[str],
+                       temperature: Optional[float], inputs: Any,
+                       compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Returns (value, from_cache). Calls compute() and stores its result on a miss.
+        """
+        if not self.enabled:
+            return compute(), False
+
+        key = make_key(stage, template, model_name, temperature, inputs)
+        found, value = self.get(key)
+        if found:
+            return value, True
+
+        value = compute()
+        self.set(key, value, stage=stage)
+        return value, False
+
+    async def aget_or_compute(self, stage: str, template: str, model_name: Optional[str],
+                              temperature: Optional[float], inputs: Any,
+                              compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async version of get_or_compute for coroutine stages.
+        Disk-tier reads and writes run in a worker thread.
+        """
+        if not self.enabled:
+            return await compute(), False
+
+        key = make_key(stage, template, model_name, temperature, inputs)
+        if self.disk_dir:
+            found, value = await asyncio.to_thread(self.get, key)
+        else:
+            found, value = self.get(key)
+        if found:
+            return value, True
+
+        value = await compute()
+        if self.disk_dir:
+            await asyncio.to_thread(self.set, key, value, stage)
+        else:
+            self.set(key, value, stage=stage)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+# Process-wide cache used by the agents in main.py.
+cache = StageCache()
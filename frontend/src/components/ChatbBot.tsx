@@ -4,6 +4,7 @@ import { useAuth } from '../context/AuthContext';
 import { toast } from 'react-hot-toast';
 
 const API_URL = 'http://127.0.0.1:8000';
+const HISTORY_PAGE_SIZE = 50;
 
 interface Message {
     id: string;
@@ -12,11 +13,21 @@ interface Message {
     timestamp: string; 
 }
 
+interface HistoryPage {
+    messages: Message[];
+    olderCursor: string | null;
+}
+
 const Chatbot: React.FC = () => {
     const [messages, setMessages] = useState<Message[]>([]);
     const [input, setInput] = useState('');
     const [isLoading, setIsLoading] = useState(false);
+    const [olderCursor, setOlderCursor] = useState<string | null>(null);
+    const [isLoadingOlder, setIsLoadingOlder] = useState(false);
     const messagesEndRef = useRef<HTMLDivElement>(null);
+    const scrollRef = useRef<HTMLDivElement>(null);
+    // Distance from the bottom to keep while older messages are prepended.
+    const keepScrollRef = useRef<number | null>(null);
     const { token, logout } = useAuth();
 
     
@@ -30,6 +41,32 @@ const Chatbot: React.FC = () => {
         return headers;
     };
 
+    // History comes newest first, one page at a time; X-Next-Cursor points at the next, older page.
+    const fetchHistoryPage = async (before: string | null): Promise<HistoryPage | null> => {
+        const query = before
+            ? `?before=${encodeURIComponent(before)}&limit=${HISTORY_PAGE_SIZE}`
+            : `?limit=${HISTORY_PAGE_SIZE}`;
+        const response = await fetch(`${API_URL}/api/chat/history${query}`, {
+            method: 'GET',
+            headers: getAuthHeaders()
+        });
+
+        if (response.status === 401) {
+            toast.error('Session expired. Please log in again.');
+            logout();
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error('Network response was not ok');
+        }
+
+        const page: (Message & { _id: string })[] = await response.json();
+        return {
+            messages: page.reverse().map(msg => ({ ...msg, id: msg._id })),
+            olderCursor: response.headers.get('X-Next-Cursor'),
+        };
+    };
+
     useEffect(() => {
         const fetchHistory = async () => {
             
@@ -39,22 +76,11 @@ const Chatbot: React.FC = () => {
             
             setIsLoading(true);
             try {
-                const response = await fetch(`${API_URL}/api/chat/history`, {
-                    method: 'GET',
-                    headers: getAuthHeaders()
-                });
-                
-                if (response.status === 401) {
-                    toast.error('Session expired. Please log in again.');
-                    logout();
-                    return;
-                }
-                if (!response.ok) {
-                    throw new Error('Network response was not ok');
-                }
-                
-                const history: Message[] = await response.json();
-                setMessages(history);
+                // Only the latest page; earlier ones are loaded when the user scrolls up.
+                const page = await fetchHistoryPage(null);
+                if (!page) return;
+                setMessages(page.messages);
+                setOlderCursor(page.olderCursor);
 
             } catch (error) {
                 console.error("Failed to fetch chat history:", error);
@@ -66,7 +92,39 @@ const Chatbot: React.FC = () => {
         fetchHistory();
     }, [token, logout]); 
 
+    const loadOlderMessages = async () => {
+        if (!olderCursor || isLoadingOlder) return;
+
+        setIsLoadingOlder(true);
+        try {
+            const page = await fetchHistoryPage(olderCursor);
+            if (!page) return;
+            if (scrollRef.current) {
+                keepScrollRef.current = scrollRef.current.scrollHeight - scrollRef.current.scrollTop;
+            }
+            setMessages(prev => [...page.messages, ...prev]);
+            setOlderCursor(page.olderCursor);
+        } catch (error) {
+            console.error("Failed to fetch earlier messages:", error);
+            toast.error("Sorry, I couldn't load earlier messages.");
+        } finally {
+            setIsLoadingOlder(false);
+        }
+    };
+
+    const handleScroll = (e: React.UIEvent<HTMLDivElement>) => {
+        if (e.currentTarget.scrollTop === 0) {
+            loadOlderMessages();
+        }
+    };
+
     useEffect(() => {
+        if (keepScrollRef.current !== null && scrollRef.current) {
+            // Earlier messages were added on top: stay where the user was reading.
+            scrollRef.current.scrollTop = scrollRef.current.scrollHeight - keepScrollRef.current;
+            keepScrollRef.current = null;
+            return;
+        }
         if (messagesEndRef.current) {
             messagesEndRef.current.scrollIntoView({ behavior: 'smooth' });
         }
@@ -88,8 +146,10 @@ const Chatbot: React.FC = () => {
         setInput('');
         setIsLoading(true);
 
+        const aiMessageId = `${userMessage.id}-ai`;
+
         try {
-            const response = await fetch(`${API_URL}/api/chat`, {
+            const response = await fetch(`${API_URL}/api/chat/stream`, {
                 method: 'POST',
                 headers: getAuthHeaders(),
                 body: JSON.stringify({ question: currentInput }),
@@ -100,17 +160,50 @@ const Chatbot: React.FC = () => {
                 logout();
                 return;
             }
-            if (!response.ok) {
+            if (!response.ok || !response.body) {
                 throw new Error('Failed to get a response from the server.');
             }
 
-            const aiResponse: Message = await response.json();
-            setMessages(prev => [...prev, aiResponse]); 
+            // Show the reply as it streams in, one Server-Sent Event at a time.
+            setMessages(prev => [...prev, { id: aiMessageId, sender: 'ai', text: '', timestamp: new Date().toISOString() }]);
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                const events = buffer.split('\n\n');
+                buffer = events.pop() || '';
+
+                for (const rawEvent of events) {
+                    let eventName = 'message';
+                    let data = '';
+                    for (const line of rawEvent.split('\n')) {
+                        if (line.startsWith('event: ')) eventName = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    }
+                    if (!data) continue;
+                    const payload = JSON.parse(data);
+
+                    if (eventName === 'error') {
+                        throw new Error(payload.detail);
+                    }
+                    if (eventName === 'done') {
+                        setMessages(prev => prev.map(msg => msg.id === aiMessageId ? { ...payload, id: payload._id } : msg));
+                    } else {
+                        setMessages(prev => prev.map(msg => msg.id === aiMessageId ? { ...msg, text: msg.text + payload.token } : msg));
+                    }
+                }
+            }
 
         } catch (error) {
             console.error("Error sending message:", error);
             toast.error("Sorry, something went wrong. Please try again.");
-            setMessages(prev => prev.filter(msg => msg.id !== userMessage.id));
+            setMessages(prev => prev.filter(msg => msg.id !== userMessage.id && msg.id !== aiMessageId));
         } finally {
             setIsLoading(false);
         }
@@ -118,8 +211,18 @@ const Chatbot: React.FC = () => {
 
     return (
         <div className="w-full max-w-3xl mx-auto flex flex-col h-[70vh] bg-slate-800 rounded-xl border border-slate-700 shadow-xl">
-            <div className="flex-1 p-6 overflow-y-auto">
+            <div ref={scrollRef} onScroll={handleScroll} className="flex-1 p-6 overflow-y-auto">
                 <div className="flex flex-col space-y-4">
+                    {olderCursor && (
+                        <button
+                            type="button"
+                            onClick={loadOlderMessages}
+                            className="self-center text-sm text-slate-400 hover:text-slate-200 transition-colors disabled:opacity-50"
+                            disabled={isLoadingOlder}
+                        >
+                            {isLoadingOlder ? 'Loading...' : 'Load earlier messages'}
+                        </button>
+                    )}
                     {messages.map((msg) => (
                         <div key={msg.id} className={`flex items-end ${msg.sender === 'user' ? 'justify-end' : 'justify-start'}`}>
                             <div className={`px-4 py-3 rounded-2xl max-w-sm md:max-w-md ${msg.sender === 'user' ? 'bg-sky-600 text-white rounded-br-none' : 'bg-slate-700 text-slate-200 rounded-bl-none'}`}>
@@ -4,11 +4,25 @@ import { useAuth } from '../context/AuthContext';
 import { toast } from 'react-hot-toast';
 
 const API_URL = 'http://127.0.0.1:8000';
+const JOB_POLL_INTERVAL_MS = 2000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const STAGE_MESSAGES: Record<string, string> = {
+    product: 'Product Agent is shaping the product plan...',
+    design: 'Design Agent is laying out the UI...',
+    engineering: 'Engineering Agent is writing the code...',
+};
+
+type JobOutcome = { status: 'completed' | 'failed'; error?: string };
 
 const IdeaGeneratorForm: React.FC = () => {
     const [idea, setIdea] = useState('');
     const [isLoading, setIsLoading] = useState(false);
     const formRef = useRef<HTMLDivElement>(null);
+    // Idempotency key of the current idea. Submitting the same idea again after a
+    // failure reuses it, so the backend resumes that job instead of starting over.
+    const submissionRef = useRef<{ idea: string; key: string } | null>(null);
     const { token, logout } = useAuth();
 
     useEffect(() => {
@@ -32,6 +46,49 @@ const IdeaGeneratorForm: React.FC = () => {
         return headers;
     };
 
+    // Follows the job's progress events. Returns null if the stream ends early,
+    // in which case the caller falls back to polling.
+    const followJobEvents = async (jobId: string, onStatus: (message: string) => void): Promise<JobOutcome | null> => {
+        const response = await fetch(`${API_URL}/api/jobs/${jobId}/events`, {
+            headers: getAuthHeaders(),
+        });
+        if (!response.ok || !response.body) {
+            return null;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) return null;
+            buffer += decoder.decode(value, { stream: true });
+
+            const events = buffer.split('\n\n');
+            buffer = events.pop() || '';
+
+            for (const rawEvent of events) {
+                let data = '';
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('data: ')) data += line.slice(6);
+                }
+                if (!data) continue;
+                const payload = JSON.parse(data);
+
+                if (payload.type === 'stage_started') {
+                    onStatus(STAGE_MESSAGES[payload.stage] || 'Working...');
+                } else if (payload.type === 'stage_finished' && payload.stage === 'product' && payload.artifact) {
+                    onStatus(`Product plan ready: ${payload.artifact.product_name}. Designing the app...`);
+                } else if (payload.type === 'job_completed') {
+                    return { status: 'completed' };
+                } else if (payload.type === 'job_failed') {
+                    return { status: 'failed', error: payload.error };
+                }
+            }
+        }
+    };
+
     const handleSubmit = async (e: React.FormEvent) => {
         e.preventDefault();
         if (idea.trim() === '' || isLoading || !token) {
@@ -45,14 +102,19 @@ const IdeaGeneratorForm: React.FC = () => {
         
         const loadingToast = toast.loading('EvoCore™ is initializing... This may take a moment.');
 
+        const submission = submissionRef.current?.idea === idea
+            ? submissionRef.current
+            : { idea, key: crypto.randomUUID() };
+        submissionRef.current = submission;
+
         try {
             const response = await fetch(`${API_URL}/api/generate`, {
                 method: 'POST',
-                headers: getAuthHeaders(),
+                headers: { ...getAuthHeaders(), 'Idempotency-Key': submission.key },
                 body: JSON.stringify({ idea }),
             });
 
-            const data = await response.json();
+            let job = await response.json();
 
             if (response.status === 401) {
                 toast.error('Session expired. Please log in again.');
@@ -61,11 +123,44 @@ const IdeaGeneratorForm: React.FC = () => {
             }
             
             if (!response.ok) {
-                throw new Error(data.detail || 'An unknown error occurred.');
+                throw new Error(job.detail || 'An unknown error occurred.');
+            }
+
+            // The generation runs in the background; follow its progress events,
+            // and poll the job if the event stream is not available.
+            try {
+                const outcome = await followJobEvents(job._id, (message) => toast.loading(message, { id: loadingToast }));
+                if (outcome) {
+                    job = { ...job, ...outcome };
+                }
+            } catch (streamError) {
+                console.warn("Progress events unavailable, polling instead:", streamError);
+            }
+
+            while (job.status === 'queued' || job.status === 'running') {
+                await sleep(JOB_POLL_INTERVAL_MS);
+                const jobResponse = await fetch(`${API_URL}/api/jobs/${job._id}`, {
+                    headers: getAuthHeaders(),
+                });
+                if (jobResponse.status === 401) {
+                    toast.error('Session expired. Please log in again.');
+                    logout();
+                    return;
+                }
+                const jobData = await jobResponse.json();
+                if (!jobResponse.ok) {
+                    throw new Error(jobData.detail || 'Could not check the generation status.');
+                }
+                job = jobData;
+            }
+
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'An error occurred during generation.');
             }
 
             toast.dismiss(loadingToast);
-            toast.success(`Project "${data.title}" saved to your dashboard!`);
+            toast.success('Your new project has been saved to your dashboard!');
+            submissionRef.current = null;
             setIdea('');
 
         } catch (error) {
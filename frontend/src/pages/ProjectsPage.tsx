@@ -16,6 +16,10 @@ const ProjectsPage: React.FC<{ onNavigate?: (path: string) => void }> = ({ onNav
     const [projects, setProjects] = useState<Project[]>([]);
     const [isLoading, setIsLoading] = useState(true);
     const [downloadingId, setDownloadingId] = useState<string | null>(null);
+    const [isDownloadingAll, setIsDownloadingAll] = useState(false);
+    // Cursor for the next page of projects (from the X-Next-Cursor header), null when there are no more.
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const { token, logout } = useAuth();
 
     const getAuthHeaders = () => {
@@ -25,28 +29,37 @@ const ProjectsPage: React.FC<{ onNavigate?: (path: string) => void }> = ({ onNav
         };
     };
 
+    // Fetches one page of projects. Returns null if the session expired.
+    const fetchProjectPage = async (after: string | null) => {
+        const query = after ? `?after=${encodeURIComponent(after)}` : '';
+        const response = await fetch(`${API_URL}/api/projects${query}`, {
+            method: 'GET',
+            headers: getAuthHeaders()
+        });
+
+        if (response.status === 401) {
+            toast.error('Session expired. Please log in again.');
+            logout();
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error('Failed to fetch your projects.');
+        }
+
+        const data: Project[] = await response.json();
+        return { data, cursor: response.headers.get('X-Next-Cursor') };
+    };
+
     useEffect(() => {
         const fetchProjects = async () => {
             if (!token) return;
             
             setIsLoading(true);
             try {
-                const response = await fetch(`${API_URL}/api/projects`, {
-                    method: 'GET',
-                    headers: getAuthHeaders()
-                });
-
-                if (response.status === 401) {
-                    toast.error('Session expired. Please log in again.');
-                    logout();
-                    return;
-                }
-                if (!response.ok) {
-                    throw new Error('Failed to fetch your projects.');
-                }
-
-                const data: Project[] = await response.json();
-                setProjects(data);
+                const page = await fetchProjectPage(null);
+                if (!page) return;
+                setProjects(page.data);
+                setNextCursor(page.cursor);
 
             } catch (error) {
                 console.error("Failed to fetch projects:", error);
@@ -59,6 +72,22 @@ const ProjectsPage: React.FC<{ onNavigate?: (path: string) => void }> = ({ onNav
         fetchProjects();
     }, [token, logout]);
 
+    const handleLoadMore = async () => {
+        if (!nextCursor) return;
+        setIsLoadingMore(true);
+        try {
+            const page = await fetchProjectPage(nextCursor);
+            if (!page) return;
+            setProjects(prev => [...prev, ...page.data]);
+            setNextCursor(page.cursor);
+        } catch (error) {
+            console.error("Failed to fetch more projects:", error);
+            toast.error(error instanceof Error ? error.message : "Could not load more projects.");
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
 
     const handleDownload = async (project: Project) => {
         if (!token) {
@@ -114,18 +143,81 @@ const ProjectsPage: React.FC<{ onNavigate?: (path: string) => void }> = ({ onNav
     };
 
 
+    // Downloads every project as one zip, with a folder per project.
+    const handleDownloadAll = async () => {
+        if (!token) {
+            toast.error("You are not logged in.");
+            return;
+        }
+
+        setIsDownloadingAll(true);
+        toast.loading('Preparing your projects...');
+
+        try {
+            const response = await fetch(`${API_URL}/api/projects/export`, {
+                method: 'POST',
+                headers: getAuthHeaders(),
+                body: JSON.stringify({ project_ids: 'all' })
+            });
+
+            if (response.status === 401) {
+                toast.dismiss();
+                toast.error('Session expired. Please log in again.');
+                logout();
+                return;
+            }
+            if (!response.ok) {
+                 throw new Error('Failed to download projects.');
+            }
+
+            const blob = await response.blob();
+            const url = window.URL.createObjectURL(blob);
+
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = 'autogenesis_projects.zip';
+            document.body.appendChild(a);
+            a.click();
+
+            // Clean up
+            document.body.removeChild(a);
+            window.URL.revokeObjectURL(url);
+
+            toast.dismiss();
+            toast.success('Download started!');
+
+        } catch (error) {
+            console.error("Failed to download projects:", error);
+            toast.dismiss();
+            toast.error(error instanceof Error ? error.message : "Could not download projects.");
+        } finally {
+            setIsDownloadingAll(false);
+        }
+    };
+
     return (
         <div className="min-h-screen container mx-auto px-4 py-28">
             <div className="flex justify-between items-center mb-12">
                 <h1 className="text-5xl font-extrabold text-white">
                     My Projects
                 </h1>
-                <button
-                    className="bg-sky-600 hover:bg-sky-700 text-white font-bold py-3 px-8 rounded-lg text-lg transition-transform transform hover:scale-105 shadow-[0_0_20px_rgba(56,189,248,0.5)]"
-                    onClick={() => onNavigate && onNavigate('/generate')}
-                >
-                    + New Project
-                </button>
+                <div className="flex items-center gap-4">
+                    {projects.length > 0 && (
+                        <button
+                            className="bg-slate-700 hover:bg-slate-600 text-white font-bold py-3 px-6 rounded-lg text-lg transition-colors disabled:opacity-50"
+                            onClick={handleDownloadAll}
+                            disabled={isDownloadingAll}
+                        >
+                            {isDownloadingAll ? 'Preparing...' : 'Download all'}
+                        </button>
+                    )}
+                    <button
+                        className="bg-sky-600 hover:bg-sky-700 text-white font-bold py-3 px-8 rounded-lg text-lg transition-transform transform hover:scale-105 shadow-[0_0_20px_rgba(56,189,248,0.5)]"
+                        onClick={() => onNavigate && onNavigate('/generate')}
+                    >
+                        + New Project
+                    </button>
+                </div>
             </div>
 
             {isLoading ? (
@@ -190,6 +282,18 @@ const ProjectsPage: React.FC<{ onNavigate?: (path: string) => void }> = ({ onNav
                     ))}
                 </div>
             )}
+
+            {!isLoading && nextCursor && (
+                <div className="flex justify-center mt-12">
+                    <button
+                        onClick={handleLoadMore}
+                        disabled={isLoadingMore}
+                        className="bg-slate-700 hover:bg-slate-600 text-white font-bold py-3 px-8 rounded-lg transition-colors disabled:opacity-50"
+                    >
+                        {isLoadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 };